@@ -5,10 +5,11 @@
 
 # -----------------------------------------------------------------------------------------------------------------------------------------------------------------
 # PURPOSE:
-#  * Download Prebid Server configuration files and scripts from an S3 bucket.
-#  * The S3 bucket name is obtained from the environment variable DOCKER_CONFIGS_S3_BUCKET_NAME.
-#  * The configuration files are downloaded into a local /prebid-configs directory.
-#  * The default and current configuration files are fetched from two specific prefixes in the S3 bucket.
+#  * Set up Prebid Server configuration files and scripts in a local /prebid-configs directory.
+#  * The default configuration files baked into the image are copied first.
+#  * The default and current configuration files are then fetched from two specific prefixes in the S3 bucket obtained from the
+#    environment variable DOCKER_CONFIGS_S3_BUCKET_NAME. Only files that differ from the local copies are downloaded, in parallel.
+#  * The script fails when the files cannot be fetched, rather than starting with the default configuration files only.
 #  * After download, the script verifies that essential configuration files exist.
 #  * The entrypoint script is then executed to start the Docker containers.
 # -----------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -20,35 +21,34 @@ PREBID_CONFIGS_DIR="prebid-configs"
 ENTRYPOINT_SCRIPT="entrypoint.sh"
 REQUIRED_CONFIG_FILES="${ENTRYPOINT_SCRIPT} prebid-config.yaml prebid-logging.xml"
 ENTRYPOINT_DIR="../${PREBID_CONFIGS_DIR}"
+BAKED_CONFIG_DIR="../prebid-configs-default"
+FETCH_CONFIGS_SCRIPT="../fetch_configs.py"
 
 # Check if the S3 bucket environment variable is set
 if [ -z "${DOCKER_CONFIGS_S3_BUCKET_NAME:-}" ]; then
     echo "Error: DOCKER_CONFIGS_S3_BUCKET_NAME environment variable is not set"
     exit 1
 else
-    # Define S3 paths
-    DEFAULT_S3_PATH="s3://${DOCKER_CONFIGS_S3_BUCKET_NAME}/prebid-server/default/"
-    CURRENT_S3_PATH="s3://${DOCKER_CONFIGS_S3_BUCKET_NAME}/prebid-server/current/"
-    
     echo "Cleaning up and recreating ${ENTRYPOINT_DIR}"
-    rm -rvf "${ENTRYPOINT_DIR}" || { echo "Failed to remove ${ENTRYPOINT_DIR}"; exit 1; }
-    mkdir -pv "${ENTRYPOINT_DIR}" || { echo "Failed to create ${ENTRYPOINT_DIR}"; exit 1; }
+    rm -rf "${ENTRYPOINT_DIR}" || { echo "Failed to remove ${ENTRYPOINT_DIR}"; exit 1; }
+    mkdir -p "${ENTRYPOINT_DIR}" || { echo "Failed to create ${ENTRYPOINT_DIR}"; exit 1; }
 
-    # Download default Prebid configuration files from S3
-    echo "Downloading default configuration files from S3 bucket: ${DEFAULT_S3_PATH}"
-    if aws s3 cp "$DEFAULT_S3_PATH" "$ENTRYPOINT_DIR" --recursive --exclude "README.md"; then
-        echo "Successfully downloaded default configuration files"
-    else
-        echo "Failed to download default configuration files"
-        exit 1
+    # Copy the default Prebid configuration files baked into the image
+    if [ -d "${BAKED_CONFIG_DIR}" ]; then
+        echo "Copying default configuration files from ${BAKED_CONFIG_DIR}"
+        cp -R "${BAKED_CONFIG_DIR}/." "${ENTRYPOINT_DIR}" || { echo "Failed to copy default configuration files"; exit 1; }
+        rm -f "${ENTRYPOINT_DIR}/README.md"
     fi
 
-    # Download current Prebid configuration files from S3 (ignore if missing)
-    echo "Downloading current configuration files from S3 bucket: ${CURRENT_S3_PATH}"
-    if aws s3 cp "$CURRENT_S3_PATH" "$ENTRYPOINT_DIR" --recursive --exclude "README.md"; then
-        echo "Successfully downloaded current configuration files"
+    # Fetch the default and current Prebid configuration files from S3, files in current override files in default
+    echo "Fetching configuration files from S3 bucket: ${DOCKER_CONFIGS_S3_BUCKET_NAME}"
+    # a task must not serve traffic with the default configuration when the current one cannot be fetched, so it stops and ECS replaces it
+    if python3 "${FETCH_CONFIGS_SCRIPT}" --bucket "${DOCKER_CONFIGS_S3_BUCKET_NAME}" --destination "${ENTRYPOINT_DIR}" \
+        prebid-server/default prebid-server/current; then
+        echo "Successfully fetched configuration files"
     else
-        echo "Warning: Failed to download current configuration files, proceeding without them"
+        echo "Error: Failed to fetch configuration files from S3 bucket: ${DOCKER_CONFIGS_S3_BUCKET_NAME}"
+        exit 1
     fi
 fi
 
@@ -61,6 +61,6 @@ for required_config_file in $REQUIRED_CONFIG_FILES; do
     fi
 done
 
-# Execute the entrypoint script to start Docker containers
+# Execute the entrypoint script to start Docker containers, replacing this shell so the script receives the stop signal of ECS
 echo "Executing ${ENTRYPOINT_SCRIPT}"
-sh "${ENTRYPOINT_DIR}/${ENTRYPOINT_SCRIPT}" || { echo "Failed to execute ${ENTRYPOINT_SCRIPT}"; exit 1; }
+exec sh "${ENTRYPOINT_DIR}/${ENTRYPOINT_SCRIPT}"
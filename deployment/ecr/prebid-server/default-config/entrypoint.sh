@@ -24,8 +24,43 @@
 # the string "default-container-id" is returned instead so that the
 # container can be run locally.
 #
-# Metrics are sent to /mnt/efs/metrics folder also using the container ID
-# in the path. Files have the name prebid-metrics.log.
+# Metrics are written to the local ephemeral storage of the task under
+# METRICS_BUFFER_DIR, also using the container ID in the path, so request
+# threads never wait on EFS. Files have the name prebid-metrics.log.
+# ship_metrics.py moves the rolled archives to the /mnt/efs/metrics folder,
+# or to METRICS_SHIP_DESTINATION when it is set. On SIGTERM, Prebid Server is
+# stopped first, then the shipper compresses and ships the remaining logs.
+# With METRICS_SIDECAR_ENABLED=true, a sidecar container of the task uploads
+# the archives to S3 instead. With METRICS_INGESTION=Streaming, the log router
+# container of the task streams the metrics log to Firehose. The rolled logs
+# are never shipped, so they are not compressed and only kept within
+# METRICS_STREAMING_BUFFER_MAX_SIZE, long enough for the log router to read
+# the end of a rolled log.
+#
+# The JVM is sized from a profile passed by the stack as environment variables:
+#   JVM_PROFILE                 latency (G1, short pauses) or throughput (ParallelGC)
+#   JVM_GC                      G1, ZGC or Parallel, overrides the profile default
+#   JVM_HEAP_PERCENTAGE         percentage of the task memory used for the heap
+#   JVM_MAX_GC_PAUSE_MILLIS     pause time goal for G1 and ParallelGC
+#   JVM_ACTIVE_PROCESSOR_COUNT  processors the JVM sizes its thread pools for
+# Unset variables fall back to the defaults of the profile, so the heap follows
+# the memory of the task definition.
+#
+# The AppCDS archive baked into the image, or the archive set with CDS_ARCHIVE,
+# is used when it exists. target/prebid-server.jar is the jar extracted by the
+# image build, its dependencies are in target/lib, so the archive matches it.
+#
+# Before the task reports healthy, warm_up.py replays the OpenRTB requests of
+# WARMUP_CORPUS_DIR (the warmup folder of the configuration files by default)
+# against the auction endpoint on localhost. The container health check fails
+# while WARMUP_PENDING_FILE exists, the file is removed once the warm-up ends.
+# The ALB target group checks HEALTH_CHECK_PORT, served by health_endpoint.py,
+# which also fails while the file exists and then reports the /status of
+# Prebid Server, so the ALB does not route requests to a cold task either.
+#   WARMUP_ENABLED       false skips the warm-up
+#   WARMUP_REQUESTS      number of requests replayed
+#   WARMUP_CONCURRENCY   requests in flight
+#   WARMUP_TIMEOUT_SECS  time limit of the warm-up, including the startup
 #
 # The default Java executable entry point specified in this script can be
 # customized or replaced with a different command or executable.
@@ -33,9 +68,127 @@
 
 PREBID_CONFIGS_DIR="/prebid-configs"
 
+JVM_PROFILE="${JVM_PROFILE:-latency}"
+case "${JVM_PROFILE}" in
+    throughput)
+        DEFAULT_GC="Parallel"
+        DEFAULT_HEAP_PERCENTAGE=80
+        DEFAULT_MAX_GC_PAUSE_MILLIS=""
+        ;;
+    latency)
+        DEFAULT_GC="G1"
+        DEFAULT_HEAP_PERCENTAGE=75
+        DEFAULT_MAX_GC_PAUSE_MILLIS=50
+        ;;
+    *)
+        echo "Warning: Unknown JVM_PROFILE ${JVM_PROFILE}, using the latency profile"
+        JVM_PROFILE="latency"
+        DEFAULT_GC="G1"
+        DEFAULT_HEAP_PERCENTAGE=75
+        DEFAULT_MAX_GC_PAUSE_MILLIS=50
+        ;;
+esac
+
+JVM_GC="${JVM_GC:-${DEFAULT_GC}}"
+JVM_HEAP_PERCENTAGE="${JVM_HEAP_PERCENTAGE:-${DEFAULT_HEAP_PERCENTAGE}}"
+JVM_MAX_GC_PAUSE_MILLIS="${JVM_MAX_GC_PAUSE_MILLIS:-${DEFAULT_MAX_GC_PAUSE_MILLIS}}"
+
+# the heap is sized relative to the container memory limit, so it follows the task size
+JVM_FLAGS="-XX:InitialRAMPercentage=${JVM_HEAP_PERCENTAGE} -XX:MaxRAMPercentage=${JVM_HEAP_PERCENTAGE} -XX:+ExitOnOutOfMemoryError"
+
+case "${JVM_GC}" in
+    ZGC)
+        # ZGC keeps pauses below a millisecond on its own, it has no pause time goal
+        JVM_FLAGS="${JVM_FLAGS} -XX:+UseZGC -XX:+ZGenerational"
+        ;;
+    Parallel)
+        JVM_FLAGS="${JVM_FLAGS} -XX:+UseParallelGC"
+        ;;
+    *)
+        if [ "${JVM_GC}" != "G1" ]; then
+            echo "Warning: Unknown JVM_GC ${JVM_GC}, using G1"
+            JVM_GC="G1"
+        fi
+        JVM_FLAGS="${JVM_FLAGS} -XX:+UseG1GC"
+        ;;
+esac
+
+if [ -n "${JVM_MAX_GC_PAUSE_MILLIS}" ] && [ "${JVM_GC}" != "ZGC" ]; then
+    JVM_FLAGS="${JVM_FLAGS} -XX:MaxGCPauseMillis=${JVM_MAX_GC_PAUSE_MILLIS}"
+fi
+
+# sizes GC, JIT and event loop threads for the vCPU of the task rather than the processors of the host
+if [ -n "${JVM_ACTIVE_PROCESSOR_COUNT:-}" ]; then
+    JVM_FLAGS="${JVM_FLAGS} -XX:ActiveProcessorCount=${JVM_ACTIVE_PROCESSOR_COUNT}"
+fi
+
+# the AppCDS archive trained during the image build shortens class loading, the JVM ignores it if it does not match
+CDS_ARCHIVE="${CDS_ARCHIVE:-/prebid-server-java/prebid-server.jsa}"
+if [ -f "${CDS_ARCHIVE}" ]; then
+    JVM_FLAGS="${JVM_FLAGS} -XX:SharedArchiveFile=${CDS_ARCHIVE} -Xshare:auto"
+fi
+
+CONTAINER_ID=$(if [ -z "$ECS_CONTAINER_METADATA_URI_V4" ]; then echo "default-container-id"; else curl -s "${ECS_CONTAINER_METADATA_URI_V4}/task" | jq -r '.Containers[0].DockerId' 2>/dev/null | cut -d'-' -f1 || echo "default-container-id"; fi)
+METRICS_BUFFER_DIR="${METRICS_BUFFER_DIR:-/var/tmp/prebid-metrics}"
+METRICS_SHIP_DESTINATION="${METRICS_SHIP_DESTINATION:-/mnt/efs/metrics}"
+export METRICS_BUFFER_DIR
+
+if [ "${METRICS_INGESTION:-Batch}" = "Streaming" ]; then
+    export METRICS_ARCHIVE_SUFFIX=".log"
+    export METRICS_BUFFER_MAX_SIZE="${METRICS_STREAMING_BUFFER_MAX_SIZE:-256MB}"
+fi
+
+echo "Starting Prebid Server with the ${JVM_PROFILE} JVM profile: ${JVM_FLAGS}"
+
 /usr/bin/java \
-    -DcontainerId=$(if [ -z "$ECS_CONTAINER_METADATA_URI_V4" ]; then echo "default-container-id"; else curl -s "${ECS_CONTAINER_METADATA_URI_V4}/task" | jq -r '.Containers[0].DockerId' 2>/dev/null | cut -d'-' -f1 || echo "default-container-id"; fi) \
+    -DcontainerId=${CONTAINER_ID} \
     -Dlogging.config=${PREBID_CONFIGS_DIR}/prebid-logging.xml \
-    -XX:+UseParallelGC \
+    ${JVM_FLAGS} \
     -jar target/prebid-server.jar \
-    --spring.config.additional-location=${PREBID_CONFIGS_DIR}/prebid-config.yaml
+    --spring.config.additional-location=${PREBID_CONFIGS_DIR}/prebid-config.yaml &
+JAVA_PID=$!
+
+# replay representative auctions so the JIT has compiled the auction path before the task reports healthy
+WARMUP_CORPUS_DIR="${WARMUP_CORPUS_DIR:-${PREBID_CONFIGS_DIR}/warmup}"
+WARMUP_PENDING_FILE="${WARMUP_PENDING_FILE:-/tmp/prebid-warming-up}"
+if [ "${WARMUP_ENABLED:-true}" = "true" ] && [ -d "${WARMUP_CORPUS_DIR}" ]; then
+    touch "${WARMUP_PENDING_FILE}"
+    (
+        python3 /warm_up.py \
+            --corpus "${WARMUP_CORPUS_DIR}" \
+            --requests "${WARMUP_REQUESTS:-500}" \
+            --concurrency "${WARMUP_CONCURRENCY:-4}" \
+            --timeout "${WARMUP_TIMEOUT_SECS:-90}"
+        rm -f "${WARMUP_PENDING_FILE}"
+    ) &
+fi
+
+# started once the pending file exists, so the ALB health check never passes before the warm-up
+python3 /health_endpoint.py \
+    --port "${HEALTH_CHECK_PORT:-8081}" \
+    --pending-file "${WARMUP_PENDING_FILE}" &
+
+# the metrics sidecar container ships the archives when it is enabled
+SHIPPER_PID=""
+if [ "${METRICS_SIDECAR_ENABLED:-false}" != "true" ] && [ "${METRICS_INGESTION:-Batch}" != "Streaming" ]; then
+    python3 /ship_metrics.py \
+        --source "${METRICS_BUFFER_DIR}" \
+        --destination "${METRICS_SHIP_DESTINATION}" &
+    SHIPPER_PID=$!
+fi
+
+# forward the stop signal to Prebid Server, the shipper is stopped once no more metrics are written
+trap 'kill -TERM ${JAVA_PID} 2>/dev/null' TERM INT
+wait ${JAVA_PID}
+JAVA_EXIT_CODE=$?
+# a trapped signal interrupts wait before Prebid Server has exited
+if kill -0 ${JAVA_PID} 2>/dev/null; then
+    wait ${JAVA_PID}
+    JAVA_EXIT_CODE=$?
+fi
+
+if [ -n "${SHIPPER_PID}" ]; then
+    kill -TERM ${SHIPPER_PID} 2>/dev/null
+    wait ${SHIPPER_PID}
+fi
+exit ${JAVA_EXIT_CODE}
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# -----------------------------------------------------------------------------------------------------------------------------------------------------------------
+# PURPOSE:
+#  * Fetch Prebid Server configuration files from one or more S3 prefixes into a local directory.
+#  * The object listing of each prefix is the manifest: files of later prefixes override files of earlier prefixes with the same relative path.
+#  * A file is only downloaded when its ETag differs from the MD5 of the local file, e.g. of the default configuration baked into the image.
+#  * Downloads run in parallel with botocore directly, which starts much faster than the AWS CLI.
+# USAGE:
+#  python3 fetch_configs.py --bucket BUCKET --destination DIRECTORY PREFIX [PREFIX ...]
+# -----------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import botocore.session
+from botocore.config import Config
+
+EXCLUDED_FILES = {"README.md"}
+MAX_WORKERS = 8
+
+
+def file_md5(path):
+    # MD5 is only compared with S3 ETags, it is not used for security
+    content_hash = hashlib.md5()  # nosec
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            content_hash.update(block)
+    return content_hash.hexdigest()
+
+
+def list_prefix(s3_client, bucket, prefix):
+    objects = {}
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for s3_object in page.get("Contents", []):
+            relative_path = s3_object["Key"][len(prefix):]
+            if not relative_path or relative_path.endswith("/") or os.path.basename(relative_path) in EXCLUDED_FILES:
+                continue
+            objects[relative_path] = (s3_object["Key"], s3_object["ETag"].strip('"'))
+    return objects
+
+
+def fetch_file(s3_client, bucket, destination, relative_path, key, etag):
+    path = os.path.join(destination, relative_path)
+    if os.path.isfile(path) and file_md5(path) == etag:
+        print(f"Unchanged {relative_path}")
+        return False
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    response = s3_client.get_object(Bucket=bucket, Key=key)
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as f:
+        for chunk in response["Body"].iter_chunks(1024 * 1024):
+            f.write(chunk)
+    os.replace(f.name, path)
+    print(f"Downloaded s3://{bucket}/{key}")
+    return True
+
+
+def fetch_configs(bucket, prefixes, destination):
+    s3_client = botocore.session.get_session().create_client(
+        "s3",
+        config=Config(max_pool_connections=MAX_WORKERS, retries={"mode": "adaptive", "max_attempts": 10}),
+    )
+    prefixes = [prefix.strip("/") + "/" for prefix in prefixes]
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        listings = list(executor.map(lambda prefix: list_prefix(s3_client, bucket, prefix), prefixes))
+
+        manifest = {}
+        for listing in listings:
+            manifest.update(listing)
+
+        downloads = list(executor.map(
+            lambda item: fetch_file(s3_client, bucket, destination, item[0], *item[1]),
+            sorted(manifest.items()),
+        ))
+
+    print(f"Fetched {sum(downloads)} of {len(manifest)} configuration files from s3://{bucket}")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Fetch Prebid Server configuration files from S3")
+    parser.add_argument("--bucket", required=True, help="bucket holding the configuration files")
+    parser.add_argument("--destination", required=True, help="local configuration directory")
+    parser.add_argument("prefixes", nargs="+", help="prefixes to fetch, later prefixes override earlier ones")
+    args = parser.parse_args(argv)
+
+    fetch_configs(args.bucket, args.prefixes, args.destination)
+
+
+if __name__ == "__main__":
+    try:
+        main(sys.argv[1:])
+    except Exception as err:
+        print(f"Error: Failed to fetch configuration files: {err}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# -----------------------------------------------------------------------------------------------------------------------------------------------------------------
+# PURPOSE:
+#  * Serve the health check of the ALB target group, which must not pass before the warm-up of entrypoint.sh has ended.
+#  * GET /status answers 503 while the warm-up pending file exists. Afterwards it answers with the status of the /status endpoint of
+#    Prebid Server, 200 when Prebid Server responds with a 2xx status and 503 otherwise.
+#  * The ALB reaches Prebid Server itself on the container port, only its health checks are sent to this endpoint.
+# USAGE:
+#  python3 health_endpoint.py [--port PORT] [--pending-file PATH] [--status-url URL]
+# -----------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import argparse
+import os
+import sys
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8081
+DEFAULT_PENDING_FILE = "/tmp/prebid-warming-up"
+DEFAULT_STATUS_URL = "http://localhost:8080/status"
+HEALTH_PATH = "/status"
+REQUEST_TIMEOUT_SECONDS = 4
+
+
+def prebid_status(status_url: str) -> int:
+    try:
+        with urllib.request.urlopen(status_url, timeout=REQUEST_TIMEOUT_SECONDS) as response:  # nosec B310
+            return 200 if response.status < 300 else 503
+    except (urllib.error.URLError, OSError):
+        return 503
+
+
+def health_status(pending_file: str, status_url: str) -> int:
+    if os.path.exists(pending_file):
+        return 503
+    return prebid_status(status_url)
+
+
+def create_server(port: int, pending_file: str, status_url: str) -> ThreadingHTTPServer:
+    class HealthHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status = health_status(pending_file, status_url) if self.path == HEALTH_PATH else 404
+            body = b"ok" if status == 200 else b"unavailable"
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # a health check every few seconds would flood the container log
+            pass
+
+    return ThreadingHTTPServer(("", port), HealthHandler)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Serve a health check that fails while Prebid Server warms up")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port of the health check")
+    parser.add_argument("--pending-file", default=DEFAULT_PENDING_FILE, help="file that exists while the warm-up runs")
+    parser.add_argument("--status-url", default=DEFAULT_STATUS_URL, help="status endpoint of Prebid Server")
+    args = parser.parse_args(argv)
+
+    server = create_server(args.port, args.pending_file, args.status_url)
+    print(f"Serving the health check on port {args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# -----------------------------------------------------------------------------------------------------------------------------------------------------------------
+# PURPOSE:
+#  * Ship the metrics log archives that logback rolls on the local ephemeral storage of the task to EFS or to S3.
+#  * Archives keep their path relative to the source directory, CONTAINER_ID/archived/NAME.log.gz, so the EFS path or S3 key of
+#    an archive is deterministic and a retried upload overwrites the same object.
+#  * Closed archives (.log.gz files that have not been written to for a few seconds) are shipped in batches on a fixed interval,
+#    so request threads only ever write to the local disk.
+#  * On SIGTERM the active log file is compressed and shipped together with the remaining archives. The process writing the log
+#    must have stopped by then: entrypoint.sh stops Prebid Server before it stops the shipper, and ECS stops the sidecar container
+#    after the Prebid Server container that depends on it.
+#  * On stop, the remaining logs are named like the logback archives, prebid-metrics.%d{yyyy-MM-dd_HH}.%i.log.gz, numbered after the
+#    archives of the hour already written or shipped, so they never overwrite one.
+#  * Files are written under a temporary name outside the archived folder and renamed, or uploaded to S3, before the local copy is
+#    deleted, so a partial file is never taken for an archive.
+# USAGE:
+#  python3 ship_metrics.py --source METRICS_BUFFER_DIR --destination DIRECTORY|s3://BUCKET/PREFIX [--interval SECONDS]
+# -----------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import argparse
+import gzip
+import re
+import shutil
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+ARCHIVED_FOLDER = "archived"
+ACTIVE_LOG_FILE = "prebid-metrics.log"
+ARCHIVE_SUFFIX = ".log.gz"
+DEFAULT_INTERVAL_SECONDS = 30
+# logback keeps writing an archive while it compresses a rolled file, archives are only shipped once they are settled
+SETTLE_SECONDS = 10
+MAX_WORKERS = 4
+CHUNK_SIZE = 1024 * 1024
+ARCHIVE_NAME_RE = re.compile(r"^(?P<prefix>.+)\.(?P<index>\d+)\.log(\.gz)?$")
+
+
+class EfsDestination:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def ship(self, archive: Path, relative_path: str):
+        target = self.directory / relative_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # the partial file is written next to the archived folder, DataSync also skips *.partial files
+        partial_target = target.parent.parent / f".{target.name}.partial"
+        shutil.copyfile(archive, partial_target)
+        partial_target.replace(target)
+        return str(target)
+
+
+class S3Destination:
+    def __init__(self, uri):
+        # imported here so shipping to EFS does not pay for loading botocore
+        import botocore.session
+        from botocore.config import Config
+        from s3transfer.manager import TransferConfig, TransferManager
+
+        self.bucket, _, self.prefix = uri[len("s3://"):].partition("/")
+        self.prefix = self.prefix.strip("/")
+        client = botocore.session.get_session().create_client(
+            "s3",
+            config=Config(max_pool_connections=MAX_WORKERS * 2, retries={"mode": "adaptive", "max_attempts": 10}),
+        )
+        self.transfer_manager = TransferManager(client, TransferConfig(multipart_threshold=8 * CHUNK_SIZE))
+
+    def ship(self, archive: Path, relative_path: str):
+        key = f"{self.prefix}/{relative_path}" if self.prefix else relative_path
+        # archives above the multipart threshold are uploaded in parts
+        self.transfer_manager.upload(str(archive), self.bucket, key).result()
+        return f"s3://{self.bucket}/{key}"
+
+
+def closed_archives(source: Path, settle_seconds: int) -> list:
+    now = time.time()
+    return sorted(
+        archive for archive in source.glob(f"*/{ARCHIVED_FOLDER}/*{ARCHIVE_SUFFIX}")
+        if now - archive.stat().st_mtime >= settle_seconds
+    )
+
+
+def ship_archives(source: Path, destination, archives: list, shipped_indexes: dict = None) -> int:
+    """
+    Ship archives concurrently and delete the local copies. The highest shipped .%i index of each container folder
+    and hour is recorded in shipped_indexes.
+    """
+    def ship(archive):
+        try:
+            target = destination.ship(archive, archive.relative_to(source).as_posix())
+        except Exception as err:
+            # the archive stays in place and is retried on the next pass
+            print(f"Warning: Failed to ship {archive}: {err}", file=sys.stderr)
+            return False
+        archive.unlink()
+        print(f"Shipped {archive.name} to {target}")
+        return True
+
+    if not archives:
+        return 0
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        shipped = [archive for archive, result in zip(archives, executor.map(ship, archives)) if result]
+
+    if shipped_indexes is not None:
+        for archive in shipped:
+            match = ARCHIVE_NAME_RE.match(archive.name)
+            if match:
+                key = (archive.parent.parent.name, match["prefix"])
+                shipped_indexes[key] = max(shipped_indexes.get(key, -1), int(match["index"]))
+    return len(shipped)
+
+
+def get_next_archive_index(archived_folder: Path, archive_prefix: str, shipped_index: int = -1) -> int:
+    """
+    Return the .%i index following the archives of the hour, those still in the archived folder and those shipped
+    """
+    indexes = [
+        int(match["index"])
+        for match in map(ARCHIVE_NAME_RE.match, (archive.name for archive in archived_folder.glob(f"{archive_prefix}.*")))
+        if match and match["prefix"] == archive_prefix
+    ]
+    return max(indexes + [shipped_index], default=-1) + 1
+
+
+def compress_remaining_logs(log_folder: Path, shipped_indexes: dict = None) -> None:
+    """
+    Compress the active log file and rolled files logback had not compressed yet. The archives follow the logback
+    .%d{yyyy-MM-dd_HH}.%i.log.gz pattern, numbered after the archives already written or shipped for the hour.
+    """
+    utc_time = datetime.now(timezone.utc)
+    archive_prefix = f"{ACTIVE_LOG_FILE.split('.')[0]}.{utc_time:%Y-%m-%d_%H}"
+    remaining = [log_folder / ACTIVE_LOG_FILE] + sorted(log_folder.glob(f"{ACTIVE_LOG_FILE}*.tmp"))
+    remaining = [log_file for log_file in remaining if log_file.exists() and log_file.stat().st_size > 0]
+
+    archived_folder = log_folder / ARCHIVED_FOLDER
+    archived_folder.mkdir(parents=True, exist_ok=True)
+    shipped_index = (shipped_indexes or {}).get((log_folder.name, archive_prefix), -1)
+    first_index = get_next_archive_index(archived_folder, archive_prefix, shipped_index)
+    for index, log_file in enumerate(remaining):
+        target = archived_folder / f"{archive_prefix}.{first_index + index}{ARCHIVE_SUFFIX}"
+        partial_target = log_folder / f".{target.name}.partial"
+        with open(log_file, "rb") as source_file, gzip.open(partial_target, "wb") as gzip_output:
+            shutil.copyfileobj(source_file, gzip_output, CHUNK_SIZE)
+        partial_target.replace(target)
+        log_file.unlink()
+
+
+def run(source: Path, destination, interval: int) -> None:
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+
+    shipped_indexes = {}
+    while not stopping.wait(interval):
+        ship_archives(source, destination, closed_archives(source, SETTLE_SECONDS), shipped_indexes)
+
+    # one folder per container id
+    for log_folder in source.glob("*/"):
+        compress_remaining_logs(log_folder, shipped_indexes)
+    shipped = ship_archives(source, destination, closed_archives(source, 0), shipped_indexes)
+    print(f"Shipped {shipped} remaining metrics archive(s) on stop")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Ship rolled Prebid Server metrics logs to EFS or S3")
+    parser.add_argument("--source", required=True, help="local metrics buffer directory, with one folder per container id")
+    parser.add_argument("--destination", required=True, help="EFS directory or s3://bucket/prefix")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL_SECONDS, help="seconds between batches")
+    args = parser.parse_args(argv)
+
+    if args.destination.startswith("s3://"):
+        destination = S3Destination(args.destination)
+    else:
+        destination = EfsDestination(args.destination)
+    run(Path(args.source), destination, args.interval)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,124 @@
+#!/bin/sh
+
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# -----------------------------------------------------------------------------------------------------------------------------------------------------------------
+# PURPOSE:
+#  * Train the Application Class Data Sharing (AppCDS) archive of Prebid Server during the image build.
+#  * Prebid Server is started once from the extracted jar with the sample configuration and stopped as soon as /status responds,
+#    the JVM writes the classes it loaded to the archive on exit. The JVM cannot archive classes of the nested jars of a fat jar,
+#    so the jar is extracted by the Dockerfile beforehand.
+#  * The build fails when no archive is written.
+#  * The time to the first /status response is then measured with and without the archive and written to STARTUP_REPORT,
+#    the JVM is started with -Xshare:on for the measurement so an archive it cannot map also fails the build.
+#  * The build also fails when the training run does not answer a request with Accept-Encoding: gzip with a gzip response.
+#    Prebid Server Java enables compression on its Vert.x HTTP server in code, it is not a key of prebid-config.yaml, and the
+#    ALB deployment mode relies on it since the ALB does not compress responses.
+#  * Prebid Server is started once more with the logback configuration of the image and metrics reported every second. The build
+#    fails unless the metrics log holds reporter lines and every line of it is a JSON object, so the replacements of the METRICS
+#    pattern of prebid-logging.xml are checked with the Logback and Java regex versions of the image.
+# -----------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+set -eu
+
+CDS_ARCHIVE="${CDS_ARCHIVE:-prebid-server.jsa}"
+CDS_TRAINING_TIMEOUT_SECS="${CDS_TRAINING_TIMEOUT_SECS:-180}"
+STARTUP_REPORT="${STARTUP_REPORT:-cds-startup.txt}"
+PREBID_LOG="/tmp/prebid-server.log"
+COMPRESSION_CHECK_URL="http://localhost:8080/info/bidders"
+CONTENT_ENCODING=""
+METRICS_LOGGING_CONFIG="${METRICS_LOGGING_CONFIG:-../prebid-configs-default/prebid-logging.xml}"
+METRICS_CHECK_DIR="/tmp/prebid-metrics-check"
+METRICS_CHECK_CONTAINER_ID="build-check"
+METRICS_CHECK_SECS=5
+
+uptime_millis() {
+    awk '{ printf "%d", $1 * 1000 }' /proc/uptime
+}
+
+# print the Content-Encoding of the response to a request that accepts gzip
+response_encoding() {
+    curl -s -o /dev/null -D - -H "Accept-Encoding: gzip" "${COMPRESSION_CHECK_URL}" |
+        tr -d '\r' | awk -F': ' 'tolower($1) == "content-encoding" { print $2 }'
+}
+
+# start Prebid Server with the given JVM flags, wait for /status, stop it and print the milliseconds until /status responded.
+# With check_encoding as second argument, the Content-Encoding of a response is kept in CONTENT_ENCODING before the stop.
+# With check_metrics as second argument, Prebid Server runs for METRICS_CHECK_SECS more seconds so the metrics are reported.
+start_and_stop() {
+    started_at=$(uptime_millis)
+    # shellcheck disable=SC2086
+    java $1 -jar target/prebid-server.jar \
+        --spring.config.additional-location=sample/configs/prebid-config.yaml > "${PREBID_LOG}" 2>&1 &
+    pid=$!
+    ready=""
+    for _ in $(seq 1 $((CDS_TRAINING_TIMEOUT_SECS * 10))); do
+        if curl -sf http://localhost:8080/status > /dev/null; then
+            ready=$(uptime_millis)
+            break
+        fi
+        kill -0 ${pid} 2>/dev/null || break
+        sleep 0.1
+    done
+    if [ -n "${ready}" ] && [ "${2:-}" = "check_encoding" ]; then
+        CONTENT_ENCODING=$(response_encoding)
+    fi
+    if [ -n "${ready}" ] && [ "${2:-}" = "check_metrics" ]; then
+        sleep ${METRICS_CHECK_SECS}
+    fi
+    kill -TERM ${pid} 2>/dev/null || true
+    wait ${pid} || true
+    if [ -z "${ready}" ]; then
+        tail -50 "${PREBID_LOG}" >&2
+        echo "Error: Prebid Server did not respond on /status with the JVM flags: $1" >&2
+        return 1
+    fi
+    echo $((ready - started_at))
+}
+
+echo "Training the AppCDS archive ${CDS_ARCHIVE}"
+start_and_stop "-XX:ArchiveClassesAtExit=${CDS_ARCHIVE}" check_encoding > /dev/null
+if [ ! -f "${CDS_ARCHIVE}" ]; then
+    tail -50 "${PREBID_LOG}" >&2
+    echo "Error: AppCDS training did not create ${CDS_ARCHIVE}" >&2
+    exit 1
+fi
+if [ "${CONTENT_ENCODING}" != "gzip" ]; then
+    echo "Error: ${COMPRESSION_CHECK_URL} did not answer Accept-Encoding: gzip with a gzip response" >&2
+    exit 1
+fi
+
+without_archive=$(start_and_stop "-Xshare:auto")
+with_archive=$(start_and_stop "-XX:SharedArchiveFile=${CDS_ARCHIVE} -Xshare:on")
+{
+    echo "archive=${CDS_ARCHIVE} size_bytes=$(wc -c < "${CDS_ARCHIVE}")"
+    echo "startup_to_status_ms_without_archive=${without_archive}"
+    echo "startup_to_status_ms_with_archive=${with_archive}"
+    echo "response_content_encoding=${CONTENT_ENCODING}"
+} | tee "${STARTUP_REPORT}"
+
+echo "Checking the metrics log written with ${METRICS_LOGGING_CONFIG}"
+start_and_stop "-Dlogging.config=${METRICS_LOGGING_CONFIG} -DcontainerId=${METRICS_CHECK_CONTAINER_ID} \
+    -DMETRICS_BUFFER_DIR=${METRICS_CHECK_DIR} -Dmetrics.logback.enabled=true -Dmetrics.logback.name=METRICS \
+    -Dmetrics.logback.interval=1" check_metrics > /dev/null
+python3 - "${METRICS_CHECK_DIR}/${METRICS_CHECK_CONTAINER_ID}/prebid-metrics.log" <<'EOF'
+import json
+import sys
+
+reporter_lines = 0
+with open(sys.argv[1], encoding="utf-8") as metrics_log:
+    for number, line in enumerate(metrics_log, start=1):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as error:
+            sys.exit(f"Error: line {number} of the metrics log is not valid JSON ({error}): {line.rstrip()}")
+        if not isinstance(record, dict) or not {"timestamp", "containerId", "type"} <= record.keys():
+            sys.exit(f"Error: line {number} of the metrics log misses the timestamp, containerId or type: {line.rstrip()}")
+        if record["type"] != "LOG":
+            reporter_lines += 1
+if reporter_lines == 0:
+    sys.exit("Error: the metrics log holds no metric reporter lines")
+print(f"metrics_log_reporter_lines={reporter_lines}")
+EOF
+rm -rf "${PREBID_LOG}" "${METRICS_CHECK_DIR}"
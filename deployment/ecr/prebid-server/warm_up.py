@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# -----------------------------------------------------------------------------------------------------------------------------------------------------------------
+# PURPOSE:
+#  * Warm up the JIT compiler, the thread pools and the HTTP client connections of a freshly started Prebid Server before the task
+#    reports healthy, so new tasks do not serve their first auctions with interpreted code.
+#  * Waits for /status to respond, then replays the OpenRTB requests of the corpus directory (*.json files, one request per file)
+#    against the auction endpoint on localhost, round robin, until the request count or the time limit is reached.
+#  * Failed or rejected requests are counted and reported, they never fail the warm-up: the script always exits 0 so a broken corpus
+#    only costs the warm-up and never keeps the task unhealthy.
+# USAGE:
+#  python3 warm_up.py --corpus DIRECTORY [--url URL] [--status-url URL] [--requests N] [--concurrency N] [--timeout SECONDS]
+# -----------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import argparse
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+from pathlib import Path
+
+DEFAULT_URL = "http://localhost:8080/openrtb2/auction"
+DEFAULT_STATUS_URL = "http://localhost:8080/status"
+DEFAULT_REQUESTS = 500
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT_SECONDS = 90
+REQUEST_TIMEOUT_SECONDS = 5
+
+
+def load_corpus(corpus: Path) -> list:
+    return [request_file.read_bytes() for request_file in sorted(corpus.glob("*.json"))]
+
+
+def wait_for_status(status_url: str, deadline: float) -> bool:
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(status_url, timeout=REQUEST_TIMEOUT_SECONDS) as response:  # nosec B310
+                if response.status < 300:
+                    return True
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(1)
+    return False
+
+
+def send(url: str, body: bytes) -> bool:
+    request = urllib.request.Request(url, data=body, method="POST", headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT_SECONDS) as response:  # nosec B310
+            response.read()
+            return response.status < 300
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+def replay(url: str, corpus: list, requests: int, concurrency: int, deadline: float) -> tuple:
+    bodies = cycle(corpus)
+    succeeded = failed = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # one batch per worker at a time, so the time limit is checked between batches
+        while succeeded + failed < requests and time.monotonic() < deadline:
+            batch = [next(bodies) for _ in range(min(concurrency, requests - succeeded - failed))]
+            results = list(executor.map(lambda body: send(url, body), batch))
+            succeeded += sum(results)
+            failed += len(results) - sum(results)
+    return succeeded, failed
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Warm up Prebid Server by replaying a corpus of auction requests")
+    parser.add_argument("--corpus", required=True, help="directory of OpenRTB request files")
+    parser.add_argument("--url", default=DEFAULT_URL, help="auction endpoint")
+    parser.add_argument("--status-url", default=DEFAULT_STATUS_URL, help="endpoint polled until Prebid Server is up")
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="number of requests to replay")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="requests in flight")
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT_SECONDS, help="seconds before the warm-up gives up")
+    args = parser.parse_args(argv)
+
+    deadline = time.monotonic() + args.timeout
+    corpus = load_corpus(Path(args.corpus))
+    if not corpus:
+        print(f"Warning: No warm-up requests in {args.corpus}, skipping the warm-up")
+        return
+    if not wait_for_status(args.status_url, deadline):
+        print(f"Warning: {args.status_url} did not respond within {args.timeout} seconds, skipping the warm-up")
+        return
+
+    started = time.monotonic()
+    succeeded, failed = replay(args.url, corpus, args.requests, args.concurrency, deadline)
+    print(
+        f"Warmed up with {succeeded + failed} requests from {len(corpus)} corpus file(s) in "
+        f"{time.monotonic() - started:.1f} seconds, {failed} failed"
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main(sys.argv[1:])
+    except Exception as err:
+        print(f"Warning: Warm-up failed: {err}", file=sys.stderr)
@@ -1,13 +1,22 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
+import compileall
+import hashlib
 import importlib.util
 import logging
 import os
 import platform
+import py_compile
+import shutil
 import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Union
+from typing import Dict, List, Union
+from uuid import uuid4
 
 import jsii
 from aws_cdk import ILocalBundling, BundlingOptions
@@ -16,11 +25,29 @@ from aws_cdk.aws_lambda import Runtime
 from aws_solutions.cdk.helpers import copytree
 
 DEFAULT_RUNTIME = Runtime.PYTHON_3_11
-BUNDLER_DEPENDENCIES_CACHE = "/var/dependencies"
+# completed bundles are cached here by content hash - set BUNDLER_DEPENDENCIES_CACHE to an empty value to disable
+BUNDLER_DEPENDENCIES_CACHE = os.environ.get(
+    "BUNDLER_DEPENDENCIES_CACHE", str(Path.home() / ".cache" / "solutions-python-bundles")
+)
+# cached bundles are rebuilt after this many seconds so loosely pinned requirements pick up new releases
+BUNDLER_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+# increment when the bundle layout changes to invalidate existing cache entries
+BUNDLE_FORMAT_VERSION = "1"
 REQUIREMENTS_TXT_FILE = "requirements.txt"
 REQUIREMENTS_PIPENV_FILE = "Pipfile"
 REQUIREMENTS_POETRY_FILE = "pyproject.toml"
 
+# files and directories that are not needed at runtime and are removed from the bundle
+PRUNED_CACHE_DIRECTORIES = ["__pycache__"]
+PRUNED_TEST_DIRECTORIES = ["tests", "test"]
+PRUNED_DIST_INFO_FILES = ["RECORD", "INSTALLER", "REQUESTED", "direct_url.json"]
+PRUNED_FILE_SUFFIXES = [".pyc", ".pyo", ".pyi"]
+
+# build artifacts that do not change the bundle, so they are left out of the content hash
+HASH_IGNORED_DIRECTORIES = ["__pycache__", "build"]
+HASH_IGNORED_SUFFIXES = [".pyc", ".egg-info"]
+LOCAL_REQUIREMENT_PREFIXES = (".", "/")
+
 
 logger = logging.getLogger("cdk-helper")
 
@@ -29,14 +56,170 @@ class SolutionsPythonBundlingException(Exception):
     pass
 
 
+class DirectoryHash:
+    # fmt: off
+    # NOSONAR - safe to hash; side-effect of collision is to create new bundle
+    _hash = hashlib.sha1()  # nosec
+    # fmt: on
+
+    @classmethod
+    def hash(cls, *directories: Path):
+        # NOSONAR - safe to hash; see above
+        DirectoryHash._hash = hashlib.sha1()  # nosec
+        if isinstance(directories, Path):
+            directories = [directories]
+        for directory in sorted(directories):
+            DirectoryHash._hash_dir(str(directory.absolute()))
+        return DirectoryHash._hash.hexdigest()
+
+    @classmethod
+    def _hash_dir(cls, directory: Path):
+        for path, dirs, files in os.walk(directory):
+            for file in sorted(files):
+                if Path(file).suffix not in HASH_IGNORED_SUFFIXES:
+                    DirectoryHash._hash_file(Path(path) / file)
+            for directory in sorted(dirs):
+                if directory in HASH_IGNORED_DIRECTORIES or Path(directory).suffix in HASH_IGNORED_SUFFIXES:
+                    continue
+                DirectoryHash._hash_dir(str((Path(path) / directory).absolute()))
+            break
+
+    @classmethod
+    def _hash_file(cls, file: Path):
+        with file.open("rb") as f:
+            while True:
+                block = f.read(2 ** 10)
+                if not block:
+                    break
+                DirectoryHash._hash.update(block)
+
+
 @jsii.implements(ILocalBundling)
 class SolutionsPythonBundling:
     """This interface allows AWS Solutions to package lambda functions without the use of Docker"""
 
-    def __init__(self, to_bundle, libraries, install_path=""):
+    # every bundling created in this process, so they can be built ahead of synthesis with prebundle()
+    _bundlings: List["SolutionsPythonBundling"] = []
+    # bundle name -> (seconds, "prebundled", "cached" or "bundled")
+    _timings: Dict[str, tuple] = {}
+    _timings_lock = threading.Lock()
+
+    def __init__(self, to_bundle, libraries, install_path="", runtime: Runtime = DEFAULT_RUNTIME):
         self.to_bundle = to_bundle
         self.libraries = libraries
         self.install_path = install_path
+        self.runtime = runtime
+        # resolved once, jsii objects must not be used from the prebundle worker threads
+        self.runtime_name = runtime.name
+        self._cache_key = None
+        self._compile_workers = 0
+        SolutionsPythonBundling._bundlings.append(self)
+
+    @property
+    def name(self) -> str:
+        to_bundle = Path(self.to_bundle)
+        return f"{to_bundle.parent.name}/{to_bundle.name}"
+
+    @property
+    def cache_key(self) -> str:
+        """Hash of everything that goes into the bundle: sources, libraries, local requirements and settings"""
+        if not self._cache_key:
+            # NOSONAR - safe to hash; side-effect of collision is to reuse a bundle
+            key = hashlib.sha256()  # nosec
+            key.update(DirectoryHash.hash(Path(self.to_bundle), *self.libraries, *self.local_requirements()).encode())
+            key.update(f"{self.install_path}|{self.runtime_name}|{BUNDLE_FORMAT_VERSION}".encode())
+            self._cache_key = key.hexdigest()
+        return self._cache_key
+
+    def local_requirements(self) -> List[Path]:
+        """Local directories installed from requirements.txt, their content is part of the bundle"""
+        requirements_file = Path(self.to_bundle) / REQUIREMENTS_TXT_FILE
+        if not requirements_file.is_file():
+            return []
+
+        local_requirements = []
+        for requirement in requirements_file.read_text().splitlines():
+            requirement = requirement.strip()
+            if requirement.startswith(LOCAL_REQUIREMENT_PREFIXES):
+                local_requirements.append((Path(self.to_bundle) / requirement).resolve())
+        return local_requirements
+
+    def _cached_bundle(self) -> Union[Path, None]:
+        if not BUNDLER_DEPENDENCIES_CACHE:
+            return None
+        cached = Path(BUNDLER_DEPENDENCIES_CACHE) / self.cache_key
+        if not cached.is_dir() or time.time() - cached.stat().st_mtime > BUNDLER_CACHE_MAX_AGE:
+            return None
+        return cached
+
+    def _store_in_cache(self, bundle_dir, move=False):
+        if not BUNDLER_DEPENDENCIES_CACHE:
+            return
+        cached = Path(BUNDLER_DEPENDENCIES_CACHE) / self.cache_key
+        partial = cached.with_name(f"{cached.name}.{uuid4().hex}.partial")
+        try:
+            if move:
+                os.rename(bundle_dir, partial)
+            else:
+                copytree(Path(bundle_dir), partial)
+            if cached.exists():
+                shutil.rmtree(cached)  # expired entry
+            os.rename(partial, cached)
+        except OSError as exc:
+            # another synth stored the same bundle first, or the cache is not writable - the bundle is still valid
+            logger.info("%s bundle was not cached: %s" % (self.name, exc))
+            shutil.rmtree(partial, ignore_errors=True)
+
+    def _record_timing(self, started: float, outcome: str):
+        seconds = time.perf_counter() - started
+        with SolutionsPythonBundling._timings_lock:
+            previous_seconds, previous_outcome = SolutionsPythonBundling._timings.get(self.name, (0.0, None))
+            if previous_outcome == "prebundled":
+                # copying a bundle built by prebundle() from the cache adds to the prebundle time
+                seconds, outcome = seconds + previous_seconds, previous_outcome
+            SolutionsPythonBundling._timings[self.name] = (seconds, outcome)
+
+    @classmethod
+    def prebundle(cls, max_workers: Union[int, None] = None):
+        """
+        Build every bundle created so far that is not cached yet, in parallel, so the following synthesis
+        only copies them from the cache. Bundles with the same cache key are built once.
+        """
+        if not BUNDLER_DEPENDENCIES_CACHE:
+            logger.info("the bundle cache is disabled - nothing to prebundle")
+            return
+
+        pending = {}
+        for bundling in cls._bundlings:
+            if bundling.cache_key not in pending and not bundling._cached_bundle():
+                pending[bundling.cache_key] = bundling
+        if not pending:
+            return
+
+        logger.info("prebundling %d Python bundle(s)" % len(pending))
+        Path(BUNDLER_DEPENDENCIES_CACHE).mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            for future in [executor.submit(bundling._prebundle) for bundling in pending.values()]:
+                future.result()
+
+    def _prebundle(self):
+        started = time.perf_counter()
+        bundle_dir = Path(BUNDLER_DEPENDENCIES_CACHE) / f"{self.cache_key}.{uuid4().hex}.build"
+        try:
+            # bundles already build in parallel, compiling with extra worker processes would oversubscribe the CPUs
+            self._compile_workers = 1
+            self._bundle(bundle_dir)
+            self._store_in_cache(bundle_dir, move=True)
+        finally:
+            self._compile_workers = 0
+            shutil.rmtree(bundle_dir, ignore_errors=True)
+        self._record_timing(started, "prebundled")
+
+    @classmethod
+    def report(cls):
+        """Log how long each bundle took during this synthesis"""
+        for name, (seconds, outcome) in sorted(cls._timings.items(), key=lambda item: item[1][0], reverse=True):
+            logger.info("bundle %-48s %8.2fs (%s)" % (name, seconds, outcome))
 
     @property
     def platform_supports_bundling(self):
@@ -54,15 +237,29 @@ class SolutionsPythonBundling:
                 "this platform does not support bundling"
             )
 
+        started = time.perf_counter()
+        cached = self._cached_bundle()
+        if cached:
+            logger.info("%s bundle found in cache %s" % (self.name, cached))
+            copytree(cached, output_dir)
+            self._record_timing(started, "cached")
+            return True
+
+        self._bundle(output_dir)
+        self._store_in_cache(output_dir)
+        self._record_timing(started, "bundled")
+        return True
+
+    def _bundle(self, output_dir):
         source = Path(self.to_bundle).absolute()
 
         # copy source
         copytree(source, output_dir)
 
-        # copy libraries
+        # copy libraries (for layers, next to the installed requirements so they can be imported)
         for lib in self.libraries:
             lib_source = Path(lib).absolute()
-            lib_dest = Path(output_dir).joinpath(lib.name)
+            lib_dest = Path(output_dir).joinpath(self.install_path, lib.name)
             copytree(lib_source, lib_dest)
 
         try:
@@ -74,7 +271,59 @@ class SolutionsPythonBundling:
                 f"local bundling was tried but failed: {cpe}"
             )
 
-        return True
+        self._prune(output_dir)
+        self._precompile(output_dir)
+
+    @property
+    def platform_supports_precompile(self) -> bool:
+        # bytecode is specific to the Python minor version, it can only be compiled by a matching interpreter
+        local_runtime = f"python{sys.version_info.major}.{sys.version_info.minor}"
+        supported = local_runtime == self.runtime_name
+        if not supported:
+            logger.warning(
+                "bytecode for %s cannot be compiled with %s - bundling sources only"
+                % (self.runtime_name, local_runtime)
+            )
+        return supported
+
+    def _prune(self, output_dir):
+        """Remove caches, tests, type stubs and installer metadata that are never used at runtime"""
+        install_dir = Path(output_dir).joinpath(self.install_path)
+        for path in sorted(Path(output_dir).rglob("*"), reverse=True):
+            if not path.exists():
+                continue
+            if path.is_dir():
+                # tests are only pruned from installed packages, never from top level modules
+                is_package_tests = path.name in PRUNED_TEST_DIRECTORIES and (path.parent / "__init__.py").exists()
+                if path.name in PRUNED_CACHE_DIRECTORIES or is_package_tests:
+                    shutil.rmtree(path)
+            elif path.suffix in PRUNED_FILE_SUFFIXES or (
+                path.parent.name.endswith(".dist-info") and path.name in PRUNED_DIST_INFO_FILES
+            ):
+                path.unlink()
+
+        # console scripts installed by pip
+        scripts_dir = install_dir / "bin"
+        if scripts_dir.is_dir():
+            shutil.rmtree(scripts_dir)
+
+    def _precompile(self, output_dir):
+        """
+        Compile the bundle to bytecode so AWS Lambda does not compile every imported module during a cold start.
+        Unchecked hash based .pyc files are used because the deployment package is read only and asset
+        packaging does not preserve the source timestamps that the default .pyc validation relies on.
+        """
+        if not self.platform_supports_precompile:
+            return
+
+        compiled = compileall.compile_dir(
+            str(output_dir),
+            quiet=1,
+            workers=self._compile_workers,
+            invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+        )
+        if not compiled:
+            raise SolutionsPythonBundlingException(f"bytecode compilation of {self.to_bundle} failed")
 
     def _invoke_local_command(
         self,
@@ -115,14 +364,19 @@ class SolutionsPythonBundling:
         if p.returncode != 0:
             raise subprocess.CalledProcessError(p.returncode, p.args)
 
-    def validate_requirements_file(self, output_dir):
+    def validate_requirements_file(self, output_dir) -> bool:
+        """Validate the requirements file and return whether it lists any requirement to install"""
         requirements_file = Path(output_dir) / REQUIREMENTS_TXT_FILE
+        has_requirements = False
         with open(requirements_file, "r") as requirements:
             for requirement in requirements:
                 if requirement.lstrip().startswith("-e"):
                     raise SolutionsPythonBundlingException(
                         "ensure no requirements are flagged as editable. if editable requirements are required, break down your requirements into requirements.txt and requirements-dev.txt"
                     )
+                if requirement.strip() and not requirement.lstrip().startswith("#"):
+                    has_requirements = True
+        return has_requirements
 
     def _source_file_exists(self, name, output_dir):
         source_file = Path(output_dir) / name
@@ -145,7 +399,9 @@ class SolutionsPythonBundling:
             return
 
         self._required_package_exists("pip")
-        self.validate_requirements_file(output_dir)
+        if not self.validate_requirements_file(output_dir):
+            logger.info("no requirements to install")
+            return
 
         requirements_build_path = Path(output_dir).joinpath(self.install_path)
         command = [
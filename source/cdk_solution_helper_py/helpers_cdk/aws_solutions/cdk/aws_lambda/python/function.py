@@ -1,8 +1,6 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-import hashlib
-import os
 from pathlib import Path
 from typing import List, Union
 
@@ -16,47 +14,15 @@ from aws_cdk import (
 from aws_cdk.aws_lambda import Function, Runtime, RuntimeFamily, Code
 from constructs import Construct
 
-from aws_solutions.cdk.aws_lambda.python.bundling import SolutionsPythonBundling
+from aws_solutions.cdk.aws_lambda.python.bundling import (
+    SolutionsPythonBundling,
+    DirectoryHash,
+)
 
 DEFAULT_RUNTIME = Runtime.PYTHON_3_11
 DEPENDENCY_EXCLUDES = ["*.pyc"]
 
 
-class DirectoryHash:
-    # fmt: off
-    # NOSONAR - safe to hash; side-effect of collision is to create new bundle
-    _hash = hashlib.sha1()  # nosec
-    # fmt: on
-
-    @classmethod
-    def hash(cls, *directories: Path):
-        # NOSONAR - safe to hash; see above
-        DirectoryHash._hash = hashlib.sha1()  # nosec
-        if isinstance(directories, Path):
-            directories = [directories]
-        for directory in sorted(directories):
-            DirectoryHash._hash_dir(str(directory.absolute()))
-        return DirectoryHash._hash.hexdigest()
-
-    @classmethod
-    def _hash_dir(cls, directory: Path):
-        for path, dirs, files in os.walk(directory):
-            for file in sorted(files):
-                DirectoryHash._hash_file(Path(path) / file)
-            for directory in sorted(dirs):
-                DirectoryHash._hash_dir(str((Path(path) / directory).absolute()))
-            break
-
-    @classmethod
-    def _hash_file(cls, file: Path):
-        with file.open("rb") as f:
-            while True:
-                block = f.read(2 ** 10)
-                if not block:
-                    break
-                DirectoryHash._hash.update(block)
-
-
 class SolutionsPythonFunction(Function):
     """This is similar to aws-cdk/aws-lambda-python, however it handles local bundling"""
 
@@ -121,6 +87,7 @@ class SolutionsPythonFunction(Function):
         bundling = SolutionsPythonBundling(
             self.source_path,
             self.libraries,
+            runtime=kwargs["runtime"],
         )
 
         kwargs["code"] = self._get_code(bundling, runtime=kwargs["runtime"])
@@ -133,7 +100,7 @@ class SolutionsPythonFunction(Function):
         code_parameters = {
             "path": str(self.source_path),
             "asset_hash_type": AssetHashType.CUSTOM,
-            "asset_hash": DirectoryHash.hash(self.source_path, *self.libraries),
+            "asset_hash": bundling.cache_key,
             "exclude": DEPENDENCY_EXCLUDES,
         }
 
@@ -3,13 +3,15 @@
 
 from pathlib import Path
 from typing import Union, List
-from uuid import uuid4
 
 from aws_cdk import BundlingOptions, DockerImage, AssetHashType
 from aws_cdk.aws_lambda import LayerVersion, Code
 from constructs import Construct
 
-from aws_solutions.cdk.aws_lambda.python.function import SolutionsPythonBundling
+from aws_solutions.cdk.aws_lambda.python.bundling import (
+    DEFAULT_RUNTIME,
+    SolutionsPythonBundling,
+)
 
 DEPENDENCY_EXCLUDES = ["*.pyc"]
 
@@ -42,8 +44,13 @@ class SolutionsPythonLayerVersion(LayerVersion):
                     f"library {lib} must not be a file, but rather a directory"
                 )
 
+        # bytecode is compiled for the first compatible runtime
+        runtime = (kwargs.get("compatible_runtimes") or [DEFAULT_RUNTIME])[0]
         bundling = SolutionsPythonBundling(
-            self.requirements_path, libraries=libraries, install_path="python"
+            self.requirements_path,
+            libraries=libraries,
+            install_path="python",
+            runtime=runtime,
         )
 
         kwargs["code"] = self._get_code(bundling)
@@ -52,11 +59,11 @@ class SolutionsPythonLayerVersion(LayerVersion):
         super().__init__(scope, construct_id, **kwargs)
 
     def _get_code(self, bundling: SolutionsPythonBundling) -> Code:
-        # create the layer version locally
+        # create the layer version locally - layers with identical content share the same asset
         code_parameters = {
             "path": str(self.requirements_path),
             "asset_hash_type": AssetHashType.CUSTOM,
-            "asset_hash": uuid4().hex,
+            "asset_hash": bundling.cache_key,
             "exclude": DEPENDENCY_EXCLUDES,
         }
 
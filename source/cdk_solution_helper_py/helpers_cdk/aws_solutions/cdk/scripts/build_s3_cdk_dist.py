@@ -6,7 +6,6 @@
 import os
 import re
 import shutil
-import subprocess
 from dataclasses import dataclass, field
 from pathlib import Path
 
@@ -17,7 +16,7 @@ import click
 from aws_solutions.cdk.helpers import copytree
 from aws_solutions.cdk.helpers.loader import load_cdk_app
 from aws_solutions.cdk.helpers.logger import Logger
-from aws_solutions.cdk.tools import Cleaner
+from aws_solutions.cdk.tools import Cleaner, S3Sync, sync_all
 
 logger = Logger.get_logger("cdk-helper")
 
@@ -91,41 +90,27 @@ class BaseAssetPackager:
 
     local_asset_path = None
     s3_asset_path = None
+    region = None
 
     def sync(self):
         """Sync the assets packaged"""
+        sync_all([self.s3_sync()])
+
+    def s3_sync(self) -> S3Sync:
+        """Check the destination bucket and prepare the sync of the assets packaged"""
         if not self.local_asset_path:
             raise ValueError("missing local asset path for sync")
         if not self.s3_asset_path:
             raise ValueError("missing s3 asset path for sync")
 
         self.check_bucket()
-        try:
-            with subprocess.Popen(
-                [
-                    "aws",
-                    "s3",
-                    "sync",
-                    self.local_asset_path,
-                    self.s3_asset_path,
-                    "--no-progress",
-                    "--acl",
-                    "bucket-owner-full-control",
-                ],
-                shell=False,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-            ) as p:
-                for line in p.stdout:
-                    logger.info("s3 sync: %s" % line.strip())
-                for line in p.stderr:
-                    logger.error("s3 sync: %s" % line.strip())
-        except FileNotFoundError:
-            logger.error("awscli is missing")
-            raise click.ClickException("--sync requires awscli to be installed")
-        if p.returncode != 0:
-            raise click.ClickException("--sync failed")
+        bucket, _, prefix = self.s3_asset_path[len("s3://"):].partition("/")
+        return S3Sync(
+            local_path=Path(self.local_asset_path),
+            bucket=bucket,
+            prefix=prefix,
+            region=self.region,
+        )
 
     def check_bucket(self) -> bool:
         """Checks bucket ownership before sync"""
@@ -133,7 +118,7 @@ class BaseAssetPackager:
         sts = boto3.client("sts")
         account = sts.get_caller_identity()["Account"]
 
-        s3 = boto3.client("s3")
+        s3 = boto3.client("s3", region_name=self.region)
         try:
             s3.head_bucket(Bucket=bucket, ExpectedBucketOwner=account)
         except botocore.exceptions.ClientError as err:
@@ -154,6 +139,7 @@ class RegionalAssetPackager(BaseAssetPackager):
 
     def __init__(self, build_env: BuildEnvironment, region="us-east-1"):
         self.build_env = build_env
+        self.region = region
         self.local_asset_path = build_env.build_dist_dir
         self.s3_asset_path = f"s3://{build_env.source_bucket_name}-{region}/{build_env.solution_name}/{build_env.version_code}"
 
@@ -377,8 +363,10 @@ def source_code_package(ctx, ignore, solution_name):
 )
 @click.option(
     "--region",
-    help="Use this flag to control which regional bucket to push your assets to",
-    default="us-east-1",
+    help="Use this flag to control which regional bucket to push your assets to. Repeat it to sync several "
+    "regional buckets at the same time.",
+    default=["us-east-1"],
+    multiple=True,
 )
 def deploy(
     ctx,  # NOSONAR (python:S107) - allow large number of method parameters
@@ -420,17 +408,20 @@ def deploy(
     )
 
     # run regional asset packaging
-    rap = RegionalAssetPackager(env, region=region)
-    rap.package()
+    regional_packagers = [RegionalAssetPackager(env, region=name) for name in region]
+    for rap in regional_packagers:
+        rap.package()
 
     # run global asset packaging
     gap = GlobalAssetPackager(env)
     gap.package()
 
-    # sync as required
+    # sync as required - only new or changed assets are uploaded, to all buckets concurrently
     if sync:
-        rap.sync()
-        gap.sync()
+        try:
+            sync_all([packager.s3_sync() for packager in [*regional_packagers, gap]])
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as err:
+            raise click.ClickException(f"--sync failed: {err}")
 
 
 if __name__ == "__main__":
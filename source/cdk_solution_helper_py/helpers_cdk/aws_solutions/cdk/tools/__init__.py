@@ -2,3 +2,4 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from aws_solutions.cdk.tools.cleaner import Cleaner
+from aws_solutions.cdk.tools.s3_sync import S3Sync, SyncResult, sync_all
@@ -0,0 +1,80 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+import boto3
+from botocore.config import Config
+
+from aws_solutions.core.s3_sync import sync_directory
+
+logger = logging.getLogger("cdk-helper")
+
+DEFAULT_MAX_WORKERS = 16
+
+
+@dataclass
+class SyncResult:
+    """Summary of a single local directory to S3 prefix sync"""
+
+    destination: str
+    uploaded: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+
+
+@dataclass
+class S3Sync:
+    """
+    Uploads a local directory to an S3 prefix with aws_solutions.core.s3_sync, so only new and changed files are
+    uploaded, concurrently and with multipart transfers. Files are never deleted from the destination, matching
+    `aws s3 sync` without --delete.
+    """
+
+    local_path: Path
+    bucket: str
+    prefix: str
+    region: str = field(default=None)
+    max_workers: int = field(default=DEFAULT_MAX_WORKERS)
+    extra_args: Dict[str, str] = field(default_factory=lambda: {"ACL": "bucket-owner-full-control"})
+
+    def __post_init__(self):
+        self.local_path = Path(self.local_path)
+        self.prefix = self.prefix.strip("/")
+        # the endpoint can be pointed at a local S3 stand-in with the AWS_ENDPOINT_URL_S3 environment variable
+        self.s3 = boto3.client(
+            "s3",
+            region_name=self.region,
+            config=Config(max_pool_connections=self.max_workers, retries={"mode": "adaptive"}),
+        )
+
+    @property
+    def destination(self) -> str:
+        return f"s3://{self.bucket}/{self.prefix}"
+
+    def sync(self) -> SyncResult:
+        result = sync_directory(
+            self.bucket,
+            str(self.local_path),
+            self.prefix,
+            delete_orphans=False,
+            max_workers=self.max_workers,
+            s3_client=self.s3,
+            extra_args=self.extra_args,
+        )
+        logger.info(
+            "s3 sync: %d file(s) uploaded, %d unchanged file(s) skipped for %s"
+            % (len(result["uploaded"]), len(result["unchanged"]), self.destination)
+        )
+        return SyncResult(destination=self.destination, uploaded=result["uploaded"], skipped=result["unchanged"])
+
+
+def sync_all(syncs: List[S3Sync], max_workers: int = None) -> List[SyncResult]:
+    """Run several directory syncs, e.g. one per regional bucket, at the same time"""
+    if not syncs:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers or len(syncs)) as executor:
+        return list(executor.map(lambda s3_sync: s3_sync.sync(), syncs))
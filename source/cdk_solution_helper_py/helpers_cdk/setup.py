@@ -22,9 +22,11 @@ def get_version():
     return build_version
 
 
+version = get_version()
+
 setuptools.setup(
     name="aws-solutions-cdk",
-    version=get_version(),
+    version=version,
     description="Tools to make AWS Solutions deployments with CDK + Python more manageable",
     long_description=open("../README.md").read(),
     author="Amazon Web Services",
@@ -45,6 +47,8 @@ setuptools.setup(
         "boto3>=1.17.52",
         "requests>=2.32.3",
         "crhelper>=2.0.6",
+        # aws_solutions.cdk.tools.s3_sync uses aws_solutions.core.s3_sync, both packages are released together
+        f"aws-solutions-python=={version}",
     ],
     entry_points="""
         [console_scripts]
@@ -11,6 +11,9 @@ from aws_solutions.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Sized so clients shared across threads do not wait on the default pool of 10 connections
+MAX_POOL_CONNECTIONS = 50
+
 
 SOLUTION_ID_RE = re.compile(r"^SO(?P<id>\d+)(?P<component>[a-zA-Z]*)$")  # NOSONAR
 SOLUTION_VERSION_RE = re.compile(
@@ -62,4 +65,8 @@ class Config:
 
     @property
     def _botocore_config_defaults(self) -> Dict:
-        return {"user_agent_extra": f"AwsSolution/{self.id}/{self.version}"}
+        return {
+            "user_agent_extra": f"AwsSolution/{self.id}/{self.version}",
+            "max_pool_connections": MAX_POOL_CONNECTIONS,
+            "retries": {"mode": "adaptive"},
+        }
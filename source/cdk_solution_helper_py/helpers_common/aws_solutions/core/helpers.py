@@ -2,11 +2,15 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import os
+import threading
+
 import boto3
+import botocore.config
 import aws_solutions.core.config
 
 _helpers_service_clients = {}
 _helpers_service_resources = {}
+_helpers_lock = threading.Lock()
 _session = None
 
 
@@ -51,37 +55,63 @@ def get_session(**kwargs):
 
 def set_session(**kwargs):
     global _session
-    _session = boto3.session.Session(**kwargs)
+    with _helpers_lock:
+        _session = boto3.session.Session(**kwargs)
+        # pooled clients belong to the previous session
+        _helpers_service_clients.clear()
+        _helpers_service_resources.clear()
     return _session
 
 
 
-def get_service_client(service_name, region_name=None):
-    global _helpers_service_clients
-    config = aws_solutions.core.config.botocore_config
-    session = get_session()
+def _pool_key(service_name, region_name, config: botocore.config.Config = None):
+    config_options = tuple(sorted((k, repr(v)) for k, v in config._user_provided_options.items())) if config else ()
+    return service_name, region_name, config_options
+
+
+def _merged_config(config: botocore.config.Config = None) -> botocore.config.Config:
+    solution_config = aws_solutions.core.config.botocore_config
+    return solution_config.merge(config) if config else solution_config
+
 
+def get_service_client(service_name, region_name=None, config: botocore.config.Config = None):
+    """
+    Get a boto3 client from the client pool. Clients are keyed by service, region and config,
+    so callers asking for different regions or configs do not evict each other's clients.
+    The pool is safe to use from multiple threads and clients are reused across warm Lambda invocations.
+    :param service_name: the boto3 service name (e.g. s3)
+    :param region_name: the region for the client, defaults to AWS_REGION
+    :param config: botocore config merged over the solution defaults
+    :return: the pooled boto3 client
+    """
     if region_name is None:
         region_name = get_aws_region()
 
-    if (service_name not in _helpers_service_clients) or (region_name != get_aws_region()):
-        _helpers_service_clients[service_name] = session.client(
-            service_name, config=config, region_name=region_name
-        )
+    key = _pool_key(service_name, region_name, config)
+    client = _helpers_service_clients.get(key)
+    if client:
+        return client
 
-    return _helpers_service_clients[service_name]
+    with _helpers_lock:
+        # boto3 sessions are not thread-safe, so clients are created while holding the lock
+        if key not in _helpers_service_clients:
+            _helpers_service_clients[key] = get_session().client(
+                service_name, config=_merged_config(config), region_name=region_name
+            )
+        return _helpers_service_clients[key]
 
 
-def get_service_resource(service_name):
-    global _helpers_service_resources
-    config = aws_solutions.core.config.botocore_config
-    session = get_session()
+def get_service_resource(service_name, region_name=None):
+    if region_name is None:
+        region_name = get_aws_region()
 
-    if service_name not in _helpers_service_resources:
-        _helpers_service_resources[service_name] = session.resource(
-            service_name, config=config, region_name=get_aws_region()
-        )
-    return _helpers_service_resources[service_name]
+    key = _pool_key(service_name, region_name)
+    with _helpers_lock:
+        if key not in _helpers_service_resources:
+            _helpers_service_resources[key] = get_session().resource(
+                service_name, config=_merged_config(), region_name=region_name
+            )
+        return _helpers_service_resources[key]
 
 
 def get_aws_account() -> str:
@@ -0,0 +1,141 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from boto3.s3.transfer import TransferConfig
+
+from aws_solutions.core.helpers import get_service_client
+from aws_solutions.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# objects uploaded by sync_directory are marked, so only those are ever deleted as orphans
+MANAGED_METADATA = "solution-managed"
+# ETags of multipart or SSE-KMS encrypted objects are not MD5s, so the MD5 is also stored as metadata
+CONTENT_MD5_METADATA = "content-md5"
+DEFAULT_MAX_WORKERS = 8
+DELETE_OBJECTS_MAX_KEYS = 1000
+HASH_BLOCK_SIZE = 1024 * 1024
+IGNORED_DIRECTORIES = ["__pycache__"]
+IGNORED_SUFFIXES = [".pyc"]
+TRANSFER_CONFIG = TransferConfig(multipart_threshold=8 * 1024 * 1024, max_concurrency=4, use_threads=True)
+
+
+def file_md5(path: Path) -> str:
+    """Hash a file in blocks so large assets are not read into memory at once"""
+    # NOSONAR - MD5 is only compared with S3 ETags, it is not used for security
+    content_hash = hashlib.md5()  # nosec
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            content_hash.update(block)
+    return content_hash.hexdigest()
+
+
+def _key(prefix: str, relative_path: str) -> str:
+    return f"{prefix}/{relative_path}" if prefix else relative_path
+
+
+def _local_files(directory: str, prefix: str) -> dict:
+    files = {}
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = [name for name in dirs if name not in IGNORED_DIRECTORIES]
+        for name in names:
+            if Path(name).suffix in IGNORED_SUFFIXES:
+                continue
+            path = Path(root) / name
+            files[_key(prefix, path.relative_to(directory).as_posix())] = path
+    return files
+
+
+def _remote_objects(s3_client, bucket_name: str, prefix: str) -> dict:
+    """The ETag and size of each object under the prefix"""
+    remote_objects = {}
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=_key(prefix, "")):
+        for s3_object in page.get("Contents", []):
+            remote_objects[s3_object["Key"]] = (s3_object["ETag"].strip('"'), s3_object["Size"])
+    return remote_objects
+
+
+def sync_directory(bucket_name: str, directory: str, prefix: str, delete_orphans: bool = True,
+                   max_workers: int = DEFAULT_MAX_WORKERS, s3_client=None, extra_args: dict = None) -> dict:
+    """
+    Sync a local directory to an S3 prefix. Files whose MD5 matches the object ETag (or the MD5 stored with the
+    object) are skipped, the others are uploaded concurrently with multipart transfers. Objects under the prefix
+    that were uploaded by a previous sync but no longer exist locally are deleted, objects added by anyone else are
+    left untouched.
+    :param bucket_name: the destination bucket
+    :param directory: the local directory to sync
+    :param prefix: the S3 prefix managed by this sync
+    :param delete_orphans: delete objects previously uploaded by this sync that no longer exist locally
+    :param max_workers: the number of concurrent S3 requests
+    :param s3_client: the S3 client to use, defaults to the pooled client of the solution
+    :param extra_args: extra arguments of each upload (e.g. ACL)
+    :return: the uploaded, unchanged and deleted object keys
+    """
+    if not os.path.isdir(directory):
+        raise ValueError(f"{directory} is not a directory")
+
+    prefix = prefix.strip("/")
+    s3_client = s3_client or get_service_client("s3")
+    local_files = _local_files(directory, prefix)
+    remote_objects = _remote_objects(s3_client, bucket_name, prefix)
+
+    def head_metadata(key):
+        return s3_client.head_object(Bucket=bucket_name, Key=key).get("Metadata", {})
+
+    def is_unchanged(key, content_md5):
+        if key not in remote_objects:
+            return False
+        etag, size = remote_objects[key]
+        # objects with a different size changed for sure, only objects of the same size need their stored MD5
+        if size != local_files[key].stat().st_size:
+            return False
+        return etag == content_md5 or head_metadata(key).get(CONTENT_MD5_METADATA) == content_md5
+
+    def sync_file(key):
+        content_md5 = file_md5(local_files[key])
+        if is_unchanged(key, content_md5):
+            return False
+
+        s3_client.upload_file(
+            str(local_files[key]),
+            bucket_name,
+            key,
+            ExtraArgs={
+                **(extra_args or {}),
+                "Metadata": {MANAGED_METADATA: "true", CONTENT_MD5_METADATA: content_md5},
+            },
+            Config=TRANSFER_CONFIG,
+        )
+        logger.info(f"Uploaded {local_files[key]} to s3://{bucket_name}/{key}")
+        return True
+
+    def is_managed_orphan(key):
+        return head_metadata(key).get(MANAGED_METADATA) == "true"
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        keys = sorted(local_files)
+        uploads = list(executor.map(sync_file, keys))
+        orphans = sorted(set(remote_objects) - set(local_files)) if delete_orphans else []
+        managed_orphans = [key for key, managed in zip(orphans, executor.map(is_managed_orphan, orphans)) if managed]
+
+    for start in range(0, len(managed_orphans), DELETE_OBJECTS_MAX_KEYS):
+        chunk = managed_orphans[start:start + DELETE_OBJECTS_MAX_KEYS]
+        response = s3_client.delete_objects(
+            Bucket=bucket_name,
+            Delete={"Objects": [{"Key": key} for key in chunk], "Quiet": True},
+        )
+        if response.get("Errors"):
+            raise RuntimeError(f"Failed to delete orphaned objects from s3://{bucket_name}: {response['Errors']}")
+        logger.info(f"Deleted {len(chunk)} orphaned object(s) from s3://{bucket_name}/{prefix}")
+
+    return {
+        "uploaded": [key for key, uploaded in zip(keys, uploads) if uploaded],
+        "unchanged": [key for key, uploaded in zip(keys, uploads) if not uploaded],
+        "deleted": managed_orphans,
+    }
@@ -0,0 +1,31 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+from pathlib import Path
+from aws_cdk import Aws, Stack
+from aws_cdk.aws_lambda import Runtime
+from constructs import Construct
+from aws_solutions.cdk.aws_lambda.python.layer import SolutionsPythonLayerVersion
+
+
+class MetricsLayer(SolutionsPythonLayerVersion):
+    def __init__(self, scope: Construct, construct_id: str, **kwargs):
+        layer_path: Path = Path(__file__).absolute().parent
+        super().__init__(
+            scope,
+            construct_id,
+            layer_path / "requirements",
+            libraries=[layer_path / "python" / "cloudwatch_metrics"],
+            layer_version_name=f"{Aws.STACK_NAME}-metrics-layer",
+            compatible_runtimes=[Runtime.PYTHON_3_11],
+            **kwargs,
+        )
+
+    @staticmethod
+    def get_or_create(scope: Construct, **kwargs):
+        stack = Stack.of(scope)
+        construct_id = "MetricsLayer-B7E"
+        exists = stack.node.try_find_child(construct_id)
+        if exists:
+            return exists
+        return MetricsLayer(stack, construct_id, **kwargs)
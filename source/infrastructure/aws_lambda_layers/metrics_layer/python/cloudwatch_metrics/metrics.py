@@ -1,31 +1,144 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-from datetime import datetime
+import functools
+import json
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
 
-from aws_solutions.core.helpers import get_service_client
+STACK_NAME_DIMENSION = "stack-name"
+
+# CloudWatch Embedded Metric Format allows up to 100 metrics per directive and 100 values per metric
+# https://docs.aws.amazon.com/AmazonCloudWatch/latest/monitoring/CloudWatch_Embedded_Metric_Format_Specification.html
+EMF_MAX_METRICS = 100
+EMF_MAX_VALUES = 100
+# PutMetricData accepts up to 1,000 metric datums per request
+PUT_METRIC_DATA_MAX_DATUMS = 1000
+PUT_METRIC_DATA_MAX_VALUES = 150
 
 
 class Metrics:
-    def __init__(self, metrics_namespace, resource_prefix, logger):
+    """
+    Buffers metrics recorded during a Lambda invocation and publishes them in a single flush.
+
+    By default metrics are written to stdout as CloudWatch Embedded Metric Format (EMF) log lines,
+    which CloudWatch Logs extracts into metrics without any API call from the function.
+    Setting use_emf to False publishes the buffer with batched PutMetricData calls instead.
+    """
+
+    def __init__(self, metrics_namespace, resource_prefix, logger, use_emf=True):
         self.metrics_namespace = metrics_namespace
         self.resource_prefix = resource_prefix
         self.logger = logger
+        self.use_emf = use_emf
+        # (metric name, unit, dimension items) -> recorded values
+        self._buffer = defaultdict(list)
+
+    def add_metric(self, metric_name, value=1, unit="Count", dimensions=None):
+        """
+        Record a metric value in the buffer. The stack-name dimension is always added.
+        """
+        metric_dimensions = {STACK_NAME_DIMENSION: self.resource_prefix, **(dimensions or {})}
+        key = (metric_name, unit, tuple(sorted(metric_dimensions.items())))
+        self._buffer[key].append(value)
+
+    def flush(self):
+        """
+        Publish and clear all buffered metrics.
+        """
+        if not self._buffer:
+            return
 
-    def put_metrics_count_value_1(self, metric_name):
         self.logger.info(
-            f"Recording 1 (count) for metric {metric_name} in CloudWatch namespace {self.metrics_namespace}")
-        cloudwatch_client = get_service_client('cloudwatch')
-
-        cloudwatch_client.put_metric_data(
-            Namespace=self.metrics_namespace,
-            MetricData=[
-                {
-                    'MetricName': metric_name,
-                    'Dimensions': [{'Name': 'stack-name', 'Value': self.resource_prefix}],
-                    'Value': 1,
-                    'Unit': 'Count',
-                    "Timestamp": datetime.utcnow()
-                }
+            f"Recording {len(self._buffer)} metric(s) in CloudWatch namespace {self.metrics_namespace}")
+        try:
+            if self.use_emf:
+                self._flush_emf()
+            else:
+                self._flush_put_metric_data()
+        finally:
+            self._buffer.clear()
+
+    def flush_on_exit(self, handler):
+        """
+        Decorator for a Lambda handler that flushes the buffered metrics once the handler returns or raises.
+        """
+
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                self.flush()
+
+        return wrapper
+
+    def put_metrics_count_value_1(self, metric_name):
+        self.add_metric(metric_name=metric_name)
+        self.flush()
+
+    def _flush_emf(self):
+        timestamp = int(time.time() * 1000)
+
+        # Each EMF line carries dimension values as top level keys, so metrics are grouped by their dimensions
+        grouped = defaultdict(list)
+        for (metric_name, unit, dimension_items), values in self._buffer.items():
+            grouped[dimension_items].append((metric_name, unit, values))
+
+        for dimension_items, metrics in grouped.items():
+            for start in range(0, len(metrics), EMF_MAX_METRICS):
+                chunk = metrics[start:start + EMF_MAX_METRICS]
+                for line in self._build_emf_lines(timestamp, dict(dimension_items), chunk):
+                    print(json.dumps(line), flush=True)
+
+    def _build_emf_lines(self, timestamp, dimensions, metrics):
+        # Values beyond the per metric limit are spread across additional lines
+        max_values = max(len(values) for _, _, values in metrics)
+        for start in range(0, max_values, EMF_MAX_VALUES):
+            line_metrics = [
+                (metric_name, unit, values[start:start + EMF_MAX_VALUES])
+                for metric_name, unit, values in metrics
+                if values[start:start + EMF_MAX_VALUES]
             ]
-        )
+            line = {
+                "_aws": {
+                    "Timestamp": timestamp,
+                    "CloudWatchMetrics": [
+                        {
+                            "Namespace": self.metrics_namespace,
+                            "Dimensions": [list(dimensions.keys())],
+                            "Metrics": [{"Name": metric_name, "Unit": unit} for metric_name, unit, _ in line_metrics],
+                        }
+                    ],
+                },
+                **dimensions,
+            }
+            for metric_name, _, values in line_metrics:
+                line[metric_name] = values[0] if len(values) == 1 else values
+            yield line
+
+    def _flush_put_metric_data(self):
+        timestamp = datetime.now(timezone.utc)
+        metric_data = []
+        for (metric_name, unit, dimension_items), values in self._buffer.items():
+            for start in range(0, len(values), PUT_METRIC_DATA_MAX_VALUES):
+                chunk = values[start:start + PUT_METRIC_DATA_MAX_VALUES]
+                metric_data.append({
+                    "MetricName": metric_name,
+                    "Dimensions": [{"Name": name, "Value": value} for name, value in dimension_items],
+                    "Values": chunk,
+                    "Counts": [1] * len(chunk),
+                    "Unit": unit,
+                    "Timestamp": timestamp,
+                })
+
+        # boto3 is only imported when the PutMetricData fallback is used, the EMF path never needs it
+        from aws_solutions.core.helpers import get_service_client
+
+        cloudwatch_client = get_service_client("cloudwatch")
+        for start in range(0, len(metric_data), PUT_METRIC_DATA_MAX_DATUMS):
+            cloudwatch_client.put_metric_data(
+                Namespace=self.metrics_namespace,
+                MetricData=metric_data[start:start + PUT_METRIC_DATA_MAX_DATUMS],
+            )
@@ -7,7 +7,7 @@ import json
 import awsglue.transforms as awsglue_transforms
 from awsglue.utils import getResolvedOptions
 from pyspark.context import SparkContext
-from pyspark.sql.functions import regexp_extract
+from pyspark.sql.functions import regexp_extract, substring, when, lit
 from awsglue.context import GlueContext
 from awsglue.job import Job
 from awsglue.dynamicframe import DynamicFrameCollection
@@ -40,6 +40,9 @@ ATHENA_QUERY_BUCKET = args["ATHENA_QUERY_BUCKET"]
 AWS_REGION = args["AWS_REGION"]
 OBJECT_KEYS = json.loads(args["object_keys"])
 
+# metrics logs written by earlier versions hold all metric fields in a single message attribute
+LEGACY_MESSAGE_FIELD = "message"
+
 class GroupFilter:
     def __init__(self, name, filters):
         self.name = name
@@ -67,13 +70,29 @@ def threaded_route(glue_ctx, source_dyf, group_filters) -> DynamicFrameCollectio
 
 
 def apply_regex_pattern(dataframe, column):
-    return dataframe.withColumn(column, regexp_extract(dataframe["message"], f"{column}=([^,]+)", 1))
+    return regexp_extract(dataframe[LEGACY_MESSAGE_FIELD], f"{column}=([^,]+)", 1)
+
+
+def extract_metric_field(dataframe, column):
+    """
+    Metric fields are top-level attributes of each log line, numeric fields are JSON numbers. Only lines written
+    before the fields were split out carry them in the message, those are parsed with a regex. Fields are read as
+    strings and cast to the column types of the table afterwards.
+    """
+    if column not in dataframe.columns:
+        value = lit(None).cast("string")
+    else:
+        value = dataframe[column].cast("string")
+
+    if LEGACY_MESSAGE_FIELD in dataframe.columns:
+        value = when(dataframe[LEGACY_MESSAGE_FIELD].isNull(), value).otherwise(apply_regex_pattern(dataframe, column))
+    return dataframe.withColumn(column, value)
 
 
 def create_metric_node(node, columns):
     dataframe = node.toDF()
     for col in columns:
-        dataframe = apply_regex_pattern(dataframe, col)
+        dataframe = extract_metric_field(dataframe, col)
     node = DynamicFrame.fromDF(dataframe, glueContext, "dynamic_frame")
     return node
 
@@ -144,7 +163,11 @@ df_node = glueContext.create_dynamic_frame.from_options(
     }
 )
 
-# Drop unused fields
+# Fields such as min and max are integers for histograms and decimals for timers, fields with more than one type
+# across the metric types are read as strings and cast to the column types of each table later
+df_node = df_node.resolveChoice(choice="cast:string")
+
+# Drop unused fields of legacy log lines
 df_node = awsglue_transforms.DropFields.apply(
     frame=df_node,
     paths=["level", "logger", "thread"]
@@ -153,11 +176,11 @@ df_node = awsglue_transforms.DropFields.apply(
 # convert to data frame
 spark_df = df_node.toDF()
 
-# Extract type value into new column
-spark_df = spark_df.withColumn("type", regexp_extract(spark_df["message"], "type=([^,]+)", 1))
+# Read the type of each metric, parsing it from the message of legacy log lines only
+spark_df = extract_metric_field(spark_df, "type")
 
-# Extract year_month into new column
-spark_df = spark_df.withColumn("year_month", regexp_extract(spark_df["timestamp"], r"(\d{4}-\d{2})", 1))
+# Extract year_month (yyyy-MM) into new column
+spark_df = spark_df.withColumn("year_month", substring(spark_df["timestamp"], 1, 7))
 
 # convert to dynamic frame
 df_node = DynamicFrame.fromDF(spark_df, glueContext, "dynamic_frame")
@@ -210,7 +233,7 @@ for metric in metric_list:
     metric_node = create_metric_node(node=filtered_node, columns=cols)
     metric_node = awsglue_transforms.DropFields.apply(
         frame=metric_node,
-        paths=["message"]
+        paths=[LEGACY_MESSAGE_FIELD]
     )
 
     metric_node = map_data_types(node=metric_node, schema=schema)
@@ -3,6 +3,7 @@
 """
 This module is a custom resource Lambda for uploading files to the solution artifacts S3 bucket.
 Any files placed in the artifacts_bucket_lambda/files directory will uploaded to S3 under the same directory prefix.
+Only changed files are uploaded, and files removed from a directory are deleted from its prefix on the next stack update.
 
 Example: files/glue/metrics_glue_script.py is uploaded to the artifacts bucket with the object key: {bucket=name}/glue/metrics_glue_script.py
 """
@@ -11,20 +12,12 @@ import os
 
 from crhelper import CfnResource
 from aws_lambda_powertools import Logger
-import boto3
-from botocore import config
+from aws_solutions.core.s3_sync import sync_directory
 
 FILE_DIR = "files"
-SOLUTION_ID = os.environ["SOLUTION_ID"]
-SOLUTION_VERSION = os.environ["SOLUTION_VERSION"]
 
 logger = Logger(service="artifacts-bucket-upload-lambda", level="INFO")
 helper = CfnResource(log_level="ERROR", boto_level="ERROR")
-# Add the solution identifier to boto3 requests for attributing service API usage
-boto_config = {
-    "user_agent_extra": f"AwsSolution/{SOLUTION_ID}/{SOLUTION_VERSION}"
-}
-s3_client = boto3.client("s3", config=config.Config(**boto_config))
 
 def event_handler(event, context):
     """
@@ -50,23 +43,20 @@ def on_create_or_update(event, _) -> None:
 
 def upload_file(resource_properties) -> list:
     """
-    This function handles uploading files to the S3 artifacts bucket
+    This function handles syncing each directory of artifact files to the S3 artifacts bucket
     """
     artifacts_bucket_name = resource_properties["artifacts_bucket_name"]
     success = []
-    for root, dirs, _ in os.walk(FILE_DIR):
-        for subdir in dirs:
-            subdir_path = os.path.join(root, subdir)
-            for artifact_file in os.listdir(subdir_path):
-                local_obj_path = os.path.join(subdir_path, artifact_file)
-                object_key = f"{subdir}/{artifact_file}"
-
-                if artifact_file == "__pycache__":
-                    logger.info(f"Encountered pycache {object_key} while uploading")
-                    continue
-
-                s3_client.upload_file(local_obj_path, artifacts_bucket_name, object_key)
-                success_message = f"Uploaded {object_key}"
-                logger.info(success_message)
+    for subdir in sorted(os.listdir(FILE_DIR)):
+        subdir_path = os.path.join(FILE_DIR, subdir)
+        if subdir == "__pycache__" or not os.path.isdir(subdir_path):
+            continue
+
+        result = sync_directory(artifacts_bucket_name, subdir_path, subdir)
+        logger.info(
+            f"Synced {subdir_path}: {len(result['uploaded'])} uploaded, "
+            f"{len(result['unchanged'])} unchanged, {len(result['deleted'])} deleted"
+        )
+        success.extend(result["uploaded"])
 
     return success
@@ -4,8 +4,11 @@
 
 import os
 import json
+import time
+import random
 import logging
-import requests
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from aws_solutions.core.helpers import get_service_client
 
@@ -33,6 +36,70 @@ logger.addHandler(handler)
 
 METRICS_ENDPOINT = "https://metrics.awssolutionsbuilder.com/generic"
 
+# GetMetricData accepts up to 500 metric queries per request
+GET_METRIC_DATA_MAX_QUERIES = 500
+# GetMetricData does not return the unit of a metric, so the unit of each re-published AWS metric is passed in its
+# query and carried to PutMetricData. Metrics missing from this table have their unit looked up with GetMetricStatistics.
+METRIC_UNITS = {
+    "CloudFront": {
+        "Requests": "None",
+        "BytesDownloaded": "None",
+        "BytesUploaded": "None",
+        "TotalErrorRate": "Percent",
+        "4xxErrorRate": "Percent",
+        "5xxErrorRate": "Percent",
+        "CacheHitRate": "Percent",
+        "OriginLatency": "Milliseconds",
+    },
+    "NATGateway": {
+        "ActiveConnectionCount": "Count",
+        "BytesInFromDestination": "Bytes",
+        "BytesInFromSource": "Bytes",
+        "BytesOutToDestination": "Bytes",
+        "BytesOutToSource": "Bytes",
+        "ConnectionAttemptCount": "Count",
+        "ConnectionEstablishedCount": "Count",
+        "ErrorPortAllocation": "Count",
+        "IdleTimeoutCount": "Count",
+        "PacketsDropCount": "Count",
+        "PacketsInFromDestination": "Count",
+        "PacketsInFromSource": "Count",
+        "PacketsOutToDestination": "Count",
+        "PacketsOutToSource": "Count",
+    },
+    "ApplicationELB": {
+        "ActiveConnectionCount": "Count",
+        "ClientTLSNegotiationErrorCount": "Count",
+        "HealthyHostCount": "Count",
+        "HTTPCode_ELB_3XX_Count": "Count",
+        "HTTPCode_ELB_4XX_Count": "Count",
+        "HTTPCode_ELB_5XX_Count": "Count",
+        "HTTPCode_ELB_500_Count": "Count",
+        "HTTPCode_ELB_502_Count": "Count",
+        "HTTPCode_ELB_503_Count": "Count",
+        "HTTPCode_ELB_504_Count": "Count",
+        "HTTPCode_Target_2XX_Count": "Count",
+        "HTTPCode_Target_3XX_Count": "Count",
+        "HTTPCode_Target_4XX_Count": "Count",
+        "HTTPCode_Target_5XX_Count": "Count",
+        "NewConnectionCount": "Count",
+        "ProcessedBytes": "Bytes",
+        "RejectedConnectionCount": "Count",
+        "RequestCount": "Count",
+        "RequestCountPerTarget": "Count",
+        "RuleEvaluations": "Count",
+        "TargetConnectionErrorCount": "Count",
+        "TargetResponseTime": "Seconds",
+        "UnHealthyHostCount": "Count",
+    },
+}
+
+# PutMetricData accepts up to 1,000 metric datums per request
+PUT_METRIC_DATA_MAX_DATUMS = 1000
+PUT_METRIC_DATA_MAX_ATTEMPTS = 5
+PUT_METRIC_DATA_BASE_DELAY_SECS = 0.5
+RETRYABLE_ERROR_CODES = ["Throttling", "ThrottlingException", "InternalServiceError", "ServiceUnavailable"]
+
 
 class CloudwatchMetricsReport:
     def __init__(self):
@@ -43,6 +110,9 @@ class CloudwatchMetricsReport:
         self.end_time = datetime.utcnow()
         self.start_time = self.end_time - timedelta(seconds=SECONDS_IN_A_DAY)
         self.statistics = ["Sum", "Minimum", "Maximum"]
+        self.statistic_names = {
+            statistic.lower(): statistic for statistic in ["SampleCount", "Average", *self.statistics]
+        }
         self.uuid = self.get_uuid()
 
     @staticmethod
@@ -69,18 +139,79 @@ class CloudwatchMetricsReport:
             total += datapoint.get(stat, 1)
         return total
 
-    def get_metric_statistics(
-            self, metrics_namespace, metric_name, statistics, dimensions
-    ):
-        return self.cloudwatch_client.get_metric_statistics(
+    def list_metrics(self, metrics_namespace, dimensions):
+        """
+        Return all metrics in the namespace matching the dimensions, following ListMetrics pagination.
+        """
+        metrics = []
+        paginator = self.cloudwatch_client.get_paginator("list_metrics")
+        for page in paginator.paginate(Namespace=metrics_namespace, Dimensions=dimensions):
+            metrics.extend(page.get("Metrics", []))
+        return metrics
+
+    def get_metric_unit(self, metrics_namespace, metric_name, dimensions):
+        """
+        Return the unit of a metric missing from METRIC_UNITS, or None if the metric has no datapoints
+        """
+        datapoints = self.cloudwatch_client.get_metric_statistics(
             Namespace=metrics_namespace,
             MetricName=metric_name,
             StartTime=self.resolve_dt_time_format(self.start_time),
             EndTime=self.resolve_dt_time_format(self.end_time),
             Period=SECONDS_IN_A_DAY,
-            Statistics=statistics,
+            Statistics=["SampleCount"],
             Dimensions=dimensions,
-        )
+        ).get("Datapoints", [])
+        return datapoints[0].get("Unit") if datapoints else None
+
+    def get_metric_data(self, metric_plan):
+        """
+        Fetch daily statistics for every metric in the plan with batched, paginated GetMetricData calls.
+        Each plan entry holds a namespace, metric name, dimensions, statistics and an optional unit. The response for
+        each entry is shaped like a GetMetricStatistics response so it can be passed to prepare_metric_data.
+        """
+        queries = []
+        for plan_index, plan_entry in enumerate(metric_plan):
+            for statistic in plan_entry["statistics"]:
+                queries.append(
+                    {
+                        "Id": f"m{plan_index}_{statistic.lower()}",
+                        "MetricStat": {
+                            "Metric": {
+                                "Namespace": plan_entry["namespace"],
+                                "MetricName": plan_entry["metric_name"],
+                                "Dimensions": plan_entry["dimensions"],
+                            },
+                            "Period": SECONDS_IN_A_DAY,
+                            "Stat": statistic,
+                            **({"Unit": plan_entry["unit"]} if plan_entry.get("unit") else {}),
+                        },
+                        "ReturnData": True,
+                    }
+                )
+
+        # (plan index, timestamp) -> datapoint
+        datapoints = {}
+        for start in range(0, len(queries), GET_METRIC_DATA_MAX_QUERIES):
+            paginator = self.cloudwatch_client.get_paginator("get_metric_data")
+            for page in paginator.paginate(
+                    MetricDataQueries=queries[start:start + GET_METRIC_DATA_MAX_QUERIES],
+                    StartTime=self.resolve_dt_time_format(self.start_time),
+                    EndTime=self.resolve_dt_time_format(self.end_time),
+            ):
+                for result in page.get("MetricDataResults", []):
+                    plan_id, statistic = result["Id"][1:].split("_")
+                    for timestamp, value in zip(result.get("Timestamps", []), result.get("Values", [])):
+                        datapoint = datapoints.setdefault(
+                            (int(plan_id), timestamp),
+                            {"Timestamp": timestamp, "Unit": metric_plan[int(plan_id)].get("unit")},
+                        )
+                        datapoint[self.statistic_names[statistic]] = value
+
+        responses = [{"Datapoints": []} for _ in metric_plan]
+        for (plan_index, _), datapoint in sorted(datapoints.items(), key=lambda item: item[0][0]):
+            responses[plan_index]["Datapoints"].append(datapoint)
+        return responses
 
     def prepare_metric_data(
             self, metric_tag, metric_name, response, sum_all_datapoints=True
@@ -107,15 +238,19 @@ class CloudwatchMetricsReport:
 
     def get_generic_metrics(self, metrics_to_sum, metric_tag=""):
         data = self.data_init()
-        for metric_name in metrics_to_sum:
+        metric_plan = [
+            {
+                "namespace": METRICS_NAMESPACE,
+                "metric_name": metric_name,
+                "dimensions": [{"Name": "stack-name", "Value": STACK_NAME}],
+                "statistics": self.statistics,
+            }
+            for metric_name in metrics_to_sum
+        ]
+        responses = self.get_metric_data(metric_plan)
+        for metric_name, lambda_stat_response in zip(metrics_to_sum, responses):
             # Sum all values for the metric over the past 24 hours:
             try:
-                lambda_stat_response = self.get_metric_statistics(
-                    metrics_namespace=METRICS_NAMESPACE,
-                    metric_name=metric_name,
-                    statistics=self.statistics,
-                    dimensions=[{"Name": "stack-name", "Value": STACK_NAME}],
-                )
                 metric_data = self.prepare_metric_data(
                         response=lambda_stat_response,
                         metric_name=metric_name,
@@ -145,68 +280,74 @@ class CloudwatchMetricsReport:
         ]
         return self.get_generic_metrics(metrics_to_sum, "Lambda")
 
-    def get_cloudfront_metrics(self):
-        # Cloudfront
+    def get_namespace_metrics(self, metric_tag, metrics, statistics):
+        """
+        Collect daily statistics for metrics discovered in an AWS namespace and prepare them for re-publication.
+        """
         data = self.data_init()
-        metric_tag = "CloudFront"
-        namespace = f"AWS/{metric_tag}"
-        cf_cw_response = self.cloudwatch_client.list_metrics(
-            Namespace=namespace,
-            Dimensions=[
-                {"Name": "DistributionId", "Value": os.environ["CF_DISTRIBUTION_ID"]},
-                {"Name": "Region", "Value": "Global"},
-            ],
-        )
-        for cf_cw_metric in cf_cw_response.get("Metrics", []):
-            cf_cw_metric_name = cf_cw_metric["MetricName"]
+        metric_units = METRIC_UNITS.get(metric_tag, {})
+        metric_plan = [
+            {
+                "namespace": f"AWS/{metric_tag}",
+                "metric_name": metric["MetricName"],
+                "dimensions": metric["Dimensions"],
+                "statistics": statistics,
+                "unit": metric_units.get(metric["MetricName"]) or self.get_metric_unit(
+                    f"AWS/{metric_tag}", metric["MetricName"], metric["Dimensions"]
+                ),
+            }
+            for metric in metrics
+        ]
+        responses = self.get_metric_data(metric_plan)
+        for cw_metric, stat_response in zip(metrics, responses):
+            cw_metric_name = cw_metric["MetricName"]
             try:
-                cf_response = self.get_metric_statistics(
-                    metrics_namespace=namespace,
-                    metric_name=cf_cw_metric_name,
-                    statistics=self.statistics,
-                    dimensions=cf_cw_metric["Dimensions"],
-                )
-
                 metric_data = self.prepare_metric_data(
-                    response=cf_response,
-                    metric_name=cf_cw_metric_name,
+                    response=stat_response,
+                    metric_name=cw_metric_name,
                     metric_tag=metric_tag,
                 )
                 if not metric_data:
-                    raise ValueError(f"No metric data found for metric {metric_tag}-{cf_cw_metric_name}")
+                    raise ValueError(f"No metric data found for metric {metric_tag}-{cw_metric_name}")
 
                 data["Data"].update(metric_data)
 
-                metric = f"{metric_tag}-{cf_cw_metric_name}"
+                metric = f"{metric_tag}-{cw_metric_name}"
                 data["MetricData"].setdefault(metric, {})
                 data["MetricData"][metric].update(
                     {
                         "value": data["Data"][metric],
-                        "dimensions": cf_cw_metric["Dimensions"],
+                        "dimensions": cw_metric["Dimensions"],
                         "datapoints": data["Data"].pop("datapoints"),
                     }
                 )
             except Exception as e:
-                logger.info(f"Fail to prepare metrics data for {cf_cw_metric_name}. Error: {e}")
+                logger.info(f"Fail to prepare metrics data for {cw_metric_name}. Error: {e}")
                 continue
 
         return data
 
+    def get_cloudfront_metrics(self):
+        # Cloudfront
+        metric_tag = "CloudFront"
+        cf_metrics = self.list_metrics(
+            metrics_namespace=f"AWS/{metric_tag}",
+            dimensions=[
+                {"Name": "DistributionId", "Value": os.environ["CF_DISTRIBUTION_ID"]},
+                {"Name": "Region", "Value": "Global"},
+            ],
+        )
+        return self.get_namespace_metrics(metric_tag, cf_metrics, ["SampleCount", *self.statistics])
+
     def get_nat_gateway_ids(self, subnet_ids):
         nat_gateway_ids = []
-        for subnet_id in subnet_ids:
-            nat_gateway_response = self.ec2_client.describe_nat_gateways(
-                Filters=[
-                    {
-                        "Name": "subnet-id",
-                        "Values": [
-                            subnet_id,
-                        ],
-                    },
-                ]
-            )
+        if not subnet_ids:
+            return nat_gateway_ids
+
+        paginator = self.ec2_client.get_paginator("describe_nat_gateways")
+        for page in paginator.paginate(Filters=[{"Name": "subnet-id", "Values": subnet_ids}]):
             nat_gateway_ids.extend([
-                nat_gateway.get("NatGatewayId") for nat_gateway in nat_gateway_response.get("NatGateways", [])
+                nat_gateway.get("NatGatewayId") for nat_gateway in page.get("NatGateways", [])
                 if nat_gateway.get("NatGatewayId")
             ])
 
@@ -215,93 +356,27 @@ class CloudwatchMetricsReport:
     def get_nat_gateway_metrics(self):
         # NAT gateway
         metric_tag = "NATGateway"
-        namespace = f"AWS/{metric_tag}"
-        data = self.data_init()
         subnet_ids = json.loads(os.environ["SUBNET_IDS"])
-        nat_gateway_ids = self.get_nat_gateway_ids(subnet_ids)
-        for nat_gateway_id in nat_gateway_ids:
-            nat_cw_response = self.cloudwatch_client.list_metrics(
-                Namespace=namespace,
-                Dimensions=[{"Name": "NatGatewayId", "Value": nat_gateway_id}],
+        nat_metrics = []
+        for nat_gateway_id in self.get_nat_gateway_ids(subnet_ids):
+            nat_metrics.extend(
+                self.list_metrics(
+                    metrics_namespace=f"AWS/{metric_tag}",
+                    dimensions=[{"Name": "NatGatewayId", "Value": nat_gateway_id}],
+                )
             )
-            for nat_metric in nat_cw_response.get("Metrics", []):
-                nat_metric_name = nat_metric["MetricName"]
-                try:
-                    nat_cw_stat_response = self.get_metric_statistics(
-                        metrics_namespace=namespace,
-                        metric_name=nat_metric_name,
-                        statistics=self.statistics,
-                        dimensions=nat_metric["Dimensions"],
-                    )
-                    metric_data = self.prepare_metric_data(
-                        response=nat_cw_stat_response,
-                        metric_name=nat_metric_name,
-                        metric_tag=metric_tag,
-                    )
-                    if not metric_data:
-                        raise ValueError(f"No metric data found for metric {metric_tag}-{nat_metric_name}")
-
-                    data["Data"].update(metric_data)
-
-                    metric = f"{metric_tag}-{nat_metric_name}"
-                    data["MetricData"].setdefault(metric, {})
-                    data["MetricData"][metric].update(
-                        {
-                            "value": data["Data"][metric],
-                            "dimensions": nat_metric["Dimensions"],
-                            "datapoints": data["Data"].pop("datapoints"),
-                        }
-                    )
-                except Exception as e:
-                    logger.info(f"Fail to prepare metrics data for {nat_metric_name}. Error: {e}")
-                    continue
-
-        return data
+        return self.get_namespace_metrics(metric_tag, nat_metrics, ["SampleCount", *self.statistics])
 
     def get_application_elb_metrics(self):
         # Load Balancer
         metric_tag = "ApplicationELB"
-        namespace = f"AWS/{metric_tag}"
-        data = self.data_init()
-        elb_response = self.cloudwatch_client.list_metrics(
-            Namespace=namespace,
-            Dimensions=[
+        elb_metrics = self.list_metrics(
+            metrics_namespace=f"AWS/{metric_tag}",
+            dimensions=[
                 {"Name": "LoadBalancer", "Value": os.environ["LOAD_BALANCER_NAME"]}
             ],
         )
-        for elb_metric in elb_response.get("Metrics", []):
-            elb_metric_name = elb_metric["MetricName"]
-            try:
-                elb_stat_response = self.get_metric_statistics(
-                    metrics_namespace=namespace,
-                    metric_name=elb_metric_name,
-                    statistics=["SampleCount", "Average", *self.statistics],
-                    dimensions=elb_metric["Dimensions"],
-                )
-                metric_data = self.prepare_metric_data(
-                    response=elb_stat_response,
-                    metric_name=elb_metric_name,
-                    metric_tag=metric_tag,
-                )
-                if not metric_data:
-                    raise ValueError(f"No metric data found for metric {metric_tag}-{elb_metric_name}")
-
-                data["Data"].update(metric_data)
-
-                metric = f"{metric_tag}-{elb_metric_name}"
-                data["MetricData"].setdefault(metric, {})
-                data["MetricData"][metric].update(
-                    {
-                        "value": data["Data"][metric],
-                        "dimensions": elb_metric["Dimensions"],
-                        "datapoints": data["Data"].pop("datapoints"),
-                    }
-                )
-            except Exception as e:
-                logger.info(f"Fail to prepare metrics data for {elb_metric_name}. Error: {e}")
-                continue
-
-        return data
+        return self.get_namespace_metrics(metric_tag, elb_metrics, ["SampleCount", "Average", *self.statistics])
 
     def get_uuid(self):
         return self.secrets_manager_client.get_secret_value(
@@ -329,41 +404,73 @@ class CloudwatchMetricsReport:
         if os.environ.get("CF_DISTRIBUTION_ID"):
             metric_funcs.append("get_cloudfront_metrics")
 
-        for metric_func in metric_funcs:
-            metric_report_data = getattr(self, metric_func)()
+        # The namespaces are independent, so they are collected concurrently
+        with ThreadPoolExecutor(max_workers=len(metric_funcs)) as executor:
+            metric_reports = list(executor.map(lambda metric_func: getattr(self, metric_func)(), metric_funcs))
+
+        metric_data = {}
+        for metric_func, metric_report_data in zip(metric_funcs, metric_reports):
             if metric_func not in ["get_lambda_metrics", "get_cloudformation_metrics"]:
-                if metric_report_data["MetricData"]:
-                    self.put_metric_data(metric_report_data["MetricData"])
+                metric_data.update(metric_report_data["MetricData"])
             data["Data"].update(metric_report_data["Data"])
 
+        # Statistic sets from all namespaces are re-published together in as few requests as possible
+        if metric_data:
+            self.put_metric_data(metric_data)
+
         data.pop("MetricData")
         return data
 
     def put_metric_data(self, metric_data):
+        """
+        Re-publish aggregated statistic sets in chunks of up to 1,000 datums per PutMetricData request.
+        Failed metrics and chunks are reported together in a single summary.
+        """
+        failures = []
+        metric_datums = []
         for metric_name, metric_data_value in metric_data.items():
             try:
-                self.cloudwatch_client.put_metric_data(
-                    Namespace=METRICS_NAMESPACE,
-                    MetricData=[
-                        {
-                            "MetricName": metric_name,
-                            "Dimensions": metric_data_value["dimensions"],
-                            "Unit": metric_data_value["datapoints"]["Unit"],
-                            "Timestamp": metric_data_value["datapoints"]["Timestamp"],
-                            "StatisticValues": {
-                                "SampleCount": metric_data_value["datapoints"][
-                                    "SampleCount"
-                                ],
-                                "Sum": metric_data_value["datapoints"]["Sum"],
-                                "Minimum": metric_data_value["datapoints"]["Minimum"],
-                                "Maximum": metric_data_value["datapoints"]["Maximum"],
-                            },
-                        }
-                    ],
+                metric_datums.append(
+                    {
+                        "MetricName": metric_name,
+                        "Dimensions": metric_data_value["dimensions"],
+                        "Unit": metric_data_value["datapoints"]["Unit"] or "None",
+                        "Timestamp": metric_data_value["datapoints"]["Timestamp"],
+                        "StatisticValues": {
+                            "SampleCount": metric_data_value["datapoints"][
+                                "SampleCount"
+                            ],
+                            "Sum": metric_data_value["datapoints"]["Sum"],
+                            "Minimum": metric_data_value["datapoints"]["Minimum"],
+                            "Maximum": metric_data_value["datapoints"]["Maximum"],
+                        },
+                    }
                 )
             except Exception as e:
-                logger.info(f"Fail to put metric data on CloudWatch for {metric_name}. Error: {e}")
-                continue
+                failures.append(f"{metric_name}: {e}")
+
+        for start in range(0, len(metric_datums), PUT_METRIC_DATA_MAX_DATUMS):
+            chunk = metric_datums[start:start + PUT_METRIC_DATA_MAX_DATUMS]
+            try:
+                self.put_metric_data_with_backoff(chunk)
+            except Exception as e:
+                failures.append(f"{len(chunk)} metrics from {chunk[0]['MetricName']} to {chunk[-1]['MetricName']}: {e}")
+
+        if failures:
+            logger.info(f"Fail to put metric data on CloudWatch for {len(failures)} metric(s) or chunk(s). Errors: {failures}")
+
+    def put_metric_data_with_backoff(self, metric_datums):
+        for attempt in range(PUT_METRIC_DATA_MAX_ATTEMPTS):
+            try:
+                return self.cloudwatch_client.put_metric_data(
+                    Namespace=METRICS_NAMESPACE,
+                    MetricData=metric_datums,
+                )
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in RETRYABLE_ERROR_CODES or attempt == PUT_METRIC_DATA_MAX_ATTEMPTS - 1:
+                    raise e
+                # Exponential backoff with full jitter
+                time.sleep(random.uniform(0, PUT_METRIC_DATA_BASE_DELAY_SECS * 2 ** attempt))  # NOSONAR
 
 
 def event_handler(event, context):
@@ -389,6 +496,9 @@ def send_metrics():
         if data["Data"]:
             logger.info("Reporting the following data:")
             logger.info(json.dumps(data))
+            # requests is only needed when reporting, so it is not imported during the function init
+            import requests
+
             response = requests.post(METRICS_ENDPOINT, json=data, timeout=5)
             logger.info(f"Response status code = {response.status_code}")
         else:
@@ -4,14 +4,9 @@
 This module is a custom resource Lambda for uploading docker config files to an S3 bucket.
 """
 
-import os
 from crhelper import CfnResource
 from aws_lambda_powertools import Logger
-import boto3
-from botocore import config
-
-SOLUTION_ID = os.environ["SOLUTION_ID"]
-SOLUTION_VERSION = os.environ["SOLUTION_VERSION"]
+from aws_solutions.core.s3_sync import sync_directory
 
 logger = Logger(service="prebid-configs-bucket-upload-lambda", level="INFO")
 helper = CfnResource(log_level="ERROR", boto_level="ERROR")
@@ -44,7 +39,7 @@ def on_create_or_update(event, _) -> None:
 
 def upload_all_files(bucket_name: str) -> None:
     """
-    Uploads files from predefined directories to the S3 bucket using respective prefixes.
+    Syncs files from predefined directories to the S3 bucket using respective prefixes.
     """
     for directory, prefix in CONFIG_DIRECTORIES:
         upload_directory_to_s3(bucket_name, directory, prefix)
@@ -52,23 +47,12 @@ def upload_all_files(bucket_name: str) -> None:
 
 def upload_directory_to_s3(bucket_name: str, directory: str, prefix: str) -> None:
     """
-    Uploads all files from a specified directory to the S3 bucket with the given prefix.
-    """
-    for root, _, files in os.walk(directory):
-        for file in files:
-            file_path = os.path.join(root, file)
-            object_key = os.path.join(prefix, os.path.relpath(file_path, directory))
-            upload_file_to_s3(bucket_name, file_path, object_key)
-
-
-def upload_file_to_s3(bucket_name: str, file_path: str, object_key: str) -> None:
-    """
-    Uploads a single file to the specified S3 bucket.
+    Syncs a specified directory to the S3 bucket with the given prefix. Unchanged files are skipped and files
+    uploaded by a previous deployment that no longer exist in the directory are deleted. Files uploaded to the
+    prefix by users are never deleted.
     """
-    # Add the solution identifier to boto3 requests for attributing service API usage
-    boto_config = {
-        "user_agent_extra": f"AwsSolution/{SOLUTION_ID}/{SOLUTION_VERSION}"
-    }
-    s3_client = boto3.client("s3", config=config.Config(**boto_config))
-    s3_client.upload_file(file_path, bucket_name, object_key)
-    logger.info(f"Uploaded {file_path} to s3://{bucket_name}/{object_key}")
+    result = sync_directory(bucket_name, directory, prefix)
+    logger.info(
+        f"Synced {directory} to s3://{bucket_name}/{prefix}: {len(result['uploaded'])} uploaded, "
+        f"{len(result['unchanged'])} unchanged, {len(result['deleted'])} deleted"
+    )
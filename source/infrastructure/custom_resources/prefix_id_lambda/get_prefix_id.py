@@ -5,18 +5,13 @@
 This module is a custom lambda for getting the prefix list id for the ALB security group
 """
 
-import os
-import boto3
-from botocore import config
 from aws_lambda_powertools import Logger
 from crhelper import CfnResource
+from aws_solutions.core.helpers import get_service_client
 
 logger = Logger(utc=True, service="prefix-id-custom-lambda")
 helper = CfnResource(log_level="ERROR", boto_level="ERROR")
 
-SOLUTION_ID = os.environ["SOLUTION_ID"]
-SOLUTION_VERSION = os.environ["SOLUTION_VERSION"]
-
 def event_handler(event, context):
     """
     This is the Lambda custom resource entry point.
@@ -31,11 +26,7 @@ def on_create(event, _) -> None:
     Function to get prefix_list_id from prefix_list_name
     """
     prefix_list_name = "com.amazonaws.global.cloudfront.origin-facing"
-    # Add the solution identifier to boto3 requests for attributing service API usage
-    boto_config = {
-        "user_agent_extra": f"AwsSolution/{SOLUTION_ID}/{SOLUTION_VERSION}"
-    }
-    ec2_client = boto3.client("ec2", config=config.Config(**boto_config))
+    ec2_client = get_service_client("ec2")
     response = ec2_client.describe_managed_prefix_lists()
     prefix_list_id = None
 
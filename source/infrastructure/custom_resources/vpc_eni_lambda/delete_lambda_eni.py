@@ -5,17 +5,25 @@
 This module is a custom lambda for deleting VPC ENIs for the Lambda service
 """
 
-import os
-import boto3
-from botocore import config
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError, WaiterError
 from crhelper import CfnResource
+from aws_solutions.core.helpers import get_service_client
 
 logger = Logger(utc=True, service="vpc-eni-lambda")
 helper = CfnResource(log_level="ERROR", boto_level="ERROR")
 
-SOLUTION_ID = os.environ["SOLUTION_ID"]
-SOLUTION_VERSION = os.environ["SOLUTION_VERSION"]
+MAX_WORKERS = 16
+WAITER_DELAY_SECONDS = 5
+# stop waiting early enough to delete the last ENIs and send the custom resource response before the function times out
+DEADLINE_MARGIN_SECONDS = 30
+# used when the remaining time is unknown, e.g. when invoked outside of Lambda
+DEFAULT_TIMEOUT_SECONDS = 300
+ENI_NOT_FOUND = "InvalidNetworkInterfaceID.NotFound"
+
 
 def event_handler(event, context):
     """
@@ -26,42 +34,83 @@ def event_handler(event, context):
 
 
 @helper.delete
-def on_delete(event, _) -> None:
+def on_delete(event, context) -> None:
     """
     Function to delete Lambda service VPC ENIs
     """
     SECURITY_GROUP_ID = event["ResourceProperties"]["SECURITY_GROUP_ID"]
-    # Add the solution identifier to boto3 requests for attributing service API usage
-    boto_config = {
-        "user_agent_extra": f"AwsSolution/{SOLUTION_ID}/{SOLUTION_VERSION}"
-    }
-    ec2_client = boto3.client("ec2", config=config.Config(**boto_config))
-
-    desribe_response = ec2_client.describe_network_interfaces(
-        Filters=[{"Name": "group-id", "Values": [SECURITY_GROUP_ID]}]
-    )
+    ec2_client = get_service_client("ec2")
+    deadline = get_deadline(context)
+
+    network_interfaces = list_network_interfaces(ec2_client, SECURITY_GROUP_ID)
+    logger.info(f"Found {len(network_interfaces)} ENI(s) in security group {SECURITY_GROUP_ID}")
+
     return_responses = []
-    for network_interface in desribe_response["NetworkInterfaces"]:
+    if network_interfaces:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(network_interfaces))) as executor:
+            deleted = executor.map(
+                lambda network_interface: delete_network_interface(ec2_client, network_interface, deadline),
+                network_interfaces,
+            )
+            return_responses = [network_id for network_id in deleted if network_id]
+
+    helper.Data.update({"Response": return_responses})
+
+
+def get_deadline(context) -> float:
+    """
+    Returns the monotonic time by which all ENIs must be deleted, derived from the remaining function time
+    """
+    if context is None:
+        remaining_seconds = DEFAULT_TIMEOUT_SECONDS
+    else:
+        remaining_seconds = context.get_remaining_time_in_millis() / 1000
+    return time.monotonic() + max(remaining_seconds - DEADLINE_MARGIN_SECONDS, 0)
+
+
+def list_network_interfaces(ec2_client, security_group_id: str) -> list:
+    paginator = ec2_client.get_paginator("describe_network_interfaces")
+    network_interfaces = []
+    for page in paginator.paginate(Filters=[{"Name": "group-id", "Values": [security_group_id]}]):
+        network_interfaces.extend(page["NetworkInterfaces"])
+    return network_interfaces
+
+
+def delete_network_interface(ec2_client, network_interface: dict, deadline: float):
+    """
+    Detaches an ENI, waits until it is available and deletes it. Returns the ENI id once it is deleted, or None
+    if it could not be deleted before the deadline.
+    """
+    network_id = network_interface["NetworkInterfaceId"]
+
+    attachment_id = network_interface.get("Attachment", {}).get("AttachmentId")
+    if attachment_id and network_interface.get("Status") != "available":
         try:
-            attachment_id = network_interface["Attachment"]["AttachmentId"]
             ec2_client.detach_network_interface(AttachmentId=attachment_id)
-
             logger.info(f"Detached ENI: {attachment_id}")
-
-        except Exception as e:
-            logger.exception(e)
+        except ClientError as e:
+            # ENIs of the Lambda service are detached by Lambda itself once its functions are deleted
+            logger.info(f"Could not detach ENI {network_id}, waiting for it to become available: {e}")
 
         try:
-            network_id = network_interface["NetworkInterfaceId"]
-            response = ec2_client.delete_network_interface(
-                NetworkInterfaceId=network_id
+            max_attempts = max(int((deadline - time.monotonic()) // WAITER_DELAY_SECONDS), 1)
+            ec2_client.get_waiter("network_interface_available").wait(
+                NetworkInterfaceIds=[network_id],
+                WaiterConfig={"Delay": WAITER_DELAY_SECONDS, "MaxAttempts": max_attempts},
             )
+        except WaiterError as e:
+            if e.last_response.get("Error", {}).get("Code") == ENI_NOT_FOUND:
+                logger.info(f"ENI already deleted: {network_id}")
+                return network_id
+            logger.error(f"ENI {network_id} did not become available before the deadline: {e}")
+            return None
 
-            return_responses.append(response)
-
-            logger.info(f"Deleted ENI: {network_id}")
-
-        except Exception as e:
+    try:
+        ec2_client.delete_network_interface(NetworkInterfaceId=network_id)
+    except ClientError as e:
+        if e.response["Error"]["Code"] != ENI_NOT_FOUND:
             logger.exception(e)
+            return None
 
-    helper.Data.update({"Response": return_responses})
+    logger.info(f"Deleted ENI: {network_id}")
+    return network_id
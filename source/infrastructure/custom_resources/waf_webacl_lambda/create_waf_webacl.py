@@ -2,22 +2,18 @@
 # SPDX-License-Identifier: Apache-2.0
 
 """
-This module is a custom lambda for creation of Waf Web ACL
+This module is a custom lambda for creation of Waf Web ACL, and for updating its rules on stack updates
 """
 
-import boto3
-import os
+import json
 import uuid
-from botocore import config
 from aws_lambda_powertools import Logger
 from crhelper import CfnResource
+from aws_solutions.core.helpers import get_service_client
 
 logger = Logger(utc=True, service="waf-custom-lambda")
 helper = CfnResource(log_level="ERROR", boto_level="ERROR")
 
-SOLUTION_ID = os.environ["SOLUTION_ID"]
-SOLUTION_VERSION = os.environ["SOLUTION_VERSION"]
-
 
 def event_handler(event, context):
     """
@@ -33,125 +29,154 @@ def get_4char_uuid():
     return unique_id[:4]
 
 
+# AWS managed rule groups of the web ACL, the heavy groups are scoped down to skip the read-only endpoints
+MANAGED_RULE_GROUPS = [
+    ("AWSManagedRulesKnownBadInputsRuleSet", False),
+    ("AWSManagedRulesCommonRuleSet", True),
+    ("AWSManagedRulesAnonymousIpList", False),
+    ("AWSManagedRulesAmazonIpReputationList", False),
+    ("AWSManagedRulesAdminProtectionRuleSet", False),
+    ("AWSManagedRulesSQLiRuleSet", True),
+]
+WEB_ACL_DESCRIPTION = "Creating Web ACL for Cloudfront applying AWS managed rule sets"
+WEB_ACL_VISIBILITY_CONFIG = {
+    "SampledRequestsEnabled": True,
+    "CloudWatchMetricsEnabled": True,
+    "MetricName": "PrebidWebACL",
+}
+
+
+def visibility_config(metric_name: str) -> dict:
+    return {
+        "CloudWatchMetricsEnabled": True,
+        "MetricName": metric_name,
+        "SampledRequestsEnabled": True,
+    }
+
+
+def path_starts_with(paths: list) -> dict:
+    """
+    Returns a statement matching the requests whose URI path starts with one of the paths
+    """
+    statements = [
+        {
+            "ByteMatchStatement": {
+                "SearchString": path,
+                "FieldToMatch": {"UriPath": {}},
+                "TextTransformations": [{"Priority": 0, "Type": "NONE"}],
+                "PositionalConstraint": "STARTS_WITH",
+            }
+        }
+        for path in paths
+    ]
+    return statements[0] if len(statements) == 1 else {"OrStatement": {"Statements": statements}}
+
+
+def has_header(header: str) -> dict:
+    """
+    Returns a statement matching the requests that carry the header, a missing header never matches
+    """
+    return {
+        "SizeConstraintStatement": {
+            "FieldToMatch": {"SingleHeader": {"Name": header.lower()}},
+            "ComparisonOperator": "GE",
+            "Size": 0,
+            "TextTransformations": [{"Priority": 0, "Type": "NONE"}],
+        }
+    }
+
+
+def rate_based_rule(name: str, limit: int, config: dict, forwarded_ip_header: str = None,
+                    excluded_header: str = None) -> dict:
+    statement = {
+        "Limit": limit,
+        "EvaluationWindowSec": config.get("window_secs", 300),
+        "AggregateKeyType": "IP",
+    }
+    if forwarded_ip_header:
+        # requests without the header are not counted by this rule, the per-IP rule still applies to them
+        statement["AggregateKeyType"] = "FORWARDED_IP"
+        statement["ForwardedIPConfig"] = {"HeaderName": forwarded_ip_header, "FallbackBehavior": "NO_MATCH"}
+    scope_down = []
+    if config.get("rate_limited_paths"):
+        scope_down.append(path_starts_with(config["rate_limited_paths"]))
+    if excluded_header:
+        scope_down.append({"NotStatement": {"Statement": has_header(excluded_header)}})
+    if len(scope_down) == 1:
+        statement["ScopeDownStatement"] = scope_down[0]
+    elif scope_down:
+        statement["ScopeDownStatement"] = {"AndStatement": {"Statements": scope_down}}
+    return {
+        "Name": name,
+        "Action": {"Block": {}},
+        "Statement": {"RateBasedStatement": statement},
+        "VisibilityConfig": visibility_config(name),
+    }
+
+
+def managed_rule_group(name: str, scoped_down: bool, config: dict) -> dict:
+    statement = {"Name": name, "VendorName": "AWS"}
+    if scoped_down and config.get("uninspected_paths"):
+        statement["ScopeDownStatement"] = {"NotStatement": {"Statement": path_starts_with(config["uninspected_paths"])}}
+    return {
+        "Name": f"AWS-{name}",
+        "OverrideAction": {"None": {}},
+        "Statement": {"ManagedRuleGroupStatement": statement},
+        "VisibilityConfig": visibility_config(name),
+    }
+
+
+def build_rules(config: dict) -> list:
+    """
+    Returns the rules of the web ACL: the rate-based rules are evaluated first, so abusive clients are blocked before
+    the managed rule groups inspect their requests
+    """
+    rules = []
+    forwarded_ip_limited = bool(config.get("limit_per_forwarded_ip") and config.get("forwarded_ip_header"))
+    if config.get("limit_per_ip"):
+        # publisher servers send the requests of many users from one IP, they are limited per forwarded IP instead
+        rules.append(
+            rate_based_rule(
+                "RateLimitPerIp",
+                int(config["limit_per_ip"]),
+                config,
+                excluded_header=config["forwarded_ip_header"] if forwarded_ip_limited else None,
+            )
+        )
+    if forwarded_ip_limited:
+        rules.append(
+            rate_based_rule(
+                "RateLimitPerForwardedIp",
+                int(config["limit_per_forwarded_ip"]),
+                config,
+                forwarded_ip_header=config["forwarded_ip_header"],
+            )
+        )
+    rules.extend(managed_rule_group(name, scoped_down, config) for name, scoped_down in MANAGED_RULE_GROUPS)
+
+    for priority, rule in enumerate(rules, start=1):
+        rule["Priority"] = priority
+    return rules
+
+
+def get_rules_config(event) -> dict:
+    return json.loads(event["ResourceProperties"].get("WAF_RULES_CONFIG", "{}"))
+
+
 @helper.create
 def on_create(event, _) -> None:
     """
     Function to create waf web acl
     """
-    # Add the solution identifier to boto3 requests for attributing service API usage
-    boto_config = {
-        "region_name": "us-east-1",
-        "user_agent_extra": f"AwsSolution/{SOLUTION_ID}/{SOLUTION_VERSION}"
-    }
-    wafv2_client = boto3.client("wafv2", config=config.Config(**boto_config))
+    # CloudFront web ACLs are managed in us-east-1
+    wafv2_client = get_service_client("wafv2", region_name="us-east-1")
     response = wafv2_client.create_web_acl(
         Name=f"PrebidWaf-{event['StackId'].rsplit('/')[-1]}-{get_4char_uuid()}",
         Scope="CLOUDFRONT",
         DefaultAction={"Allow": {}},
-        Description="Creating Web ACL for Cloudfront applying AWS managed rule sets",
-        Rules=[
-            {
-                "Name": "AWS-AWSManagedRulesKnownBadInputsRuleSet",
-                "OverrideAction": {"None": {}},
-                "Priority": 1,
-                "Statement": {
-                    "ManagedRuleGroupStatement": {
-                        "Name": "AWSManagedRulesKnownBadInputsRuleSet",
-                        "VendorName": "AWS",
-                    }
-                },
-                "VisibilityConfig": {
-                    "CloudWatchMetricsEnabled": True,
-                    "MetricName": "AWSManagedRulesKnownBadInputsRuleSet",
-                    "SampledRequestsEnabled": True,
-                },
-            },
-            {
-                "Name": "AWS-AWSManagedRulesCommonRuleSet",
-                "OverrideAction": {"None": {}},
-                "Priority": 2,
-                "Statement": {
-                    "ManagedRuleGroupStatement": {
-                        "Name": "AWSManagedRulesCommonRuleSet",
-                        "VendorName": "AWS",
-                    }
-                },
-                "VisibilityConfig": {
-                    "CloudWatchMetricsEnabled": True,
-                    "MetricName": "AWSManagedRulesCommonRuleSet",
-                    "SampledRequestsEnabled": True,
-                },
-            },
-            {
-                "Name": "AWS-AWSManagedRulesAnonymousIpList",
-                "OverrideAction": {"None": {}},
-                "Priority": 3,
-                "Statement": {
-                    "ManagedRuleGroupStatement": {
-                        "Name": "AWSManagedRulesAnonymousIpList",
-                        "VendorName": "AWS",
-                    }
-                },
-                "VisibilityConfig": {
-                    "CloudWatchMetricsEnabled": True,
-                    "MetricName": "AWSManagedRulesAnonymousIpList",
-                    "SampledRequestsEnabled": True,
-                },
-            },
-            {
-                "Name": "AWS-AWSManagedRulesAmazonIpReputationList",
-                "OverrideAction": {"None": {}},
-                "Priority": 4,
-                "Statement": {
-                    "ManagedRuleGroupStatement": {
-                        "Name": "AWSManagedRulesAmazonIpReputationList",
-                        "VendorName": "AWS",
-                    }
-                },
-                "VisibilityConfig": {
-                    "CloudWatchMetricsEnabled": True,
-                    "MetricName": "AWSManagedRulesAmazonIpReputationList",
-                    "SampledRequestsEnabled": True,
-                },
-            },
-            {
-                "Name": "AWS-AWSManagedRulesAdminProtectionRuleSet",
-                "OverrideAction": {"None": {}},
-                "Priority": 5,
-                "Statement": {
-                    "ManagedRuleGroupStatement": {
-                        "Name": "AWSManagedRulesAdminProtectionRuleSet",
-                        "VendorName": "AWS",
-                    }
-                },
-                "VisibilityConfig": {
-                    "CloudWatchMetricsEnabled": True,
-                    "MetricName": "AWSManagedRulesAdminProtectionRuleSet",
-                    "SampledRequestsEnabled": True,
-                },
-            },
-            {
-                "Name": "AWS-AWSManagedRulesSQLiRuleSet",
-                "OverrideAction": {"None": {}},
-                "Priority": 6,
-                "Statement": {
-                    "ManagedRuleGroupStatement": {
-                        "Name": "AWSManagedRulesSQLiRuleSet",
-                        "VendorName": "AWS",
-                    }
-                },
-                "VisibilityConfig": {
-                    "CloudWatchMetricsEnabled": True,
-                    "MetricName": "AWSManagedRulesSQLiRuleSet",
-                    "SampledRequestsEnabled": True,
-                },
-            },
-        ],
-        VisibilityConfig={
-            "SampledRequestsEnabled": True,
-            "CloudWatchMetricsEnabled": True,
-            "MetricName": "PrebidWebACL",
-        },
+        Description=WEB_ACL_DESCRIPTION,
+        Rules=build_rules(get_rules_config(event)),
+        VisibilityConfig=WEB_ACL_VISIBILITY_CONFIG,
     )
 
     logger.info(response)
@@ -163,3 +188,49 @@ def on_create(event, _) -> None:
             "webacl_locktoken": response["Summary"]["LockToken"],
         }
     )
+
+
+@helper.update
+def on_update(event, _) -> None:
+    """
+    Function to update the rules of the waf web acl created for the stack
+    """
+    wafv2_client = get_service_client("wafv2", region_name="us-east-1")
+    name_prefix = f"PrebidWaf-{event['StackId'].rsplit('/')[-1]}-"
+    web_acl = find_web_acl(wafv2_client, name_prefix)
+    if web_acl is None:
+        raise ValueError(f"No WAF WebAcl with a name starting with {name_prefix}")
+
+    lock_token = wafv2_client.get_web_acl(Name=web_acl["Name"], Scope="CLOUDFRONT", Id=web_acl["Id"])["LockToken"]
+    response = wafv2_client.update_web_acl(
+        Name=web_acl["Name"],
+        Scope="CLOUDFRONT",
+        Id=web_acl["Id"],
+        DefaultAction={"Allow": {}},
+        Description=WEB_ACL_DESCRIPTION,
+        Rules=build_rules(get_rules_config(event)),
+        VisibilityConfig=WEB_ACL_VISIBILITY_CONFIG,
+        LockToken=lock_token,
+    )
+
+    logger.info(f"Updated the rules of WAF WebAcl {web_acl['Name']}")
+    helper.Data.update(
+        {
+            "webacl_arn": web_acl["ARN"],
+            "webacl_name": web_acl["Name"],
+            "webacl_id": web_acl["Id"],
+            "webacl_locktoken": response["NextLockToken"],
+        }
+    )
+
+
+def find_web_acl(wafv2_client, name_prefix: str):
+    params = {"Scope": "CLOUDFRONT", "Limit": 100}
+    while True:
+        response = wafv2_client.list_web_acls(**params)
+        for web_acl in response.get("WebACLs", []):
+            if web_acl["Name"].startswith(name_prefix):
+                return web_acl
+        if not response.get("NextMarker") or not response.get("WebACLs"):
+            return None
+        params["NextMarker"] = response["NextMarker"]
@@ -5,18 +5,13 @@
 This module is a custom lambda for deletion of Waf Web ACL and associations
 """
 
-import boto3
-import os
-from botocore import config
 from aws_lambda_powertools import Logger
 from crhelper import CfnResource
+from aws_solutions.core.helpers import get_service_client
 
 logger = Logger(utc=True, service="waf-custom-lambda")
 helper = CfnResource(log_level="ERROR", boto_level="ERROR")
 
-SOLUTION_ID = os.environ["SOLUTION_ID"]
-SOLUTION_VERSION = os.environ["SOLUTION_VERSION"]
-
 def event_handler(event, context):
     """
     This is the Lambda custom resource entry point.
@@ -28,11 +23,7 @@ def event_handler(event, context):
 
 @helper.delete
 def on_delete(event, _):
-    # Add the solution identifier to boto3 requests for attributing service API usage
-    boto_config = {
-        "user_agent_extra": f"AwsSolution/{SOLUTION_ID}/{SOLUTION_VERSION}"
-    }
-    cf_client = boto3.client("cloudfront", config=config.Config(**boto_config))
+    cf_client = get_service_client("cloudfront")
 
     # Dissociate web acl resource before deleting web acl
     cf_distribution_id = event["ResourceProperties"]["CF_DISTRIBUTION_ID"]
@@ -48,10 +39,12 @@ def on_delete(event, _):
     )
 
     # Delete Web ACL
-    wafv2_client = boto3.client("wafv2", region_name="us-east-1")
+    # CloudFront web ACLs are managed in us-east-1
+    wafv2_client = get_service_client("wafv2", region_name="us-east-1")
     webacl_name = event["ResourceProperties"]["WAF_WEBACL_NAME"]
     webacl_id = event["ResourceProperties"]["WAF_WEBACL_ID"]
-    webacl_locktoken = event["ResourceProperties"]["WAF_WEBACL_LOCKTOKEN"]
+    # the lock token changes with each update of the rules
+    webacl_locktoken = wafv2_client.get_web_acl(Name=webacl_name, Scope="CLOUDFRONT", Id=webacl_id)["LockToken"]
 
     _ = wafv2_client.delete_web_acl(
         Name=webacl_name, Scope="CLOUDFRONT", Id=webacl_id, LockToken=webacl_locktoken
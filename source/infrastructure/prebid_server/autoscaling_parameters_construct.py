@@ -0,0 +1,101 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+from aws_cdk import CfnCondition, CfnParameter, Duration, Fn, Stack
+from constructs import Construct
+
+import prebid_server.stack_constants as globals
+
+PARAMETER_GROUP = "Auto Scaling Settings"
+
+
+class AutoScalingParameters(Construct):
+    def __init__(self, scope, id, solutions_template_options) -> None:
+        """
+        This construct creates the stack parameters that tune the auto scaling policies of the Prebid Server service.
+        """
+        super().__init__(scope, id)
+
+        # Parameters are created in the stack scope so their logical ids are the parameter names
+        stack = Stack.of(self)
+
+        scale_out_cooldown_param = CfnParameter(
+            stack,
+            id="ScaleOutCooldownSeconds",
+            description="Seconds after a scale-out activity before another scale-out activity can start",
+            type="Number",
+            min_value=0,
+            default=globals.SCALE_OUT_COOLDOWN_SECS,
+        )
+        scale_in_cooldown_param = CfnParameter(
+            stack,
+            id="ScaleInCooldownSeconds",
+            description="Seconds after a scale-in activity before another scale-in activity can start",
+            type="Number",
+            min_value=0,
+            default=globals.SCALE_IN_COOLDOWN_SECS,
+        )
+        response_time_target_param = CfnParameter(
+            stack,
+            id="ResponseTimeP99TargetMillis",
+            description="Target p99 response time of the Prebid Server tasks in milliseconds, keep it below the auction tmax",
+            type="Number",
+            min_value=1,
+            default=globals.RESPONSE_TIME_P99_TARGET_MILLIS,
+        )
+        in_flight_requests_target_param = CfnParameter(
+            stack,
+            id="InFlightRequestsPerTaskTarget",
+            description="Target number of auctions in flight per Prebid Server task",
+            type="Number",
+            min_value=1,
+            default=globals.IN_FLIGHT_REQUESTS_PER_TASK_TARGET,
+        )
+        latency_scale_in_param = CfnParameter(
+            stack,
+            id="LatencyScalingScaleIn",
+            description="Yes - The response time and in-flight auction policies also remove tasks. \n No - They only add tasks, tasks are removed by the CPU, memory and request count policies",
+            type="String",
+            allowed_values=["Yes", "No"],
+            default="No",
+        )
+        spike_requests_param = CfnParameter(
+            stack,
+            id="SpikeRequestsPerTarget",
+            description="Requests per task in one minute above which tasks are added at once by step scaling",
+            type="Number",
+            min_value=1,
+            default=globals.SPIKE_REQUESTS_PER_TARGET,
+        )
+        spike_scale_out_param = CfnParameter(
+            stack,
+            id="SpikeScaleOutPercent",
+            description="Percentage of the running tasks added when the requests per task exceed SpikeRequestsPerTarget",
+            type="Number",
+            min_value=1,
+            default=globals.SPIKE_SCALE_OUT_PCT,
+        )
+
+        for param in [
+            response_time_target_param,
+            in_flight_requests_target_param,
+            latency_scale_in_param,
+            scale_out_cooldown_param,
+            scale_in_cooldown_param,
+            spike_requests_param,
+            spike_scale_out_param,
+        ]:
+            solutions_template_options.add_parameter(param, label="", group=PARAMETER_GROUP)
+
+        self.latency_scale_in_condition = CfnCondition(
+            stack,
+            id="LatencyScalingScaleInCondition",
+            expression=Fn.condition_equals(latency_scale_in_param.value_as_string, "Yes")
+        )
+
+        self.scale_out_cooldown = Duration.seconds(scale_out_cooldown_param.value_as_number)
+        self.scale_in_cooldown = Duration.seconds(scale_in_cooldown_param.value_as_number)
+        self.response_time_p99_target_millis = response_time_target_param.value_as_number
+        self.in_flight_requests_per_task_target = in_flight_requests_target_param.value_as_number
+        self.spike_requests_per_target = spike_requests_param.value_as_number
+        self.spike_scale_out_percent = spike_scale_out_param.value_as_number
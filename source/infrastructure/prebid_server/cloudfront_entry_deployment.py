@@ -32,6 +32,8 @@ class CloudFrontEntryDeployment(Construct):
             datasync_s3_layer,
             prebid_cluster,
             glue_etl,
+            metrics_streaming=None,
+            scaling_parameters=None,
     ) -> None:
         """
         This construct creates resources needed for the user to use CloudFront as their CDN.
@@ -48,8 +50,12 @@ class CloudFrontEntryDeployment(Construct):
 
         efs_construct = EfsConstruct(self, "Efs", prebid_vpc)
 
-        ecs_task_construct = ECSTaskConstruct(self, "ECSTask", image_ecs_obj, efs_construct.prebid_fs,
-                                              efs_construct.prebid_fs_access_point, docker_configs_manager_bucket)
+        ecs_task_construct = ECSTaskConstruct(
+            self, "ECSTask", image_ecs_obj, efs_construct.prebid_fs, efs_construct.prebid_fs_access_point,
+            docker_configs_manager_bucket,
+            metrics_bucket=glue_etl.source_bucket if globals.METRICS_SIDECAR_ENABLED else None,
+            metrics_streaming=metrics_streaming,
+        )
 
         # ALB security group
         alb_sec_group = ec2.SecurityGroup(self, "Prebid-ALB-security-group", vpc=prebid_vpc)  # NOSONAR
@@ -100,7 +106,8 @@ class CloudFrontEntryDeployment(Construct):
                                                     ecs_task_construct.prebid_task_definition,
                                                     prebid_task_subnets,
                                                     ecs_task_construct.prebid_container,
-                                                    efs_construct.prebid_fs)
+                                                    efs_construct.prebid_fs,
+                                                    scaling_parameters=scaling_parameters)
 
         # Create CloudFront and WAF resources, and prefix list id.
         cloudfront_waf_construct = CloudFrontWafConstruct(self, "CloudFrontWaf", prebid_alb)
@@ -150,51 +157,58 @@ class CloudFrontEntryDeployment(Construct):
             "FargateServiceRequestCountScaling",
             requests_per_target=globals.REQUESTS_PER_TARGET,
             target_group=ecs_service_construct.alb_target_group,
+            **ecs_service_construct.cooldowns(),
         )
-
-        # Create DataSync tasks for moving logs and metrics from EFS to S3
-        datasync_metrics = DataSyncTask(
-            self,
-            "DataSyncMetrics",
-            vpc=prebid_vpc,
-            efs_filesystem=efs_construct.prebid_fs,
-            efs_ap=efs_construct.prebid_fs_access_point,
-            efs_path=globals.EFS_METRICS,
-            filter_pattern="*/prebid-metrics.log",
-            task_schedule=globals.DATASYNC_METRICS_SCHEDULE,
-            report_bucket=artifacts_construct.bucket,
-            log_group=datasync_monitor.log_group,
-            glue_etl_job_trigger=glue_etl.lambda_function,
-            glue_etl_s3_location=glue_etl.s3_location,
-        )
-
-        datasync_metrics.node.add_dependency(artifacts_construct.bucket)
-        datasync_metrics.node.add_dependency(datasync_monitor.log_group)
-
-        # Suppress cfn_guard warning about missing egress rule. Justification:
-        # The Datasync construct creates a security group without an efgress rule.
-        # Security groups without an egress rule allow all outbound traffic by default.
-        # Datasync lies within our trust domain. We trust outbound traffic from that service.
-        for child in datasync_metrics.node.find_all():
-            if isinstance(child, ec2.SecurityGroup):
-                security_group_l1_construct = child.node.find_child(id="Resource")
-                security_group_l1_construct.add_metadata("guard",
-                                                         {'SuppressedRules': ['SECURITY_GROUP_MISSING_EGRESS_RULE']})
-
-        # Create resources for removing transferred logs and metrics from EFS
-        efs_cleanup = EfsCleanup(
-            self,
-            "EfsCleanup",
-            vpc=prebid_vpc,
-            efs_ap=efs_construct.prebid_fs_access_point,
-            efs_filesystem=efs_construct.prebid_fs,
-            report_bucket=artifacts_construct.bucket,
-            datasync_tasks={
-                globals.EFS_METRICS: datasync_metrics.task,
-            },
-            fargate_cluster_arn=prebid_cluster.cluster_arn,
-        )
-        efs_cleanup.efs_file_del_lambda_function.add_layers(datasync_s3_layer)
+        if scaling_parameters is not None:
+            ecs_service_construct.scale_on_auction_latency()
+            ecs_service_construct.scale_on_schedule()
+
+        # The metrics sidecar uploads the metrics archives to S3 itself, they never reach EFS
+        if not globals.METRICS_SIDECAR_ENABLED:
+            # Create DataSync tasks for moving logs and metrics from EFS to S3
+            datasync_metrics = DataSyncTask(
+                self,
+                "DataSyncMetrics",
+                vpc=prebid_vpc,
+                efs_filesystem=efs_construct.prebid_fs,
+                efs_ap=efs_construct.prebid_fs_access_point,
+                efs_path=globals.EFS_METRICS,
+                # the active log and archives still being written are not transferred
+                filter_pattern="*/prebid-metrics.log|*.partial",
+                task_schedule=globals.DATASYNC_METRICS_SCHEDULE,
+                report_bucket=artifacts_construct.bucket,
+                log_group=datasync_monitor.log_group,
+                glue_etl_job_trigger=glue_etl.lambda_function,
+                glue_etl_s3_location=glue_etl.s3_location,
+            )
+
+            datasync_metrics.node.add_dependency(artifacts_construct.bucket)
+            datasync_metrics.node.add_dependency(datasync_monitor.log_group)
+
+            # Suppress cfn_guard warning about missing egress rule. Justification:
+            # The Datasync construct creates a security group without an efgress rule.
+            # Security groups without an egress rule allow all outbound traffic by default.
+            # Datasync lies within our trust domain. We trust outbound traffic from that service.
+            for child in datasync_metrics.node.find_all():
+                if isinstance(child, ec2.SecurityGroup):
+                    security_group_l1_construct = child.node.find_child(id="Resource")
+                    security_group_l1_construct.add_metadata("guard",
+                                                             {'SuppressedRules': ['SECURITY_GROUP_MISSING_EGRESS_RULE']})
+
+            # Create resources for removing transferred logs and metrics from EFS
+            efs_cleanup = EfsCleanup(
+                self,
+                "EfsCleanup",
+                vpc=prebid_vpc,
+                efs_ap=efs_construct.prebid_fs_access_point,
+                efs_filesystem=efs_construct.prebid_fs,
+                report_bucket=artifacts_construct.bucket,
+                datasync_tasks={
+                    globals.EFS_METRICS: datasync_metrics.task,
+                },
+                fargate_cluster_arn=prebid_cluster.cluster_arn,
+            )
+            efs_cleanup.efs_file_del_lambda_function.add_layers(datasync_s3_layer)
 
         CfnOutput(self, "Prebid-EFSId", value=efs_construct.prebid_fs.file_system_id,
                   condition=deploy_cloudfront_waf_condition)
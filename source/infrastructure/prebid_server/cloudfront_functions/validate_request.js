@@ -0,0 +1,63 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0
+
+// CloudFront Function (cloudfront-js-2.0) associated with the viewer requests of the auction behavior.
+// Requests that break the rules of their path are answered at the edge with a 4xx and never reach the ALB.
+// Paths without rules are passed through. The rules are rendered from CLOUDFRONT_EDGE_VALIDATION_RULES in
+// stack_constants.py when the stack is synthesized, for each path:
+//   methods                 allowed HTTP methods
+//   content_types           allowed media types of requests with a body, parameters such as charset are ignored
+//   max_body_bytes          largest Content-Length accepted, the body itself is not available to CloudFront Functions
+//   required_query_strings  query string parameters that must be present
+//   required_headers        headers that must be present, in lower case
+var RULES = __VALIDATION_RULES__;
+
+function reject(statusCode, statusDescription) {
+    return {
+        statusCode: statusCode,
+        statusDescription: statusDescription,
+        headers: {"cache-control": {value: "no-store"}}
+    };
+}
+
+function handler(event) {
+    var request = event.request;
+    var rules = RULES[request.uri];
+    if (!rules) {
+        return request;
+    }
+
+    if (rules.methods && rules.methods.indexOf(request.method) === -1) {
+        return reject(405, "Method Not Allowed");
+    }
+
+    var headers = request.headers;
+    if (request.method === "POST" || request.method === "PUT") {
+        if (rules.content_types) {
+            var contentType = headers["content-type"] ? headers["content-type"].value.split(";")[0].trim().toLowerCase() : "";
+            if (rules.content_types.indexOf(contentType) === -1) {
+                return reject(415, "Unsupported Media Type");
+            }
+        }
+        if (rules.max_body_bytes && headers["content-length"] &&
+            parseInt(headers["content-length"].value, 10) > rules.max_body_bytes) {
+            return reject(413, "Payload Too Large");
+        }
+    }
+
+    var i;
+    var requiredQueryStrings = rules.required_query_strings || [];
+    for (i = 0; i < requiredQueryStrings.length; i++) {
+        if (!request.querystring[requiredQueryStrings[i]]) {
+            return reject(400, "Bad Request");
+        }
+    }
+    var requiredHeaders = rules.required_headers || [];
+    for (i = 0; i < requiredHeaders.length; i++) {
+        if (!headers[requiredHeaders[i]]) {
+            return reject(400, "Bad Request");
+        }
+    }
+
+    return request;
+}
@@ -1,6 +1,9 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
+import json
+from pathlib import Path
+
 from aws_cdk import (
     aws_lambda,
     aws_cloudfront as cloudfront,
@@ -17,6 +20,15 @@ from aws_solutions.cdk.aws_lambda.python.function import SolutionsPythonFunction
 from constructs import Construct
 import prebid_server.stack_constants as globals
 
+VALIDATE_REQUEST_FUNCTION_PATH = Path(__file__).absolute().parents[0] / "cloudfront_functions" / "validate_request.js"
+
+
+def render_validate_request_function(rules: dict) -> str:
+    """
+    Returns the code of the edge validation CloudFront Function with the rules of each path
+    """
+    return VALIDATE_REQUEST_FUNCTION_PATH.read_text().replace("__VALIDATION_RULES__", json.dumps(rules, sort_keys=True))
+
 
 class CloudFrontWafConstruct(Construct):
     def __init__(
@@ -175,13 +187,20 @@ class CloudFrontWafConstruct(Construct):
                     actions=[
                         "wafv2:CreateWebACL",
                         "wafv2:DeleteWebACL",
+                        "wafv2:GetWebACL",
                         "wafv2:UpdateWebACL",
                     ],
                     resources=[
                         f"arn:aws:wafv2:us-east-1:{Aws.ACCOUNT_ID}:global/webacl/PrebidWaf-*",
                         f"arn:aws:wafv2:us-east-1:{Aws.ACCOUNT_ID}:global/managedruleset/*/*",
                     ],
-                )
+                ),
+                # the web ACL is looked up by name when its rules are updated
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["wafv2:ListWebACLs"],
+                    resources=["*"],  # NOSONAR
+                ),
             ],
         )
 
@@ -213,11 +232,24 @@ class CloudFrontWafConstruct(Construct):
         create_waf_web_acl_function.node.find_child(id='Resource').add_metadata("guard", {
             'SuppressedRules': ['LAMBDA_INSIDE_VPC', 'LAMBDA_CONCURRENCY_CHECK']})
 
+        # the rules of the web ACL are updated when these properties change
         create_waf_web_acl_custom_resource = CustomResource(
             self,
             "WafWebAclCr",
             service_token=create_waf_web_acl_function.function_arn,
-            properties={},
+            properties={
+                "WAF_RULES_CONFIG": json.dumps(
+                    {
+                        "window_secs": globals.WAF_RATE_LIMIT_WINDOW_SECS,
+                        "limit_per_ip": globals.WAF_RATE_LIMIT_PER_IP,
+                        "forwarded_ip_header": globals.WAF_RATE_LIMIT_FORWARDED_IP_HEADER,
+                        "limit_per_forwarded_ip": globals.WAF_RATE_LIMIT_PER_FORWARDED_IP,
+                        "rate_limited_paths": globals.WAF_RATE_LIMITED_PATHS,
+                        "uninspected_paths": globals.WAF_UNINSPECTED_PATHS,
+                    },
+                    sort_keys=True,
+                ),
+            },
         )
 
         create_waf_web_acl_function.node.add_dependency(waf_web_acl_function_waf_policy)
@@ -256,6 +288,7 @@ class CloudFrontWafConstruct(Construct):
             "PrebidCloudFrontDist",
             comment="Prebid Server Deployment on AWS",
             default_behavior=default_behavior,
+            additional_behaviors=self._create_path_behaviors(origin, response_headers_policy),
             web_acl_id=waf_webacl_arn,
             enable_logging=True,
             log_bucket=cloudfront_access_logs_bucket,
@@ -349,3 +382,101 @@ class CloudFrontWafConstruct(Construct):
                 "WAF_WEBACL_LOCKTOKEN": waf_webacl_locktoken,
             },
         )
+
+    def _create_path_behaviors(self, origin, response_headers_policy) -> dict:
+        """
+        This function creates the cache behaviors of the read-only endpoints, which CloudFront answers from its cache
+        for a short time, and of the auction endpoints, which only receive the viewer data Prebid Server reads
+        """
+        info_behavior = cloudfront.BehaviorOptions(
+            origin=origin,
+            allowed_methods=cloudfront.AllowedMethods.ALLOW_GET_HEAD_OPTIONS,
+            cache_policy=self._create_short_ttl_cache_policy("InfoCachePolicy", globals.CLOUDFRONT_INFO_CACHE_TTL_SECS),
+            response_headers_policy=response_headers_policy,
+        )
+        status_behavior = cloudfront.BehaviorOptions(
+            origin=origin,
+            allowed_methods=cloudfront.AllowedMethods.ALLOW_GET_HEAD_OPTIONS,
+            cache_policy=self._create_short_ttl_cache_policy(
+                "StatusCachePolicy", globals.CLOUDFRONT_STATUS_CACHE_TTL_SECS
+            ),
+            response_headers_policy=response_headers_policy,
+        )
+
+        auction_origin_request_policy = cloudfront.OriginRequestPolicy(
+            self,
+            "AuctionOriginRequestPolicy",
+            comment="Viewer headers and cookies read by Prebid Server auctions",
+            header_behavior=cloudfront.OriginRequestHeaderBehavior.allow_list(*globals.CLOUDFRONT_AUCTION_HEADERS),
+            cookie_behavior=cloudfront.OriginRequestCookieBehavior.allow_list(*globals.CLOUDFRONT_AUCTION_COOKIES),
+            query_string_behavior=cloudfront.OriginRequestQueryStringBehavior.all(),
+        )
+        # CloudFront only compresses responses when the cache policy includes Accept-Encoding, which the managed
+        # CachingDisabled policy cannot. The default TTL of 0 keeps the responses out of the cache.
+        auction_cache_policy = cloudfront.CachePolicy(
+            self,
+            "AuctionCachePolicy",
+            comment="Compressed and uncached Prebid Server auction responses",
+            default_ttl=Duration.seconds(0),
+            max_ttl=Duration.seconds(globals.CLOUDFRONT_AUCTION_MAX_TTL_SECS),
+            min_ttl=Duration.seconds(0),
+            header_behavior=cloudfront.CacheHeaderBehavior.none(),
+            cookie_behavior=cloudfront.CacheCookieBehavior.none(),
+            # the 1 second maximum TTL lets the origin cache a response, which must not be served for other query strings
+            query_string_behavior=cloudfront.CacheQueryStringBehavior.all(),
+            enable_accept_encoding_gzip=True,
+            enable_accept_encoding_brotli=True,
+        )
+        auction_behavior = cloudfront.BehaviorOptions(
+            origin=origin,
+            allowed_methods=cloudfront.AllowedMethods.ALLOW_ALL,
+            origin_request_policy=auction_origin_request_policy,
+            cache_policy=auction_cache_policy,
+            compress=True,
+            response_headers_policy=response_headers_policy,
+            function_associations=self._create_function_associations(),
+        )
+
+        behaviors = {path: info_behavior for path in globals.CLOUDFRONT_INFO_PATHS}
+        behaviors[globals.HEALTH_PATH] = status_behavior
+        behaviors[globals.CLOUDFRONT_AUCTION_PATH] = auction_behavior
+        return behaviors
+
+    def _create_short_ttl_cache_policy(self, id, ttl_seconds) -> cloudfront.CachePolicy:
+        # the query strings select the bidders of /info/bidders, no header or cookie changes the responses
+        return cloudfront.CachePolicy(
+            self,
+            id,
+            comment="Short lived cache of read-only Prebid Server endpoints",
+            default_ttl=Duration.seconds(ttl_seconds),
+            max_ttl=Duration.seconds(ttl_seconds),
+            min_ttl=Duration.seconds(0),
+            header_behavior=cloudfront.CacheHeaderBehavior.none(),
+            cookie_behavior=cloudfront.CacheCookieBehavior.none(),
+            query_string_behavior=cloudfront.CacheQueryStringBehavior.all(),
+            enable_accept_encoding_gzip=True,
+            enable_accept_encoding_brotli=True,
+        )
+
+    def _create_function_associations(self) -> list:
+        """
+        This function creates the CloudFront Function that validates auction requests at the edge, when it is enabled
+        """
+        if not globals.CLOUDFRONT_EDGE_VALIDATION_ENABLED:
+            return []
+
+        validate_request_function = cloudfront.Function(
+            self,
+            "ValidateRequestFunction",
+            comment="Rejects malformed Prebid Server auction requests at the edge",
+            code=cloudfront.FunctionCode.from_inline(
+                render_validate_request_function(globals.CLOUDFRONT_EDGE_VALIDATION_RULES)
+            ),
+            runtime=cloudfront.FunctionRuntime.JS_2_0,
+        )
+        return [
+            cloudfront.FunctionAssociation(
+                function=validate_request_function,
+                event_type=cloudfront.FunctionEventType.VIEWER_REQUEST,
+            )
+        ]
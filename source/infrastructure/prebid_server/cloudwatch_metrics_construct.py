@@ -42,6 +42,7 @@ class CloudwatchMetricsConstruct(Construct):
         cloudwatch_statement = PolicyStatement(
             effect=Effect.ALLOW,
             actions=[
+                "cloudwatch:GetMetricData",
                 "cloudwatch:GetMetricStatistics",
                 "cloudwatch:ListMetrics",
                 "cloudwatch:PutMetricData",
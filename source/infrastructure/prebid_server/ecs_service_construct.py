@@ -1,13 +1,19 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-from aws_cdk import Duration
+from aws_cdk import Duration, Fn
+from aws_cdk import aws_applicationautoscaling as appscaling
+from aws_cdk import aws_cloudwatch as cloudwatch
+from aws_cdk import aws_cloudwatch_actions as cloudwatch_actions
 from aws_cdk import aws_ec2 as ec2
 from aws_cdk import aws_ecs as ecs
 from aws_cdk import aws_elasticloadbalancingv2 as elbv2
 from constructs import Construct
 
 import prebid_server.stack_constants as globals
+from .scheduled_scaling_construct import ScheduledScaling
+
+MetricDimension = appscaling.CfnScalingPolicy.TargetTrackingMetricDimensionProperty
 
 
 class ECSServiceConstruct(Construct):
@@ -21,12 +27,15 @@ class ECSServiceConstruct(Construct):
             prebid_task_subnets,
             prebid_container,
             prebid_fs,
+            scaling_parameters=None,
     ) -> None:
         """
         This construct creates EFS resources.
         """
         super().__init__(scope, id)
 
+        self.scaling_parameters = scaling_parameters
+
         fargate_service = ecs.FargateService(
             self,
             "PrebidFargateService",
@@ -44,6 +53,7 @@ class ECSServiceConstruct(Construct):
                 ),
             ],
         )
+        self.fargate_service = fargate_service
 
         self.alb_target_group = elbv2.ApplicationTargetGroup(
             self,
@@ -52,6 +62,9 @@ class ECSServiceConstruct(Construct):
                 container_name=prebid_container.container_name,
                 container_port=prebid_container.container_port)],
             vpc=prebid_vpc,
+            # a new task ramps up to its full share of requests while its JIT compiles the auction path. Slow start
+            # requires the round robin algorithm, ELB rejects it with least outstanding requests.
+            slow_start=Duration.seconds(globals.TARGET_GROUP_SLOW_START_SECS),
         )
 
         # Suppress cfn_guard warning about open egress in the Fargate service security group because Prebid Server containers require open egress in order to connect to demand partners.
@@ -61,6 +74,9 @@ class ECSServiceConstruct(Construct):
             'SuppressedRules': ['EC2_SECURITY_GROUP_EGRESS_OPEN_TO_WORLD_RULE',
                                 'SECURITY_GROUP_EGRESS_ALL_PROTOCOLS_RULE']})
 
+        # Allow the health checks of the ALB, the ingress rule is added once the target group is attached to a listener
+        self.alb_target_group.register_connectable(fargate_service, ec2.Port.tcp(globals.HEALTH_CHECK_PORT))
+
         # Allow traffic to/from EFS
         fargate_service.connections.allow_from(
             prebid_fs, ec2.Port.tcp(globals.EFS_PORT)
@@ -69,9 +85,10 @@ class ECSServiceConstruct(Construct):
             prebid_fs, ec2.Port.tcp(globals.EFS_PORT)
         )
 
-        # Add health check
+        # Add health check, served by health_endpoint.py of the container so it fails until the warm-up has ended
         self.alb_target_group.configure_health_check(
             path=globals.HEALTH_PATH,
+            port=str(globals.HEALTH_CHECK_PORT),
             interval=Duration.seconds(globals.HEALTH_CHECK_INTERVAL_SECS),
             timeout=Duration.seconds(globals.HEALTH_CHECK_TIMEOUT_SECS),
         )
@@ -84,9 +101,136 @@ class ECSServiceConstruct(Construct):
         self.scalable_target.scale_on_cpu_utilization(
             "FargateServiceCpuScaling",
             target_utilization_percent=globals.CPU_TARGET_UTILIZATION_PCT,
+            **self.cooldowns(),
         )
 
         self.scalable_target.scale_on_memory_utilization(
             "FargateServiceMemoryScaling",
             target_utilization_percent=globals.MEMORY_TARGET_UTILIZATION_PCT,
+            **self.cooldowns(),
+        )
+
+    def cooldowns(self) -> dict:
+        """
+        Returns the cooldowns of the target tracking policies, set with the auto scaling stack parameters
+        """
+        if self.scaling_parameters is None:
+            return {}
+        return {
+            "scale_out_cooldown": self.scaling_parameters.scale_out_cooldown,
+            "scale_in_cooldown": self.scaling_parameters.scale_in_cooldown,
+        }
+
+    def scale_on_auction_latency(self) -> None:
+        """
+        Adds target tracking policies on the p99 response time and on the auctions in flight per task, and a step scaling
+        policy for request spikes. The ALB metrics only have data once the target group is attached to a listener.
+        """
+        scalable_target = self.scalable_target.node.find_child("Target")
+        target_group_dimension = MetricDimension(
+            name="TargetGroup", value=self.alb_target_group.target_group_full_name
+        )
+        load_balancer_dimension = MetricDimension(
+            name="LoadBalancer", value=self.alb_target_group.first_load_balancer_full_name
+        )
+        response_time_metric = appscaling.CfnScalingPolicy.TargetTrackingMetricProperty(
+            namespace=globals.CLOUDWATCH_ALARM_NAMESPACE,
+            metric_name="TargetResponseTime",
+            dimensions=[load_balancer_dimension, target_group_dimension],
+        )
+        requests_metric = appscaling.CfnScalingPolicy.TargetTrackingMetricProperty(
+            namespace=globals.CLOUDWATCH_ALARM_NAMESPACE,
+            metric_name="RequestCountPerTarget",
+            dimensions=[target_group_dimension],
+        )
+
+        self._target_tracking_policy(
+            "FargateServiceResponseTimeScaling",
+            scalable_target.scalable_target_id,
+            target_value=self.scaling_parameters.response_time_p99_target_millis,
+            metrics=[
+                metric_stat_query("response_time", response_time_metric, "p99"),
+                expression_query("response_time_millis", "response_time * 1000"),
+            ],
+        )
+
+        # Little's law: the auctions in flight per task are the requests per second per task times the response time
+        self._target_tracking_policy(
+            "FargateServiceInFlightScaling",
+            scalable_target.scalable_target_id,
+            target_value=self.scaling_parameters.in_flight_requests_per_task_target,
+            metrics=[
+                metric_stat_query("requests", requests_metric, "Sum"),
+                metric_stat_query("response_time", response_time_metric, "Average"),
+                expression_query("in_flight", "requests / 60 * response_time"),
+            ],
         )
+
+        # Target tracking adds tasks gradually, a step adds a share of the running tasks at once on request spikes
+        spike_scaling = appscaling.StepScalingAction(
+            self,
+            "FargateServiceSpikeScaling",
+            scaling_target=scalable_target,
+            adjustment_type=appscaling.AdjustmentType.PERCENT_CHANGE_IN_CAPACITY,
+            min_adjustment_magnitude=globals.SPIKE_SCALE_OUT_MIN_TASKS,
+            metric_aggregation_type=appscaling.MetricAggregationType.MAXIMUM,
+            cooldown=self.scaling_parameters.scale_out_cooldown,
+        )
+        spike_scaling.add_adjustment(adjustment=self.scaling_parameters.spike_scale_out_percent, lower_bound=0)
+
+        spike_alarm = cloudwatch.Alarm(
+            self,
+            "FargateServiceSpikeAlarm",
+            metric=self.alb_target_group.metrics.request_count_per_target(period=Duration.minutes(1)),
+            threshold=self.scaling_parameters.spike_requests_per_target,
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_OR_EQUAL_TO_THRESHOLD,
+            evaluation_periods=1,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+        )
+        spike_alarm.add_alarm_action(cloudwatch_actions.ApplicationScalingAction(spike_scaling))
+
+    def scale_on_schedule(self) -> ScheduledScaling:
+        """
+        Adds a daily job that writes the capacity floor of each hour of the week, from the request counts of the
+        previous weeks, as scheduled actions on the scalable target of the service
+        """
+        return ScheduledScaling(self, "ScheduledScaling", self.fargate_service, self.alb_target_group)
+
+    def _target_tracking_policy(self, id, scalable_target_id, target_value, metrics):
+        # metric math and percentiles are only supported by the CloudFormation resource
+        return appscaling.CfnScalingPolicy(
+            self,
+            id,
+            policy_name=id,
+            policy_type="TargetTrackingScaling",
+            scaling_target_id=scalable_target_id,
+            target_tracking_scaling_policy_configuration=appscaling.CfnScalingPolicy.TargetTrackingScalingPolicyConfigurationProperty(
+                target_value=target_value,
+                customized_metric_specification=appscaling.CfnScalingPolicy.CustomizedMetricSpecificationProperty(
+                    metrics=metrics,
+                ),
+                # the response time and in-flight auctions rise with slow bidders while CPU stays low, these policies
+                # only remove tasks when the LatencyScalingScaleIn stack parameter allows it
+                disable_scale_in=Fn.condition_if(
+                    self.scaling_parameters.latency_scale_in_condition.logical_id, False, True
+                ),
+                scale_out_cooldown=self.scaling_parameters.scale_out_cooldown.to_seconds(),
+                scale_in_cooldown=self.scaling_parameters.scale_in_cooldown.to_seconds(),
+            ),
+        )
+
+
+def metric_stat_query(id, metric, stat) -> appscaling.CfnScalingPolicy.TargetTrackingMetricDataQueryProperty:
+    return appscaling.CfnScalingPolicy.TargetTrackingMetricDataQueryProperty(
+        id=id,
+        metric_stat=appscaling.CfnScalingPolicy.TargetTrackingMetricStatProperty(metric=metric, stat=stat),
+        return_data=False,
+    )
+
+
+def expression_query(id, expression) -> appscaling.CfnScalingPolicy.TargetTrackingMetricDataQueryProperty:
+    return appscaling.CfnScalingPolicy.TargetTrackingMetricDataQueryProperty(
+        id=id,
+        expression=expression,
+        return_data=True,
+    )
@@ -1,7 +1,8 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-from aws_cdk import Aws, Duration
+import jsii
+from aws_cdk import Aws, Duration, Fn, IStableAnyProducer, Lazy, Stack
 from aws_cdk import aws_ecs as ecs
 from aws_cdk import aws_logs as logs
 from aws_cdk import aws_iam as iam
@@ -9,6 +10,71 @@ from constructs import Construct
 import prebid_server.stack_constants as globals
 
 
+def jvm_profile_environment() -> dict:
+    """
+    Returns the container environment variables read by entrypoint.sh to size the JVM for the task
+    """
+    environment = {
+        "JVM_PROFILE": globals.JVM_PROFILE,
+        "JVM_GC": globals.JVM_GC,
+        "JVM_HEAP_PERCENTAGE": str(globals.JVM_HEAP_PERCENTAGE),
+        "JVM_MAX_GC_PAUSE_MILLIS": str(globals.JVM_MAX_GC_PAUSE_MILLIS),
+        "JVM_ACTIVE_PROCESSOR_COUNT": str(globals.JVM_ACTIVE_PROCESSOR_COUNT),
+    }
+    return {name: value for name, value in environment.items() if value}
+
+
+def warmup_environment() -> dict:
+    """
+    Returns the container environment variables read by entrypoint.sh to warm up Prebid Server before it reports healthy
+    """
+    return {
+        "WARMUP_ENABLED": str(globals.WARMUP_ENABLED).lower(),
+        "WARMUP_REQUESTS": str(globals.WARMUP_REQUESTS),
+        "WARMUP_CONCURRENCY": str(globals.WARMUP_CONCURRENCY),
+        "WARMUP_TIMEOUT_SECS": str(globals.WARMUP_TIMEOUT_SECS),
+        "WARMUP_PENDING_FILE": globals.WARMUP_PENDING_FILE,
+        "HEALTH_CHECK_PORT": str(globals.HEALTH_CHECK_PORT),
+    }
+
+
+@jsii.implements(IStableAnyProducer)
+class ConditionalContainerDefinitions:
+    def __init__(self, task_definition: ecs.TaskDefinition, container_name: str, condition):
+        """
+        Renders the container definitions of the task definition with the given container, and the dependencies
+        of the other containers on it, only included when the condition holds
+        """
+        self.cfn_task_definition = task_definition.node.default_child
+        self.container_name = container_name
+        self.condition = condition
+
+    def produce(self):
+        # the properties are rendered when the template is synthesized, after every container has been configured
+        properties = self.cfn_task_definition._render_properties(
+            Stack.of(self.cfn_task_definition).resolve(self.cfn_task_definition._cfn_properties)
+        )
+        container_definitions = []
+        for container_definition in properties["ContainerDefinitions"]:
+            if container_definition["Name"] == self.container_name:
+                container_definition = self._condition_if(container_definition)
+            elif "DependsOn" in container_definition:
+                other_dependencies = [
+                    dependency
+                    for dependency in container_definition["DependsOn"]
+                    if dependency["ContainerName"] != self.container_name
+                ]
+                if len(other_dependencies) < len(container_definition["DependsOn"]):
+                    container_definition["DependsOn"] = self._condition_if(
+                        container_definition["DependsOn"], other_dependencies or Aws.NO_VALUE
+                    )
+            container_definitions.append(container_definition)
+        return container_definitions
+
+    def _condition_if(self, value, value_if_false=Aws.NO_VALUE):
+        return Fn.condition_if(self.condition.logical_id, value, value_if_false)
+
+
 class ECSTaskConstruct(Construct):
     def __init__(
             self,
@@ -18,20 +84,33 @@ class ECSTaskConstruct(Construct):
             prebid_fs,
             prebid_fs_access_point,
             docker_configs_manager_bucket,
+            metrics_bucket=None,
+            metrics_streaming=None,
     ) -> None:
         """
         This construct creates EFS resources.
+        When a metrics bucket is given, a sidecar container uploads the metrics archives of the task to it.
+        When metrics streaming is given, a FireLens log router sends the metrics to Firehose. The log router is only
+        part of the task definition when streaming ingestion is selected, so tasks with batch ingestion do not pull
+        its image.
         """
         super().__init__(scope, id)
 
+        # Batch or Streaming, the value of the MetricsIngestion stack parameter
+        self.metrics_ingestion = metrics_streaming.ingestion_mode if metrics_streaming else "Batch"
+
         # Create Task Definition
         self.prebid_task_definition = ecs.FargateTaskDefinition(
             self,
             "PrebidTaskDef",
             cpu=globals.VCPU,
             memory_limit_mib=globals.MEMORY_LIMIT_MIB,
+            ephemeral_storage_gib=globals.EPHEMERAL_STORAGE_GIB,
         )
 
+        # Bind mount on the ephemeral storage of the task to buffer metrics logs before they are shipped
+        self.prebid_task_definition.add_volume(name=globals.METRICS_BUFFER_VOLUME_NAME)
+
         # Add EFS volume to task definition
         self.prebid_task_definition.add_volume(
             name=globals.EFS_VOLUME_NAME,
@@ -104,14 +183,25 @@ class ECSTaskConstruct(Construct):
                 "AMT_ADAPTER_ENABLED": "false",
                 "AMT_BIDDING_SERVER_SIMULATOR_ENDPOINT": "bidder-simulator-endpoint",
                 "ECS_ENABLE_SPOT_INSTANCE_DRAINING": "true",
-                "DOCKER_CONFIGS_S3_BUCKET_NAME": docker_configs_manager_bucket.bucket_name
+                "DOCKER_CONFIGS_S3_BUCKET_NAME": docker_configs_manager_bucket.bucket_name,
+                "METRICS_BUFFER_DIR": globals.METRICS_BUFFER_PATH,
+                "METRICS_BUFFER_MAX_SIZE": f"{globals.METRICS_BUFFER_MAX_SIZE_GB}GB",
+                "METRICS_QUEUE_SIZE": str(globals.METRICS_QUEUE_SIZE),
+                "METRICS_SIDECAR_ENABLED": str(metrics_bucket is not None).lower(),
+                "METRICS_INGESTION": self.metrics_ingestion,
+                **jvm_profile_environment(),
+                **warmup_environment(),
             },
+            stop_timeout=Duration.seconds(globals.CONTAINER_STOP_TIMEOUT_SECS),
+            # unhealthy until the warm-up of entrypoint.sh has ended
             health_check={
                 "command": [
-                    "CMD-SHELL", f"curl -f {globals.HEALTH_ENDPOINT} || exit 1",
+                    "CMD-SHELL",
+                    f"[ ! -f {globals.WARMUP_PENDING_FILE} ] && curl -f {globals.HEALTH_ENDPOINT} || exit 1",
                 ],
                 "interval": Duration.seconds(globals.HEALTH_CHECK_INTERVAL_SECS),
-                "timeout": Duration.seconds(globals.HEALTH_CHECK_TIMEOUT_SECS)
+                "timeout": Duration.seconds(globals.HEALTH_CHECK_TIMEOUT_SECS),
+                "start_period": Duration.seconds(globals.HEALTH_CHECK_START_PERIOD_SECS),
             }
         )
 
@@ -148,7 +238,12 @@ class ECSTaskConstruct(Construct):
                 container_path=globals.EFS_MOUNT_PATH,
                 source_volume=globals.EFS_VOLUME_NAME,
                 read_only=False,
-            )
+            ),
+            ecs.MountPoint(
+                container_path=globals.METRICS_BUFFER_PATH,
+                source_volume=globals.METRICS_BUFFER_VOLUME_NAME,
+                read_only=False,
+            ),
         )
 
         self.prebid_task_definition.add_to_task_role_policy(
@@ -170,3 +265,114 @@ class ECSTaskConstruct(Construct):
                 actions=["ec2:DescribeAvailabilityZones"], resources=["*"]
             )
         )
+
+        if metrics_bucket is not None:
+            self._create_metrics_sidecar(image_ecs_obj, log_driver, metrics_bucket)
+        if metrics_streaming is not None:
+            self._create_metrics_log_router(log_driver, metrics_streaming)
+
+    def _create_metrics_sidecar(self, image_ecs_obj, log_driver, metrics_bucket) -> None:
+        """
+        This function adds a container that uploads the metrics archives from the shared buffer volume to S3
+        """
+        self.metrics_sidecar = self.prebid_task_definition.add_container(
+            "Metrics-Sidecar",
+            image=image_ecs_obj,
+            # archives are only shipped with batch ingestion, the log router streams the metrics otherwise
+            entry_point=[
+                "sh", "-c",
+                'if [ "${METRICS_INGESTION}" != "Streaming" ]; then exec python3 /ship_metrics.py "$@"; fi',
+                "ship_metrics",
+            ],
+            environment={"METRICS_INGESTION": self.metrics_ingestion},
+            command=[
+                "--source", globals.METRICS_BUFFER_PATH,
+                "--destination", f"s3://{metrics_bucket.bucket_name}",
+            ],
+            essential=False,
+            cpu=globals.METRICS_SIDECAR_CPU,
+            memory_reservation_mib=globals.METRICS_SIDECAR_MEMORY_RESERVATION_MIB,
+            logging=log_driver,
+            stop_timeout=Duration.seconds(globals.CONTAINER_STOP_TIMEOUT_SECS),
+        )
+        self.metrics_sidecar.add_mount_points(
+            ecs.MountPoint(
+                container_path=globals.METRICS_BUFFER_PATH,
+                source_volume=globals.METRICS_BUFFER_VOLUME_NAME,
+                read_only=False,
+            ),
+        )
+        # ECS stops containers in the reverse order of their dependencies, so the sidecar ships the last
+        # archives after Prebid Server has stopped writing metrics
+        self.prebid_container.add_container_dependencies(
+            ecs.ContainerDependency(
+                container=self.metrics_sidecar,
+                condition=ecs.ContainerDependencyCondition.START,
+            )
+        )
+
+        # also grants the KMS permissions of multipart uploads to the encrypted bucket
+        metrics_bucket.grant_put(self.prebid_task_definition.task_role)
+
+    def _create_metrics_log_router(self, log_driver, metrics_streaming) -> None:
+        """
+        This function adds a FireLens log router that tails the metrics logs from the shared buffer volume and sends
+        them to the Firehose delivery streams. The container, its mount and the dependency of Prebid Server on it are
+        conditioned on the streaming ingestion.
+        """
+        self.metrics_log_router = self.prebid_task_definition.add_firelens_log_router(
+            "Metrics-LogRouter",
+            image=ecs.ContainerImage.from_registry(globals.FLUENT_BIT_IMAGE),
+            firelens_config=ecs.FirelensConfig(type=ecs.FirelensLogRouterType.FLUENTBIT),
+            essential=False,
+            memory_reservation_mib=globals.LOG_ROUTER_MEMORY_RESERVATION_MIB,
+            logging=log_driver,
+            environment={
+                "METRICS_BUFFER_DIR": globals.METRICS_BUFFER_PATH,
+                "AWS_REGION": Aws.REGION,
+                # configuration files loaded by the init process of the image
+                "aws_fluent_bit_init_s3_1": metrics_streaming.fluent_bit_config_arn,
+                **metrics_streaming.stream_environment(),
+            },
+        )
+        self.metrics_log_router.add_mount_points(
+            ecs.MountPoint(
+                container_path=globals.METRICS_BUFFER_PATH,
+                source_volume=globals.METRICS_BUFFER_VOLUME_NAME,
+                read_only=True,
+            ),
+        )
+        # stopped after Prebid Server, so the log router sends the last metrics before it stops
+        self.prebid_container.add_container_dependencies(
+            ecs.ContainerDependency(
+                container=self.metrics_log_router,
+                condition=ecs.ContainerDependencyCondition.START,
+            )
+        )
+        self.prebid_task_definition.node.default_child.add_property_override(
+            "ContainerDefinitions",
+            Lazy.any(
+                ConditionalContainerDefinitions(
+                    self.prebid_task_definition,
+                    self.metrics_log_router.container_name,
+                    metrics_streaming.condition,
+                )
+            ),
+        )
+
+        self.prebid_task_definition.add_to_task_role_policy(
+            iam.PolicyStatement(
+                actions=["firehose:PutRecordBatch"],
+                resources=metrics_streaming.stream_arns,
+            )
+        )
+        self.prebid_task_definition.add_to_task_role_policy(
+            iam.PolicyStatement(
+                actions=["s3:GetObject", "s3:GetBucketLocation"],
+                resources=[
+                    metrics_streaming.artifacts_bucket.bucket_arn,
+                    metrics_streaming.fluent_bit_config_arn,
+                ],
+            )
+        )
+        metrics_streaming.artifacts_bucket.encryption_key.grant_decrypt(self.prebid_task_definition.task_role)
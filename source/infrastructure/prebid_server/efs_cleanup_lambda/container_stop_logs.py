@@ -7,8 +7,11 @@ This is to capture any log files that may not have the opportunity to go through
 Triggered by EventBridge event STOPPING (SIGTERM) condition is received by the container.
 """
 
-import tarfile
+import gzip
 import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timezone
 from aws_lambda_powertools import Logger
@@ -23,18 +26,25 @@ EFS_METRICS = os.environ["EFS_METRICS"]
 EFS_LOGS = os.environ["EFS_LOGS"]
 METRICS_NAMESPACE = os.environ["METRICS_NAMESPACE"]
 RESOURCE_PREFIX = os.environ["RESOURCE_PREFIX"]
+COMPRESSION_LEVEL = int(os.environ.get("COMPRESSION_LEVEL", "6"))
+
+# Read and compress in 1 MiB chunks so memory use stays flat regardless of the log file size
+CHUNK_SIZE = 1024 * 1024
+MAX_COMPRESSION_WORKERS = 4
+# Rolled fragments modified within this many seconds are still being written or compressed by logback
+SETTLE_SECONDS = 10
 
 logger = Logger(utc=True, service="container-stop-logs")
+metrics_recorder = metrics.Metrics(METRICS_NAMESPACE, RESOURCE_PREFIX, logger)
 
 
+@metrics_recorder.flush_on_exit
 def event_handler(event, _):
     """
     Entry point into the Lambda function to capture and archives the last active log files on container stop
     """
 
-    metrics.Metrics(
-        METRICS_NAMESPACE, RESOURCE_PREFIX, logger
-    ).put_metrics_count_value_1(metric_name="ConatinerStopLogs")
+    metrics_recorder.add_metric(metric_name="ConatinerStopLogs")
 
     detail = event["detail"]
     container_run_id = detail["containers"][0]["runtimeId"].split('-')[0]
@@ -45,7 +55,12 @@ def event_handler(event, _):
     compress_log_file(metrics_log_folder, "prebid-metrics.log")
 
 
-def compress_log_file(log_folder_path: Path, log_file_name: str):
+def compress_log_file(log_folder_path: Path, log_file_name: str, compression_level: int = COMPRESSION_LEVEL):
+    """
+    Compress the active log file and any uncompressed rolled fragments into the archived folder.
+    Each file is written as a plain gzip stream of JSON lines, named like the hourly archives of logback,
+    so the archives can be read directly by the Glue ETL job.
+    """
     archived_folder = create_or_retreive_archived_folder(log_folder_path)
 
     log_file_path = log_folder_path / log_file_name
@@ -53,16 +68,71 @@ def compress_log_file(log_folder_path: Path, log_file_name: str):
         logger.warning(f"{log_file_path} does not exist")
         return
 
+    # Archives follow the logback .%d{yyyy-MM-dd_HH}.%i.log.gz pattern, numbered after the archives already
+    # written for the hour, so repeated stops within the same hour never overwrite each other or a logback archive
     utc_time = datetime.now(timezone.utc)
-    file_to_compress = (
-        archived_folder
-        / f"{log_file_name.split('.')[0]}.{utc_time.year}-{utc_time.month:02d}-{utc_time.day:02d}_{utc_time.hour:02d}.log.gz"
+    archive_prefix = (
+        f"{log_file_name.split('.')[0]}.{utc_time.year}-{utc_time.month:02d}-{utc_time.day:02d}_{utc_time.hour:02d}"
     )
+    first_index = get_next_archive_index(archived_folder, archive_prefix)
+    fragments = [log_file_path] + get_rolled_fragments(log_folder_path, archived_folder, log_file_name)
+    targets = [
+        archived_folder / f"{archive_prefix}.{first_index + index}.log.gz"
+        for index in range(len(fragments))
+    ]
+
+    with ThreadPoolExecutor(max_workers=min(MAX_COMPRESSION_WORKERS, len(fragments))) as executor:
+        results = list(executor.map(
+            lambda source, target: gzip_file(source, target, compression_level), fragments, targets
+        ))
+
+    for source, target in zip(fragments, results):
+        logger.info(f"Log file compressed: {target}")
+        # The active log file is left in place, rolled fragments would otherwise be transferred again uncompressed
+        if source != log_file_path:
+            source.unlink(missing_ok=True)
+
+
+def get_next_archive_index(archived_folder: Path, archive_prefix: str) -> int:
+    """
+    Return the .%i index following the archives, compressed or not, already written for the hour
+    """
+    indexes = [
+        int(archive.name[len(archive_prefix) + 1:].split(".")[0])
+        for archive in archived_folder.glob(f"{archive_prefix}.*.log*")
+        if archive.name[len(archive_prefix) + 1:].split(".")[0].isdigit()
+    ]
+    return max(indexes, default=-1) + 1
 
-    with tarfile.open(file_to_compress, "w:gz") as tar: # NOSONAR
-        tar.add(log_file_path)
 
-    logger.info(f"Log file compressed: {file_to_compress}")
+def get_rolled_fragments(log_folder_path: Path, archived_folder: Path, log_file_name: str) -> list:
+    """
+    Find rolled log fragments that logback had not compressed before the container stopped:
+    renamed files waiting for compression in the log folder and uncompressed .%i files in the archived folder.
+    Fragments that are still changing are left to logback.
+    """
+    now = time.time()
+    # logback compresses a renamed .tmp file into a new archive, the .tmp file is only left over once no archive is
+    # being written any more
+    if any(now - archive.stat().st_mtime < SETTLE_SECONDS for archive in archived_folder.glob("*.log.gz")):
+        pending = []
+    else:
+        pending = sorted(log_folder_path.glob(f"{log_file_name}*.tmp"))
+    uncompressed = sorted(archived_folder.glob(f"{log_file_name.split('.')[0]}.*.log"))
+    return [fragment for fragment in pending + uncompressed if now - fragment.stat().st_mtime >= SETTLE_SECONDS]
+
+
+def gzip_file(source: Path, target: Path, compression_level: int) -> Path:
+    """
+    Stream the source file through a gzip writer into the target file.
+    The archive is written under a temporary name outside the archived folder first, so partial files are never
+    picked up as archives.
+    """
+    partial_target = target.parent.parent / f".{target.name}.partial"
+    with open(source, "rb") as source_file, gzip.open(partial_target, "wb", compresslevel=compression_level) as gzip_output:
+        shutil.copyfileobj(source_file, gzip_output, CHUNK_SIZE)
+    partial_target.replace(target)
+    return target
 
 
 def create_or_retreive_archived_folder(log_folder_path) -> Path:
@@ -7,9 +7,8 @@ It is triggered by EventBridge after a successful DataSync task execution of the
 
 import os
 
-import boto3
-from botocore import config
 from aws_lambda_powertools import Logger
+from aws_solutions.core.helpers import get_service_client
 try:
     from cloudwatch_metrics import metrics
 except ImportError:
@@ -34,25 +33,20 @@ EFS_LOGS = os.environ["EFS_LOGS"]
 DIRECTORY_MAP = {
     METRICS_TASK_ARN: EFS_METRICS
 }
-SOLUTION_VERSION = os.environ["SOLUTION_VERSION"]
-SOLUTION_ID = os.environ["SOLUTION_ID"]
-append_solution_identifier = {
-    "user_agent_extra": f"AwsSolution/{SOLUTION_ID}/{SOLUTION_VERSION}"
-}
-default_config = config.Config(**append_solution_identifier)
-s3_client = boto3.client("s3", config=default_config)
+metrics_recorder = metrics.Metrics(METRICS_NAMESPACE, RESOURCE_PREFIX, logger)
 
+@metrics_recorder.flush_on_exit
 def event_handler(event, _):
     """
     This function is the entry point for the Lambda and handles retrieving transferred S3 object keys and deleting them from the mounted EFS filesystem.
     """
-    metrics.Metrics(METRICS_NAMESPACE, RESOURCE_PREFIX, logger).put_metrics_count_value_1(metric_name="DeleteEfsFiles")
+    metrics_recorder.add_metric(metric_name="DeleteEfsFiles")
     
     object_keys = reports.get_transferred_object_keys(
         event=event, 
         datasync_report_bucket=DATASYNC_REPORT_BUCKET, 
         aws_account_id=AWS_ACCOUNT_ID,
-        s3_client=s3_client
+        s3_client=get_service_client("s3")
     )
 
     # extract the task arn from the task execution arn
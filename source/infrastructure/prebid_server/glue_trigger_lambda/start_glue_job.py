@@ -2,15 +2,16 @@
 # SPDX-License-Identifier: Apache-2.0
 """
 This module is a Lambda function that starts the Metrics ETL Glue Job with a list of object keys to be ingested.
-It is triggered by EventBridge after a successful DataSync task execution of the metrics transfer task.
+It is triggered by EventBridge after a successful DataSync task execution of the metrics transfer task, or by batches of
+S3 Object Created events queued in SQS when the metrics sidecar uploads the archives to S3.
 """
 
 import json
 import os
 
-import boto3
-from botocore import config
 from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
+from aws_solutions.core.helpers import get_service_client
 try:
     from cloudwatch_metrics import metrics
 except ImportError:
@@ -28,32 +29,46 @@ METRICS_NAMESPACE = os.environ['METRICS_NAMESPACE']
 RESOURCE_PREFIX = os.environ['RESOURCE_PREFIX']
 DATASYNC_REPORT_BUCKET = os.environ['DATASYNC_REPORT_BUCKET']
 AWS_ACCOUNT_ID = os.environ["AWS_ACCOUNT_ID"]
-SOLUTION_VERSION = os.environ.get("SOLUTION_VERSION")
-SOLUTION_ID = os.environ.get("SOLUTION_ID")
-append_solution_identifier = {
-    "user_agent_extra": f"AwsSolution/{SOLUTION_ID}/{SOLUTION_VERSION}"
-}
-default_config = config.Config(**append_solution_identifier)
-glue_client = boto3.client("glue", config=default_config)
-s3_client = boto3.client("s3", config=default_config)
+metrics_recorder = metrics.Metrics(METRICS_NAMESPACE, RESOURCE_PREFIX, logger)
+CONCURRENT_RUNS_EXCEEDED = "ConcurrentRunsExceededException"
 
+@metrics_recorder.flush_on_exit
 def event_handler(event, _):
     """
     This function is the entry point for the Lambda and handles retrieving transferred S3 object keys and starting the Glue Job.
+    A batch of SQS messages is reported as failed when the Glue Job already runs its maximum number of concurrent runs,
+    so the messages are retried after the visibility timeout and moved to the dead-letter queue once they are retried too often.
     """
-    metrics.Metrics(METRICS_NAMESPACE, RESOURCE_PREFIX, logger).put_metrics_count_value_1(metric_name="StartGlueJob")
-    
-    object_keys = reports.get_transferred_object_keys(
-        event=event, 
-        datasync_report_bucket=DATASYNC_REPORT_BUCKET, 
-        aws_account_id=AWS_ACCOUNT_ID,
-        s3_client=s3_client
-    )
+    metrics_recorder.add_metric(metric_name="StartGlueJob")
 
+    if "Records" in event:
+        object_keys = get_created_object_keys(event)
+        try:
+            start_glue_job(object_keys)
+        except ClientError as err:
+            if err.response["Error"]["Code"] != CONCURRENT_RUNS_EXCEEDED:
+                raise err
+            logger.warning(f"Glue Job is at its maximum concurrent runs, retrying {len(event['Records'])} messages later")
+            return {"batchItemFailures": [{"itemIdentifier": record["messageId"]} for record in event["Records"]]}
+        return {"batchItemFailures": []}
+    else:
+        object_keys = reports.get_transferred_object_keys(
+            event=event,
+            datasync_report_bucket=DATASYNC_REPORT_BUCKET,
+            aws_account_id=AWS_ACCOUNT_ID,
+            s3_client=get_service_client("s3")
+        )
+        start_glue_job(object_keys)
+
+
+def start_glue_job(object_keys: list) -> None:
+    """
+    This function starts one run of the Glue Job for the object keys
+    """
     if len(object_keys) > 0:
         logger.info(f"{len(object_keys)} new files to process: {object_keys}")
         try:
-            response = glue_client.start_job_run(
+            response = get_service_client("glue").start_job_run(
                 JobName=GLUE_JOB_NAME,
                 Arguments={
                     "--object_keys": json.dumps(object_keys)
@@ -66,4 +81,15 @@ def event_handler(event, _):
             raise err
     else:
         logger.info("No new files to send to Glue.")
-    
+
+
+def get_created_object_keys(event: dict) -> list:
+    """
+    This function returns the object keys of the S3 Object Created events in a batch of SQS messages.
+    A retried upload sends the same key twice, so the keys are deduplicated.
+    """
+    object_keys = set()
+    for record in event["Records"]:
+        s3_event = json.loads(record["body"])
+        object_keys.add(s3_event["detail"]["object"]["key"])
+    return sorted(object_keys)
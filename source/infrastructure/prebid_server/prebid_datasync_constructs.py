@@ -1,7 +1,6 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-import os
 from pathlib import Path
 
 from aws_cdk import Aws, Duration, CustomResource, RemovalPolicy
@@ -16,10 +15,10 @@ from aws_cdk import (
     aws_events_targets as targets,
     aws_logs,
 )
-from aws_cdk.aws_lambda import LayerVersion, Code, Runtime
 from constructs import Construct
 
 from aws_lambda_layers.aws_solutions.layer import SolutionsLayer
+from aws_lambda_layers.metrics_layer.layer import MetricsLayer
 import prebid_server.stack_constants as globals
 from aws_solutions.cdk.aws_lambda.python.function import SolutionsPythonFunction
 from aws_solutions.cdk.aws_lambda.layers.aws_lambda_powertools import PowertoolsLayer
@@ -158,17 +157,7 @@ class EfsCleanup(Construct):
 
     def _create_lamda_layer(self):
         self.powertools_layer = PowertoolsLayer.get_or_create(self)
-        self.metrics_layer = LayerVersion(
-            self,
-            "metrics-layer",
-            code=Code.from_asset(
-                path=os.path.join(
-                    f"{Path(__file__).parents[1]}", "aws_lambda_layers/metrics_layer/"
-                )
-            ),
-            layer_version_name=f"{self._resource_prefix}-metrics-layer",
-            compatible_runtimes=[Runtime.PYTHON_3_11],
-        )
+        self.metrics_layer = MetricsLayer.get_or_create(self)
 
     def _create_security_group(self):
         """
@@ -221,6 +210,7 @@ class EfsCleanup(Construct):
                 "EFS_LOGS": globals.EFS_LOGS,
                 "RESOURCE_PREFIX": Aws.STACK_NAME,
                 "METRICS_NAMESPACE": self.node.try_get_context("METRICS_NAMESPACE"),
+                "COMPRESSION_LEVEL": str(globals.CONTAINER_STOP_LOGS_COMPRESSION_LEVEL),
             },
         )
         self.efs_filesystem.grant_read_write(container_lambda_function.role)
@@ -456,6 +446,8 @@ class EfsCleanup(Construct):
             role=custom_resource_role,
             description="Lambda function for deleting VPC ENIs for the Lambda service",
             memory_size=256,
+            # ENIs of the Lambda service can take several minutes to be released after their functions are deleted
+            timeout=Duration.minutes(15),
             architecture=aws_lambda.Architecture.ARM_64,
             layers=[self.powertools_layer, SolutionsLayer.get_or_create(self)],
             environment={
@@ -0,0 +1,193 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+from aws_cdk import Aws, Aspects, Fn
+from aws_cdk import (
+    aws_iam as iam,
+    aws_kinesisfirehose as firehose,
+)
+from constructs import Construct
+
+from .condition_aspect import ConditionAspect
+from .prebid_glue_constructs import GlueEtl
+import prebid_server.stack_constants as globals
+
+FIREHOSE_SERVICE_PRINCIPAL = "firehose.amazonaws.com"
+# Fluent Bit configuration uploaded to the artifacts bucket from custom_resources/artifacts_bucket_lambda/files
+FLUENT_BIT_CONFIG_KEY = "fluent-bit/metrics-firehose.conf"
+# Delivery stream names are limited to 64 characters
+DELIVERY_STREAM_NAME_MAX_LENGTH = 64
+# The last group of the stack id UUID, 12 hex characters that keep the stream names of each stack unique
+STACK_ID_SUFFIX_LENGTH = 12
+# Column of the Glue tables and the key of the metrics records written by the METRICS appender of prebid-logging.xml
+METRICS_COLUMN_TO_JSON_KEY = {"container_id": "containerId"}
+
+
+def stream_name_prefix(table_name: str) -> str:
+    return f"prebid-metrics-{table_name.lower()}"
+
+
+class MetricsStreaming(Construct):
+    def __init__(
+            self,
+            scope: Construct,
+            id: str,
+            metrics_streaming_condition,
+            metrics_ingestion_param,
+            glue_etl: GlueEtl,
+            artifacts_bucket,
+    ):
+        """
+        This construct creates one Kinesis Data Firehose delivery stream per metric table of the Glue database.
+        Firehose converts the metrics records to Parquet with the schema of the table and writes them to the
+        year_month partition of the table, so the metrics are queryable without running the Glue Job.
+        """
+        super().__init__(scope, id)
+
+        # Apply condition to resources in this construct
+        Aspects.of(self).add(ConditionAspect(self, "Condition", metrics_streaming_condition))
+
+        self.condition = metrics_streaming_condition
+        self.ingestion_mode = metrics_ingestion_param.value_as_string
+        self.glue_etl = glue_etl
+        self.artifacts_bucket = artifacts_bucket
+        self.fluent_bit_config_arn = f"{artifacts_bucket.bucket_arn}/{FLUENT_BIT_CONFIG_KEY}"
+
+        # The names are derived from the stack id, so the containers of both entry deployments can refer to the
+        # streams whether or not they are deployed. The stack name is not used, it can be up to 128 characters long.
+        stack_id_suffix = Fn.select(4, Fn.split("-", Fn.select(2, Fn.split("/", Aws.STACK_ID))))
+        self.stream_names = {
+            table_name: f"{stream_name_prefix(table_name)}-{stack_id_suffix}"
+            for table_name in glue_etl.TABLE_SCHEMA_MAP.keys()
+        }
+        self.stream_arns = [
+            f"arn:{Aws.PARTITION}:firehose:{Aws.REGION}:{Aws.ACCOUNT_ID}:deliverystream/{stream_name}"
+            for stream_name in self.stream_names.values()
+        ]
+
+        self.role = self._create_delivery_role()
+        for table_name, stream_name in self.stream_names.items():
+            self._create_delivery_stream(table_name, stream_name)
+
+    def stream_environment(self) -> dict:
+        """
+        Returns the environment variables read by the Fluent Bit configuration to route each metric type to its stream
+        """
+        return {
+            f"METRICS_STREAM_{table_name.upper()}": stream_name
+            for table_name, stream_name in self.stream_names.items()
+        }
+
+    def _create_delivery_role(self) -> iam.Role:
+        """
+        This function creates the IAM Role assumed by Firehose to read the table schemas and write Parquet files
+        """
+        role = iam.Role(
+            self,
+            "DeliveryRole",
+            assumed_by=iam.ServicePrincipal(FIREHOSE_SERVICE_PRINCIPAL),
+        )
+        glue_resources = [
+            f"arn:aws:glue:{Aws.REGION}:{Aws.ACCOUNT_ID}:table/{self.glue_etl.GLUE_DATABASE_NAME}/{table_name.lower()}"
+            for table_name in self.glue_etl.TABLE_SCHEMA_MAP.keys()
+        ]
+        glue_resources.extend(
+            [
+                f"arn:aws:glue:{Aws.REGION}:{Aws.ACCOUNT_ID}:catalog",
+                f"arn:aws:glue:{Aws.REGION}:{Aws.ACCOUNT_ID}:database/{self.glue_etl.GLUE_DATABASE_NAME}",
+            ]
+        )
+        role.add_to_policy(
+            iam.PolicyStatement(
+                actions=["glue:GetTable", "glue:GetTableVersion", "glue:GetTableVersions"],
+                resources=glue_resources,
+            )
+        )
+        self.glue_etl.output_bucket.grant_read_write(role)
+        return role
+
+    def _create_delivery_stream(self, table_name: str, stream_name: str) -> firehose.CfnDeliveryStream:
+        """
+        This function creates the delivery stream of one metric table
+        """
+        output_bucket = self.glue_etl.output_bucket
+        table = table_name.lower()
+
+        delivery_stream = firehose.CfnDeliveryStream(
+            self,
+            f"{table_name}Stream",
+            delivery_stream_name=stream_name,
+            delivery_stream_type="DirectPut",
+            delivery_stream_encryption_configuration_input=firehose.CfnDeliveryStream.DeliveryStreamEncryptionConfigurationInputProperty(
+                key_type="AWS_OWNED_CMK",
+            ),
+            extended_s3_destination_configuration=firehose.CfnDeliveryStream.ExtendedS3DestinationConfigurationProperty(
+                bucket_arn=output_bucket.bucket_arn,
+                role_arn=self.role.role_arn,
+                # same location as the partitions written by the Glue Job
+                prefix=f"type={table}/year_month=!{{partitionKeyFromQuery:year_month}}/",
+                error_output_prefix=f"firehose-errors/type={table}/!{{firehose:error-output-type}}/",
+                buffering_hints=firehose.CfnDeliveryStream.BufferingHintsProperty(
+                    interval_in_seconds=globals.METRICS_STREAM_BUFFER_INTERVAL_SECS,
+                    size_in_m_bs=globals.METRICS_STREAM_BUFFER_SIZE_MB,
+                ),
+                encryption_configuration=firehose.CfnDeliveryStream.EncryptionConfigurationProperty(
+                    kms_encryption_config=firehose.CfnDeliveryStream.KMSEncryptionConfigProperty(
+                        awskms_key_arn=output_bucket.encryption_key.key_arn,
+                    ),
+                ),
+                dynamic_partitioning_configuration=firehose.CfnDeliveryStream.DynamicPartitioningConfigurationProperty(
+                    enabled=True,
+                ),
+                processing_configuration=firehose.CfnDeliveryStream.ProcessingConfigurationProperty(
+                    enabled=True,
+                    processors=[
+                        firehose.CfnDeliveryStream.ProcessorProperty(
+                            type="MetadataExtraction",
+                            parameters=[
+                                firehose.CfnDeliveryStream.ProcessorParameterProperty(
+                                    parameter_name="MetadataExtractionQuery",
+                                    parameter_value="{year_month: .timestamp[0:7]}",
+                                ),
+                                firehose.CfnDeliveryStream.ProcessorParameterProperty(
+                                    parameter_name="JsonParsingEngine",
+                                    parameter_value="JQ-1.6",
+                                ),
+                            ],
+                        ),
+                    ],
+                ),
+                data_format_conversion_configuration=firehose.CfnDeliveryStream.DataFormatConversionConfigurationProperty(
+                    enabled=True,
+                    input_format_configuration=firehose.CfnDeliveryStream.InputFormatConfigurationProperty(
+                        deserializer=firehose.CfnDeliveryStream.DeserializerProperty(
+                            # reads the JSON numbers of the records as bigint and double values and the UTC
+                            # timestamps as timestamp values
+                            open_x_json_ser_de=firehose.CfnDeliveryStream.OpenXJsonSerDeProperty(
+                                case_insensitive=True,
+                                column_to_json_key_mappings=METRICS_COLUMN_TO_JSON_KEY,
+                            ),
+                        ),
+                    ),
+                    output_format_configuration=firehose.CfnDeliveryStream.OutputFormatConfigurationProperty(
+                        serializer=firehose.CfnDeliveryStream.SerializerProperty(
+                            parquet_ser_de=firehose.CfnDeliveryStream.ParquetSerDeProperty(
+                                compression="GZIP",
+                            ),
+                        ),
+                    ),
+                    schema_configuration=firehose.CfnDeliveryStream.SchemaConfigurationProperty(
+                        catalog_id=Aws.ACCOUNT_ID,
+                        database_name=self.glue_etl.GLUE_DATABASE_NAME,
+                        table_name=table,
+                        region=Aws.REGION,
+                        role_arn=self.role.role_arn,
+                        version_id="LATEST",
+                    ),
+                ),
+            ),
+        )
+        delivery_stream.node.add_dependency(self.role)
+        delivery_stream.node.add_dependency(self.glue_etl)
+
+        return delivery_stream
@@ -1,7 +1,6 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-import os
 import json
 from pathlib import Path
 
@@ -13,13 +12,18 @@ from aws_cdk import (
     aws_kms as kms,
     aws_lambda,
     aws_datasync as datasync,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_sqs as sqs,
+    aws_cloudwatch as cloudwatch,
 )
-from aws_cdk.aws_lambda import LayerVersion, Code, Runtime
+from aws_cdk.aws_lambda_event_sources import SqsEventSource
 from constructs import Construct
 
 from aws_solutions.cdk.aws_lambda.python.function import SolutionsPythonFunction
 from aws_solutions.cdk.aws_lambda.layers.aws_lambda_powertools import PowertoolsLayer
 from aws_lambda_layers.aws_solutions.layer import SolutionsLayer
+from aws_lambda_layers.metrics_layer.layer import MetricsLayer
 from .prebid_artifacts_constructs import ArtifactsManager
 import prebid_server.stack_constants as globals
 
@@ -153,6 +157,8 @@ class GlueEtl(Construct):
         self._create_glue_database()
         self.glue_job = self._create_glue_job()
         self.lambda_function = self._create_glue_job_trigger()
+        if globals.METRICS_SIDECAR_ENABLED:
+            self._create_object_created_trigger()
 
     def _create_source_bucket(self):
         # We initiate this class for the DataSync Metrics Task to
@@ -200,6 +206,8 @@ class GlueEtl(Construct):
             versioned=True,
             enforce_ssl=True,
             object_lock_enabled=True,
+            # the metrics sidecar uploads archives directly to this bucket, their S3 events trigger the Glue Job
+            event_bridge_enabled=globals.METRICS_SIDECAR_ENABLED,
         )
         # For backward compatibility, maintain the bucket's logical ID across solution versions to prevent creation of
         # a new bucket to store Prebid metrics data during stack updates.
@@ -212,17 +220,7 @@ class GlueEtl(Construct):
 
     def _create_lamda_layer(self):
         self.powertools_layer = PowertoolsLayer.get_or_create(self)
-        self.metrics_layer = LayerVersion(
-            self,
-            "metrics-layer",
-            code=Code.from_asset(
-                path=os.path.join(
-                    f"{Path(__file__).parents[1]}", "aws_lambda_layers/metrics_layer/"
-                )
-            ),
-            layer_version_name=f"{self._resource_prefix}-metrics-layer",
-            compatible_runtimes=[Runtime.PYTHON_3_11],
-        )
+        self.metrics_layer = MetricsLayer.get_or_create(self)
 
     def _create_output_bucket(self) -> s3.Bucket:
         """
@@ -307,6 +305,16 @@ class GlueEtl(Construct):
                         glue.CfnTable.ColumnProperty(name="year_month", type="string")
                     ],
                     table_type="EXTERNAL_TABLE",
+                    # partitions are projected, so those written by Firehose can be queried without a repair
+                    parameters={
+                        "projection.enabled": "true",
+                        "projection.year_month.type": "date",
+                        "projection.year_month.format": "yyyy-MM",
+                        "projection.year_month.range": f"{globals.METRICS_PARTITION_PROJECTION_START},NOW",
+                        "projection.year_month.interval": "1",
+                        "projection.year_month.interval.unit": "MONTHS",
+                        "storage.location.template": f"s3://{self.output_bucket.bucket_name}/type={table_name.lower()}/year_month=${{year_month}}/",
+                    },
                     storage_descriptor=glue.CfnTable.StorageDescriptorProperty(
                         columns=table_columns,
                         compressed=True,
@@ -469,7 +477,8 @@ class GlueEtl(Construct):
 
     def _create_glue_job_trigger(self) -> SolutionsPythonFunction:
         """
-        This function creates a Lambda function to trigger the Glue Job when DataSync completes a file transfer task for metrics
+        This function creates a Lambda function to trigger the Glue Job when DataSync completes a file transfer task for metrics,
+        or when the metrics sidecar uploaded metrics archives to the source bucket
         """
         # Create metrics etl lambda for triggering the glue job
         lambda_function = SolutionsPythonFunction(
@@ -554,3 +563,66 @@ class GlueEtl(Construct):
         )
 
         return lambda_function
+
+    def _create_object_created_trigger(self) -> None:
+        """
+        This function queues the S3 Object Created events of metrics archives and triggers the Glue Job once per batch
+        """
+        dead_letter_queue = sqs.Queue(
+            self,
+            "ObjectCreatedDeadLetterQueue",
+            encryption=sqs.QueueEncryption.SQS_MANAGED,
+            enforce_ssl=True,
+            retention_period=Duration.days(globals.METRICS_EVENTS_DLQ_RETENTION_DAYS),
+        )
+        queue = sqs.Queue(
+            self,
+            "ObjectCreatedQueue",
+            encryption=sqs.QueueEncryption.SQS_MANAGED,
+            enforce_ssl=True,
+            # longer than the trigger function timeout, failed batches become visible again once the function gave up
+            visibility_timeout=Duration.minutes(30),
+            retention_period=Duration.days(4),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=globals.METRICS_EVENTS_MAX_RECEIVE_COUNT,
+                queue=dead_letter_queue,
+            ),
+        )
+
+        # the archives of the messages in the dead-letter queue are in the bucket but not in the Glue tables
+        cloudwatch.Alarm(
+            self,
+            "ObjectCreatedDeadLetterAlarm",
+            alarm_description="Metrics archives could not be sent to the Glue Job, see the dead-letter queue",
+            metric=dead_letter_queue.metric_approximate_number_of_messages_visible(period=Duration.minutes(5)),
+            threshold=1,
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_OR_EQUAL_TO_THRESHOLD,
+            evaluation_periods=1,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+        )
+
+        events.Rule(
+            self,
+            "ObjectCreatedRule",
+            description="Queue metrics archives uploaded by the metrics sidecar for the Glue Job",
+            event_pattern=events.EventPattern(
+                source=["aws.s3"],
+                detail_type=["Object Created"],
+                detail={
+                    "bucket": {"name": [self.source_bucket.bucket_name]},
+                    "object": {"key": [{"suffix": ".log.gz"}]},
+                },
+            ),
+            targets=[targets.SqsQueue(queue)],
+        )
+
+        self.lambda_function.add_event_source(
+            SqsEventSource(
+                queue,
+                batch_size=globals.METRICS_EVENTS_BATCH_SIZE,
+                max_batching_window=Duration.seconds(globals.METRICS_EVENTS_BATCH_WINDOW_SECS),
+                # each invocation starts one Glue job run
+                max_concurrency=globals.METRICS_EVENTS_MAX_CONCURRENCY,
+                report_batch_item_failures=True,
+            )
+        )
@@ -2,16 +2,13 @@
 # SPDX-License-Identifier: Apache-2.0
 
 
-import os
-from pathlib import Path
-
 from aws_cdk import CfnCondition, Fn
-from aws_cdk import Aws, CfnParameter
+from aws_cdk import CfnParameter
 from aws_cdk import aws_ecs as ecs
-from aws_cdk.aws_lambda import LayerVersion, Code, Runtime
 from constructs import Construct
 
 from aws_solutions.cdk.stack import SolutionStack
+from aws_lambda_layers.datasync_s3_layer.layer import DataSyncS3Layer
 
 from .prebid_datasync_constructs import DataSyncMonitoring
 from .prebid_artifacts_constructs import ArtifactsManager
@@ -21,6 +18,8 @@ from .alb_entry_deployment import ALBEntryDeployment
 from .vpc_construct import VpcConstruct
 from .container_image_construct import ContainerImageConstruct
 from .prebid_glue_constructs import GlueEtl
+from .prebid_firehose_constructs import MetricsStreaming
+from .autoscaling_parameters_construct import AutoScalingParameters
 from .cloudtrail_construct import CloudTrailConstruct
 
 
@@ -49,10 +48,20 @@ class PrebidServerStack(SolutionStack):
             type="String",
             default=""
         )
+        metrics_ingestion_param = CfnParameter(
+            self,
+            id="MetricsIngestion",
+            description="Batch - Move metrics logs to S3 with EFS and DataSync and transform them with an hourly Glue Job. \n Streaming - Send metrics to Kinesis Data Firehose, which writes them to the Glue tables as Parquet within minutes",
+            type="String",
+            allowed_values=["Batch", "Streaming"],
+            default="Batch"
+        )
         self.solutions_template_options.add_parameter(deploy_cloudfront_and_waf_param, label="",
                                                       group="Content Delivery Network (CDN) Settings")
         self.solutions_template_options.add_parameter(ssl_certificate_param, label="",
                                                       group="Content Delivery Network (CDN) Settings")
+        self.solutions_template_options.add_parameter(metrics_ingestion_param, label="",
+                                                      group="Metrics Settings")
 
         deploy_cloudfront_and_waf_condition = CfnCondition(
             self,
@@ -66,6 +75,14 @@ class PrebidServerStack(SolutionStack):
             expression=Fn.condition_equals(deploy_cloudfront_and_waf_param.value_as_string, "No")
         )
 
+        metrics_streaming_condition = CfnCondition(
+            self,
+            id="MetricsStreamingCondition",
+            expression=Fn.condition_equals(metrics_ingestion_param.value_as_string, "Streaming")
+        )
+
+        scaling_parameters = AutoScalingParameters(self, "AutoScalingParameters", self.solutions_template_options)
+
         container_image_construct = ContainerImageConstruct(self, "ContainerImage", self.solutions_template_options)
 
         # Create artifacts resources for storing solution files
@@ -91,18 +108,7 @@ class PrebidServerStack(SolutionStack):
         )
 
         # Create datasync-s3 layer used by efs_cleanup and glue_trigger lambdas
-        datasync_s3_layer = LayerVersion(
-            self,
-            "DataSyncS3Layer",
-            code=Code.from_asset(
-                path=os.path.join(
-                    f"{Path(__file__).parents[1]}",
-                    "aws_lambda_layers/datasync_s3_layer/",
-                )
-            ),
-            layer_version_name=f"{Aws.STACK_NAME}-datasync-s3-layer",
-            compatible_runtimes=[Runtime.PYTHON_3_11],
-        )
+        datasync_s3_layer = DataSyncS3Layer.get_or_create(self)
 
         # Operational Metrics
         OperationalMetricsConstruct(self, "operational-metrics")
@@ -116,6 +122,16 @@ class PrebidServerStack(SolutionStack):
         )
         glue_etl.lambda_function.add_layers(datasync_s3_layer)
 
+        # Create Firehose resources for streaming ingestion of metrics when it is selected
+        metrics_streaming = MetricsStreaming(
+            self,
+            "MetricsStreaming",
+            metrics_streaming_condition,
+            metrics_ingestion_param,
+            glue_etl=glue_etl,
+            artifacts_bucket=artifacts_construct.bucket,
+        )
+
         # Cloud Trail Logging
         cloudtrail_logging_s3_buckets = [artifacts_construct.bucket, glue_etl.source_bucket, glue_etl.output_bucket, ]
         CloudTrailConstruct(
@@ -137,6 +153,8 @@ class PrebidServerStack(SolutionStack):
             datasync_s3_layer,
             prebid_cluster,
             glue_etl,
+            metrics_streaming=metrics_streaming,
+            scaling_parameters=scaling_parameters,
         )
 
         # Deploy this construct when the user wants to use their own CDN.
@@ -153,4 +171,6 @@ class PrebidServerStack(SolutionStack):
             prebid_cluster,
             datasync_s3_layer,
             glue_etl,
+            metrics_streaming=metrics_streaming,
+            scaling_parameters=scaling_parameters,
         )
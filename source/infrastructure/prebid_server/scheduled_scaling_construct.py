@@ -0,0 +1,134 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+from pathlib import Path
+
+from aws_cdk import Aws, Duration
+from aws_cdk import (
+    aws_ecs as ecs,
+    aws_elasticloadbalancingv2 as elbv2,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_iam as iam,
+    aws_lambda,
+)
+from constructs import Construct
+
+from aws_lambda_layers.aws_solutions.layer import SolutionsLayer
+from aws_lambda_layers.metrics_layer.layer import MetricsLayer
+from aws_solutions.cdk.aws_lambda.layers.aws_lambda_powertools import PowertoolsLayer
+from aws_solutions.cdk.aws_lambda.python.function import SolutionsPythonFunction
+import prebid_server.stack_constants as globals
+
+
+class ScheduledScaling(Construct):
+    def __init__(
+            self,
+            scope: Construct,
+            id: str,
+            fargate_service: ecs.FargateService,
+            alb_target_group: elbv2.ApplicationTargetGroup,
+    ):
+        """
+        This construct creates a Lambda function, run daily, that writes the capacity floor of each hour of the week
+        as scheduled scaling actions of the Prebid Server service. The floors come from the ALB request counts of the
+        previous weeks, so tasks are started and warmed up before the daily and weekly traffic ramps.
+        """
+        super().__init__(scope, id)
+
+        self.fargate_service = fargate_service
+        self.alb_target_group = alb_target_group
+
+        self.function = self._create_lambda_function()
+        self._create_lambda_trigger()
+
+    def _create_lambda_function(self) -> SolutionsPythonFunction:
+        resource_id = f"service/{self.fargate_service.cluster.cluster_name}/{self.fargate_service.service_name}"
+
+        lambda_function = SolutionsPythonFunction(
+            self,
+            "Function",
+            Path(__file__).absolute().parents[0]
+            / "scheduled_scaling_lambda"
+            / "update_scheduled_actions.py",
+            "event_handler",
+            runtime=aws_lambda.Runtime.PYTHON_3_11,
+            description="Lambda function for updating the scheduled scaling actions of the Prebid Server service",
+            memory_size=256,
+            timeout=Duration.minutes(5),
+            architecture=aws_lambda.Architecture.ARM_64,
+            layers=[
+                PowertoolsLayer.get_or_create(self),
+                SolutionsLayer.get_or_create(self),
+                MetricsLayer.get_or_create(self),
+            ],
+            environment={
+                "SOLUTION_ID": self.node.try_get_context("SOLUTION_ID"),
+                "SOLUTION_VERSION": self.node.try_get_context("SOLUTION_VERSION"),
+                "RESOURCE_ID": resource_id,
+                "LOAD_BALANCER_FULL_NAME": self.alb_target_group.first_load_balancer_full_name,
+                "TARGET_GROUP_FULL_NAME": self.alb_target_group.target_group_full_name,
+                "TASK_MIN_CAPACITY": str(globals.TASK_MIN_CAPACITY),
+                "TASK_MAX_CAPACITY": str(globals.TASK_MAX_CAPACITY),
+                "REQUESTS_PER_TARGET": str(globals.REQUESTS_PER_TARGET),
+                "HEADROOM_PCT": str(globals.SCHEDULED_SCALING_HEADROOM_PCT),
+                "LOOKBACK_WEEKS": str(globals.SCHEDULED_SCALING_LOOKBACK_WEEKS),
+                "LEAD_MINUTES": str(globals.SCHEDULED_SCALING_LEAD_MINS),
+                "RESOURCE_PREFIX": Aws.STACK_NAME,
+                "METRICS_NAMESPACE": self.node.try_get_context("METRICS_NAMESPACE"),
+            },
+        )
+        # Suppress the cfn_guard rules indicating that this function should operate within a VPC and have reserved concurrency.
+        # A VPC is not necessary for this function because it does not need to access any resources within a VPC.
+        # Reserved concurrency is not necessary because this function is invoked infrequently.
+        lambda_function.node.find_child(id='Resource').add_metadata("guard", {
+            'SuppressedRules': ['LAMBDA_INSIDE_VPC', 'LAMBDA_CONCURRENCY_CHECK']})
+
+        lambda_policy = iam.Policy(
+            self,
+            "LambdaPolicy",
+            statements=[
+                iam.PolicyStatement(
+                    actions=[
+                        "cloudwatch:PutMetricData",
+                    ],
+                    resources=[
+                        "*"  # NOSONAR
+                    ],
+                    conditions={
+                        "StringEquals": {
+                            "cloudwatch:namespace": self.node.try_get_context(
+                                "METRICS_NAMESPACE"
+                            )
+                        }
+                    },
+                ),
+                # GetMetricData and the Application Auto Scaling APIs do not support resource-level permissions
+                iam.PolicyStatement(
+                    actions=[
+                        "cloudwatch:GetMetricData",
+                        "application-autoscaling:DescribeScheduledActions",
+                        "application-autoscaling:PutScheduledAction",
+                        "application-autoscaling:DeleteScheduledAction",
+                        "application-autoscaling:RegisterScalableTarget",
+                    ],
+                    resources=[
+                        "*"  # NOSONAR
+                    ],
+                ),
+            ],
+        )
+        lambda_function.role.attach_inline_policy(lambda_policy)
+
+        return lambda_function
+
+    def _create_lambda_trigger(self) -> None:
+        """
+        This function creates an EventBridge rule that runs the Lambda function daily
+        """
+        rule = events.Rule(
+            self,
+            "EventBridgeRule",
+            schedule=events.Schedule.expression(globals.SCHEDULED_SCALING_SCHEDULE),
+        )
+        rule.add_target(targets.LambdaFunction(self.function))
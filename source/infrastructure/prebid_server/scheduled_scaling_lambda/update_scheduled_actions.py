@@ -0,0 +1,185 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+This module is a Lambda function that sets a capacity floor for each hour of the week on the Prebid Server service.
+The floor is computed from the peak ALB requests per minute of the same hour in the previous weeks, with headroom, and
+written as ECS scheduled scaling actions that start ahead of the hour, so tasks are warm before the traffic ramps up.
+It is triggered daily by an EventBridge schedule.
+"""
+
+import math
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from aws_lambda_powertools import Logger
+from aws_solutions.core.helpers import get_service_client
+
+try:
+    from cloudwatch_metrics import metrics
+except ImportError:
+    from aws_lambda_layers.metrics_layer.python.cloudwatch_metrics import metrics
+
+RESOURCE_ID = os.environ["RESOURCE_ID"]
+LOAD_BALANCER_FULL_NAME = os.environ["LOAD_BALANCER_FULL_NAME"]
+TARGET_GROUP_FULL_NAME = os.environ["TARGET_GROUP_FULL_NAME"]
+TASK_MIN_CAPACITY = int(os.environ["TASK_MIN_CAPACITY"])
+TASK_MAX_CAPACITY = int(os.environ["TASK_MAX_CAPACITY"])
+REQUESTS_PER_TARGET = int(os.environ["REQUESTS_PER_TARGET"])
+HEADROOM_PCT = int(os.environ.get("HEADROOM_PCT", "25"))
+LOOKBACK_WEEKS = int(os.environ.get("LOOKBACK_WEEKS", "2"))
+LEAD_MINUTES = int(os.environ.get("LEAD_MINUTES", "15"))
+METRICS_NAMESPACE = os.environ["METRICS_NAMESPACE"]
+RESOURCE_PREFIX = os.environ["RESOURCE_PREFIX"]
+
+SERVICE_NAMESPACE = "ecs"
+SCALABLE_DIMENSION = "ecs:service:DesiredCount"
+# only scheduled actions with this prefix are managed by this function
+ACTION_NAME_PREFIX = "prebid-capacity-floor"
+# Monday first, like datetime.weekday()
+CRON_DAYS = ["MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN"]
+HOURS_PER_WEEK = 7 * 24
+PERIOD_SECONDS = 300
+
+logger = Logger(utc=True, service="scheduled-scaling-lambda")
+metrics_recorder = metrics.Metrics(METRICS_NAMESPACE, RESOURCE_PREFIX, logger)
+
+
+@metrics_recorder.flush_on_exit
+def event_handler(_, __):
+    """
+    This function is the entry point for the Lambda and updates the scheduled scaling actions of the service.
+    """
+    metrics_recorder.add_metric(metric_name="UpdateScheduledScaling")
+
+    now = datetime.now(timezone.utc)
+    peaks = get_peak_requests_per_minute(get_service_client("cloudwatch"), now)
+    floors = [capacity_floor(peaks.get(hour_of_week, 0)) for hour_of_week in range(HOURS_PER_WEEK)]
+    logger.info(f"Capacity floors by hour of the week: {floors}")
+
+    autoscaling_client = get_service_client("application-autoscaling")
+    result = update_scheduled_actions(autoscaling_client, build_schedule(floors))
+    if result["updated"] or result["deleted"]:
+        set_current_floor(autoscaling_client, floors, now)
+    return result
+
+
+def get_peak_requests_per_minute(cloudwatch_client, end_time: datetime) -> dict:
+    """
+    Returns the highest requests per minute seen in each hour of the week over the lookback period
+    """
+    paginator = cloudwatch_client.get_paginator("get_metric_data")
+    pages = paginator.paginate(
+        MetricDataQueries=[
+            {
+                "Id": "requests",
+                "MetricStat": {
+                    "Metric": {
+                        "Namespace": "AWS/ApplicationELB",
+                        "MetricName": "RequestCount",
+                        "Dimensions": [
+                            {"Name": "LoadBalancer", "Value": LOAD_BALANCER_FULL_NAME},
+                            {"Name": "TargetGroup", "Value": TARGET_GROUP_FULL_NAME},
+                        ],
+                    },
+                    "Period": PERIOD_SECONDS,
+                    "Stat": "Sum",
+                },
+            }
+        ],
+        StartTime=end_time - timedelta(weeks=LOOKBACK_WEEKS),
+        EndTime=end_time,
+    )
+
+    peaks = defaultdict(float)
+    for page in pages:
+        for result in page["MetricDataResults"]:
+            for timestamp, value in zip(result["Timestamps"], result["Values"]):
+                hour_of_week = timestamp.weekday() * 24 + timestamp.hour
+                peaks[hour_of_week] = max(peaks[hour_of_week], value * 60 / PERIOD_SECONDS)
+    return dict(peaks)
+
+
+def capacity_floor(requests_per_minute: float) -> int:
+    tasks = math.ceil(requests_per_minute * (100 + HEADROOM_PCT) / 100 / REQUESTS_PER_TARGET)
+    return min(max(tasks, TASK_MIN_CAPACITY), TASK_MAX_CAPACITY)
+
+
+def build_schedule(floors: list) -> dict:
+    """
+    Returns the scheduled actions by name. An action is only needed where the floor changes from the previous hour,
+    it starts LEAD_MINUTES before the hour. A constant floor still gets one action, so the floor of the actions it
+    replaces is restored even when it is the minimum capacity.
+    """
+    changes = [hour for hour in range(HOURS_PER_WEEK) if floors[hour] != floors[hour - 1]] or [0]
+
+    schedule = {}
+    for hour_of_week in changes:
+        start_minute = (hour_of_week * 60 - LEAD_MINUTES) % (HOURS_PER_WEEK * 60)
+        day, minute_of_day = divmod(start_minute, 24 * 60)
+        hour, minute = divmod(minute_of_day, 60)
+        name = f"{ACTION_NAME_PREFIX}-{CRON_DAYS[hour_of_week // 24]}-{hour_of_week % 24:02d}"
+        schedule[name] = {
+            "Schedule": f"cron({minute} {hour} ? * {CRON_DAYS[day]} *)",
+            "MinCapacity": floors[hour_of_week],
+        }
+    return schedule
+
+
+def set_current_floor(autoscaling_client, floors: list, now: datetime) -> None:
+    """
+    Sets the minimum capacity of the service to the floor of the current hour. The scheduled actions only apply a
+    floor when the next one starts, until then the service keeps the floor of the last action that ran, which may
+    have been changed or deleted.
+    """
+    starting = now + timedelta(minutes=LEAD_MINUTES)
+    floor = floors[starting.weekday() * 24 + starting.hour]
+    autoscaling_client.register_scalable_target(
+        ServiceNamespace=SERVICE_NAMESPACE,
+        ResourceId=RESOURCE_ID,
+        ScalableDimension=SCALABLE_DIMENSION,
+        MinCapacity=floor,
+    )
+    logger.info(f"Set the minimum capacity to the current floor of {floor} tasks")
+
+
+def update_scheduled_actions(autoscaling_client, schedule: dict) -> dict:
+    """
+    Writes the scheduled actions that are new or changed, and deletes the managed actions that are no longer needed
+    """
+    existing = {}
+    paginator = autoscaling_client.get_paginator("describe_scheduled_actions")
+    for page in paginator.paginate(
+            ServiceNamespace=SERVICE_NAMESPACE, ResourceId=RESOURCE_ID, ScalableDimension=SCALABLE_DIMENSION
+    ):
+        for action in page["ScheduledActions"]:
+            if action["ScheduledActionName"].startswith(ACTION_NAME_PREFIX):
+                existing[action["ScheduledActionName"]] = {
+                    "Schedule": action["Schedule"],
+                    "MinCapacity": action.get("ScalableTargetAction", {}).get("MinCapacity"),
+                }
+
+    deleted = sorted(set(existing) - set(schedule))
+    for name in deleted:
+        autoscaling_client.delete_scheduled_action(
+            ServiceNamespace=SERVICE_NAMESPACE,
+            ScheduledActionName=name,
+            ResourceId=RESOURCE_ID,
+            ScalableDimension=SCALABLE_DIMENSION,
+        )
+
+    updated = sorted(name for name, action in schedule.items() if existing.get(name) != action)
+    for name in updated:
+        autoscaling_client.put_scheduled_action(
+            ServiceNamespace=SERVICE_NAMESPACE,
+            ScheduledActionName=name,
+            ResourceId=RESOURCE_ID,
+            ScalableDimension=SCALABLE_DIMENSION,
+            Schedule=schedule[name]["Schedule"],
+            Timezone="UTC",
+            ScalableTargetAction={"MinCapacity": schedule[name]["MinCapacity"]},
+        )
+
+    logger.info(f"Updated {len(updated)} and deleted {len(deleted)} scheduled actions")
+    return {"updated": updated, "deleted": deleted}
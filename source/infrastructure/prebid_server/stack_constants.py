@@ -18,11 +18,34 @@ CONTAINER_PORT = 8080
 MEMORY_LIMIT_MIB = 4096
 VCPU = 1024
 
+# JVM profile passed to the Prebid Server container, turned into JVM flags by entrypoint.sh
+# "latency" uses G1 with a short pause time goal, "throughput" uses ParallelGC
+JVM_PROFILE = "latency"
+# empty values use the defaults of the profile, JVM_GC is one of G1, ZGC or Parallel
+JVM_GC = ""
+JVM_HEAP_PERCENTAGE = 75
+JVM_MAX_GC_PAUSE_MILLIS = ""
+# 1024 CPU units are one vCPU, the JVM sizes its GC and event loop threads for them
+JVM_ACTIVE_PROCESSOR_COUNT = max(VCPU // 1024, 1)
+
 HEALTH_URL_DOMAIN = "http://localhost:8080"
 HEALTH_PATH = "/status"
 HEALTH_ENDPOINT = HEALTH_URL_DOMAIN + HEALTH_PATH
 HEALTH_CHECK_INTERVAL_SECS = 60
 HEALTH_CHECK_TIMEOUT_SECS = 5
+# port of health_endpoint.py in the Prebid Server container, the ALB health check fails on it until the warm-up has ended
+HEALTH_CHECK_PORT = 8081
+
+# New tasks replay the warm-up corpus of the configuration files before the container health check passes
+WARMUP_ENABLED = True
+WARMUP_REQUESTS = 500
+WARMUP_CONCURRENCY = 4
+WARMUP_TIMEOUT_SECS = 90
+WARMUP_PENDING_FILE = "/tmp/prebid-warming-up"
+# failed container health checks are not counted while Prebid Server starts and warms up
+HEALTH_CHECK_START_PERIOD_SECS = 120
+# new targets receive a linearly increasing share of the requests during slow start, between 30 and 900 seconds
+TARGET_GROUP_SLOW_START_SECS = 120
 
 EFS_VOLUME_NAME = "prebid-efs-volume"
 EFS_PORT = 2049
@@ -30,12 +53,66 @@ EFS_MOUNT_PATH = "/mnt/efs"
 EFS_METRICS = "metrics"
 EFS_LOGS = "logs"
 
+# Metrics are written to the ephemeral storage of the task and shipped to EFS in batches by ship_metrics.py
+EPHEMERAL_STORAGE_GIB = 30
+METRICS_BUFFER_VOLUME_NAME = "prebid-metrics-buffer"
+METRICS_BUFFER_PATH = "/var/tmp/prebid-metrics"
+# half of the ephemeral storage, the rest holds the image layers and the configuration files
+METRICS_BUFFER_MAX_SIZE_GB = EPHEMERAL_STORAGE_GIB // 2
+METRICS_QUEUE_SIZE = 8192
+# time for Prebid Server to stop and for the remaining metrics to be shipped (Fargate allows up to 120 seconds)
+CONTAINER_STOP_TIMEOUT_SECS = 60
+
+# Upload the metrics archives to S3 from a sidecar container of each task instead of moving them through EFS with DataSync.
+# Each upload triggers the metrics ETL through S3 events, the DataSync metrics task and the EFS cleanup are not deployed.
+# The sidecar runs ship_metrics.py from the Prebid Server image of this solution.
+METRICS_SIDECAR_ENABLED = False
+METRICS_SIDECAR_CPU = 64
+METRICS_SIDECAR_MEMORY_RESERVATION_MIB = 128
+# S3 events are batched into one Glue job run per batch, and at most METRICS_EVENTS_MAX_CONCURRENCY batches are
+# processed at once, to stay below GLUE_MAX_CONCURRENT_RUNS
+METRICS_EVENTS_BATCH_SIZE = 1000
+METRICS_EVENTS_BATCH_WINDOW_SECS = 300
+METRICS_EVENTS_MAX_CONCURRENCY = 5
+# a batch that still cannot start a Glue job run after this many receives, 30 minutes apart, moves to the dead-letter
+# queue, which raises an alarm
+METRICS_EVENTS_MAX_RECEIVE_COUNT = 8
+METRICS_EVENTS_DLQ_RETENTION_DAYS = 14
+
+# Streaming metrics ingestion, selected with the MetricsIngestion stack parameter: a FireLens log router tails the metrics
+# log and sends each metric type to a Kinesis Data Firehose delivery stream that writes Parquet to its Glue table
+FLUENT_BIT_IMAGE = "public.ecr.aws/aws-observability/aws-for-fluent-bit:init-2.32.4"
+LOG_ROUTER_MEMORY_RESERVATION_MIB = 128
+# Firehose record format conversion needs a buffer of at least 64 MB
+METRICS_STREAM_BUFFER_SIZE_MB = 128
+METRICS_STREAM_BUFFER_INTERVAL_SECS = 300
+# first month of the year_month partitions projected for the metrics tables
+METRICS_PARTITION_PROJECTION_START = "2024-01"
+
+# gzip level used when archiving the active metrics log on container stop (1 fastest - 9 smallest)
+CONTAINER_STOP_LOGS_COMPRESSION_LEVEL = 6
+
 # Configure for container autoscaling
 CPU_TARGET_UTILIZATION_PCT = 66
 MEMORY_TARGET_UTILIZATION_PCT = 50
 REQUESTS_PER_TARGET = 5000
 TASK_MIN_CAPACITY = 2
 TASK_MAX_CAPACITY = 300
+# Defaults of the auto scaling stack parameters
+SCALE_OUT_COOLDOWN_SECS = 60
+SCALE_IN_COOLDOWN_SECS = 300
+# below the default auction timeout of Prebid Server, so tasks are added before auctions time out
+RESPONSE_TIME_P99_TARGET_MILLIS = 800
+IN_FLIGHT_REQUESTS_PER_TASK_TARGET = 40
+SPIKE_REQUESTS_PER_TARGET = REQUESTS_PER_TARGET * 2
+SPIKE_SCALE_OUT_PCT = 50
+SPIKE_SCALE_OUT_MIN_TASKS = 2
+# Capacity floor of each hour of the week, from the peak requests of the same hour in the previous weeks
+SCHEDULED_SCALING_SCHEDULE = "cron(45 23 * * ? *)"  # daily, before the first action of the next day
+SCHEDULED_SCALING_HEADROOM_PCT = 25
+SCHEDULED_SCALING_LOOKBACK_WEEKS = 2
+# tasks are started ahead of the hour so the JVM is warm when the traffic arrives
+SCHEDULED_SCALING_LEAD_MINS = 15
 
 FARGATE_RESERVED_WEIGHT = 1
 FARGATE_SPOT_WEIGHT = 1
@@ -51,6 +128,42 @@ GLUE_ATHENA_OUTPUT_LIFECYCLE_DAYS = 1
 # CloudFront managed headers policy CORS-with-preflight-and-SecurityHeadersPolicy
 RESPONSE_HEADERS_POLICY_ID = "eaab4381-ed33-4a86-88ca-d9558dc6cd63"
 
+# Read-only endpoints whose responses CloudFront caches, the bidder list and params only change with a deployment
+CLOUDFRONT_INFO_PATHS = ["/info/bidders*", "/bidders/params"]
+CLOUDFRONT_INFO_CACHE_TTL_SECS = 300
+CLOUDFRONT_STATUS_CACHE_TTL_SECS = 5
+# Auction endpoints only receive the viewer headers and cookies Prebid Server reads, all query strings are forwarded
+CLOUDFRONT_AUCTION_PATH = "/openrtb2/*"
+CLOUDFRONT_AUCTION_HEADERS = ["User-Agent", "Referer", "Origin", "Accept-Language", "DNT", "Sec-GPC"]
+CLOUDFRONT_AUCTION_COOKIES = ["uids"]
+# Auction responses are never cached, the 1 second maximum TTL only allows CloudFront to compress them
+CLOUDFRONT_AUCTION_MAX_TTL_SECS = 1
+# Rate-based rules of the CloudFront web ACL, updated in place on stack updates. A client that sends more auction
+# requests than the limit within the evaluation window (60, 120, 300 or 600 seconds) is blocked, 0 disables a rule.
+WAF_RATE_LIMIT_WINDOW_SECS = 300
+# the per-IP limit only counts requests without WAF_RATE_LIMIT_FORWARDED_IP_HEADER, such as those of browsers and apps
+WAF_RATE_LIMIT_PER_IP = 20000
+# publisher servers that call Prebid Server on behalf of their users are limited on the client address they forward,
+# and are not counted by the per-IP limit while this rule is enabled
+WAF_RATE_LIMIT_FORWARDED_IP_HEADER = "X-Forwarded-For"
+WAF_RATE_LIMIT_PER_FORWARDED_IP = 2000
+WAF_RATE_LIMITED_PATHS = ["/openrtb2/"]
+# the common and SQL injection rule sets do not inspect these read-only endpoints
+WAF_UNINSPECTED_PATHS = [HEALTH_PATH, "/info/bidders", "/bidders/params"]
+
+# Optional CloudFront Function that rejects requests breaking the rules of their path at the edge, see
+# cloudfront_functions/validate_request.js. Prebid.js sends auctions as text/plain to avoid CORS preflight requests.
+CLOUDFRONT_EDGE_VALIDATION_ENABLED = False
+CLOUDFRONT_EDGE_VALIDATION_RULES = {
+    "/openrtb2/auction": {
+        "methods": ["POST", "OPTIONS"],
+        "content_types": ["application/json", "text/plain"],
+        "max_body_bytes": 256 * 1024,
+        "required_query_strings": [],
+        "required_headers": [],
+    },
+}
+
 CLOUDWATCH_ALARM_TYPE = "AWS::CloudWatch::Alarm"
 CLOUDWATCH_ALARM_NAMESPACE = "AWS/ApplicationELB"
 
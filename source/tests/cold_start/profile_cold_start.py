@@ -0,0 +1,382 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+###############################################################################
+# PURPOSE:
+#   * Measure the cold start cost of every solution Lambda handler module.
+#   * Each handler is imported in a clean interpreter with the same module layout
+#     as the deployed function and its layers, and with stubbed environment variables.
+#   * The handler is then called once with a stub event, with AWS API calls and custom
+#     resource responses stubbed, to measure the lazy initialization paid by the first call.
+#   * Reports interpreter start up, handler module import time, time to the end of the first
+#     handler call and the most expensive imports reported by -X importtime.
+# USAGE:
+#   python profile_cold_start.py [--runs 5] [--top 10] [--output cold-start-report.json] [--function NAME]
+###############################################################################
+
+import argparse
+import json
+import os
+import statistics
+import subprocess  # nosec
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+SOURCE_DIR = Path(__file__).resolve().parents[2]
+INFRASTRUCTURE_DIR = SOURCE_DIR / "infrastructure"
+CUSTOM_RESOURCES_DIR = INFRASTRUCTURE_DIR / "custom_resources"
+PREBID_SERVER_DIR = INFRASTRUCTURE_DIR / "prebid_server"
+
+# Lambda layers are extracted under /opt/python, these are their source equivalents
+LAYER_PATHS = {
+    "solutions": SOURCE_DIR / "cdk_solution_helper_py" / "helpers_common",
+    "metrics": INFRASTRUCTURE_DIR / "aws_lambda_layers" / "metrics_layer" / "python",
+    "datasync_reports": INFRASTRUCTURE_DIR / "aws_lambda_layers" / "datasync_s3_layer" / "python",
+}
+
+COMMON_ENVIRONMENT = {
+    "AWS_REGION": "us-east-1",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",  # nosec
+    "AWS_LAMBDA_FUNCTION_NAME": "cold-start-profile",
+    "SOLUTION_ID": "SO0248",
+    "SOLUTION_VERSION": "v0.0.0",
+    "METRICS_NAMESPACE": "cold-start-profile",
+    "RESOURCE_PREFIX": "cold-start-profile",
+    "STACK_NAME": "cold-start-profile",
+    "POWERTOOLS_TRACE_DISABLED": "1",
+}
+
+# EFS_MOUNT_PATH is set to a temporary directory for each run, so the first handler call never writes outside of it
+EFS_ENVIRONMENT = {
+    "EFS_METRICS": "metrics",
+    "EFS_LOGS": "logs",
+}
+
+# Custom resources are profiled on stack creation, delete handlers wait for resources to be released
+CUSTOM_RESOURCE_EVENT = {
+    "RequestType": "Create",
+    "StackId": "arn:aws:cloudformation:us-east-1:111111111111:stack/cold-start-profile/id",
+    "RequestId": "cold-start-profile",
+    "LogicalResourceId": "ColdStartProfile",
+    "ResponseURL": "https://cloudformation-custom-resource-response.example.com/cold-start-profile",
+    "ResourceProperties": {},
+}
+DATASYNC_EVENT = {
+    "resources": ["arn:aws:datasync:us-east-1:111111111111:task/task-0/execution/exec-0"],
+    "detail": {"State": "SUCCESS"},
+}
+
+# function name -> handler file, handler function, layers, function specific environment and stub event
+FUNCTIONS = {
+    "ContainerStopLogs": {
+        "path": PREBID_SERVER_DIR / "efs_cleanup_lambda" / "container_stop_logs.py",
+        "handler": "event_handler",
+        "layers": ["solutions", "metrics"],
+        "environment": {**EFS_ENVIRONMENT, "COMPRESSION_LEVEL": "6"},
+        "event": {"detail": {"containers": [{"runtimeId": "container-0"}], "lastStatus": "STOPPING"}},
+    },
+    "DeleteEfsFiles": {
+        "path": PREBID_SERVER_DIR / "efs_cleanup_lambda" / "delete_efs_files.py",
+        "handler": "event_handler",
+        "layers": ["solutions", "metrics", "datasync_reports"],
+        "environment": {
+            **EFS_ENVIRONMENT,
+            "METRICS_TASK_ARN": "arn:aws:datasync:us-east-1:111111111111:task/task-0",
+            "DATASYNC_REPORT_BUCKET": "report-bucket",
+            "AWS_ACCOUNT_ID": "111111111111",
+        },
+        "event": DATASYNC_EVENT,
+    },
+    "StartGlueJob": {
+        "path": PREBID_SERVER_DIR / "glue_trigger_lambda" / "start_glue_job.py",
+        "handler": "event_handler",
+        "layers": ["solutions", "metrics", "datasync_reports"],
+        "environment": {
+            "GLUE_JOB_NAME": "glue-job",
+            "DATASYNC_REPORT_BUCKET": "report-bucket",
+            "AWS_ACCOUNT_ID": "111111111111",
+        },
+        "event": DATASYNC_EVENT,
+    },
+    "ScheduledScaling": {
+        "path": PREBID_SERVER_DIR / "scheduled_scaling_lambda" / "update_scheduled_actions.py",
+        "handler": "event_handler",
+        "layers": ["solutions", "metrics"],
+        "environment": {
+            "RESOURCE_ID": "service/cluster/service",
+            "LOAD_BALANCER_FULL_NAME": "app/load-balancer/0",
+            "TARGET_GROUP_FULL_NAME": "targetgroup/target-group/0",
+            "TASK_MIN_CAPACITY": "2",
+            "TASK_MAX_CAPACITY": "10",
+            "REQUESTS_PER_TARGET": "1000",
+        },
+        "event": {},
+    },
+    "CloudwatchMetricsReport": {
+        "path": CUSTOM_RESOURCES_DIR / "cloudwatch_metrics" / "cloudwatch_metrics_report.py",
+        "handler": "event_handler",
+        "layers": ["solutions"],
+        "environment": {"SEND_ANONYMIZED_DATA": "Yes"},
+        "event": {},
+    },
+    "ArtifactsUpload": {
+        "path": CUSTOM_RESOURCES_DIR / "artifacts_bucket_lambda" / "upload_files.py",
+        "handler": "event_handler",
+        "layers": ["solutions"],
+        "environment": {},
+        "event": CUSTOM_RESOURCE_EVENT,
+    },
+    "DockerConfigsUpload": {
+        "path": CUSTOM_RESOURCES_DIR / "docker_configs_bucket_lambda" / "upload_docker_config.py",
+        "handler": "event_handler",
+        "layers": ["solutions"],
+        "environment": {},
+        "event": CUSTOM_RESOURCE_EVENT,
+    },
+    "EnableAccessLogs": {
+        "path": CUSTOM_RESOURCES_DIR / "enable_access_logs" / "enable_access_logs.py",
+        "handler": "event_handler",
+        "layers": ["solutions"],
+        "environment": {},
+        "event": CUSTOM_RESOURCE_EVENT,
+    },
+    "HeaderSecretGen": {
+        "path": CUSTOM_RESOURCES_DIR / "header_secret_lambda" / "header_secret_gen.py",
+        "handler": "event_handler",
+        "layers": ["solutions"],
+        "environment": {},
+        "event": CUSTOM_RESOURCE_EVENT,
+    },
+    "OperationalMetrics": {
+        "path": CUSTOM_RESOURCES_DIR / "operational_metrics" / "ops_metrics.py",
+        "handler": "event_handler",
+        "layers": ["solutions"],
+        "environment": {},
+        "event": CUSTOM_RESOURCE_EVENT,
+    },
+    "GetPrefixId": {
+        "path": CUSTOM_RESOURCES_DIR / "prefix_id_lambda" / "get_prefix_id.py",
+        "handler": "event_handler",
+        "layers": ["solutions"],
+        "environment": {},
+        "event": CUSTOM_RESOURCE_EVENT,
+    },
+    "DeleteLambdaEni": {
+        "path": CUSTOM_RESOURCES_DIR / "vpc_eni_lambda" / "delete_lambda_eni.py",
+        "handler": "event_handler",
+        "layers": ["solutions"],
+        "environment": {},
+        "event": CUSTOM_RESOURCE_EVENT,
+    },
+    "CreateWafWebAcl": {
+        "path": CUSTOM_RESOURCES_DIR / "waf_webacl_lambda" / "create_waf_webacl.py",
+        "handler": "event_handler",
+        "layers": ["solutions"],
+        "environment": {},
+        "event": CUSTOM_RESOURCE_EVENT,
+    },
+    "DeleteWafWebAcl": {
+        "path": CUSTOM_RESOURCES_DIR / "waf_webacl_lambda" / "delete_waf_webacl.py",
+        "handler": "event_handler",
+        "layers": ["solutions"],
+        "environment": {},
+        "event": CUSTOM_RESOURCE_EVENT,
+    },
+}
+
+# Runs inside the clean interpreter, timings are measured from the start of the handler module import.
+# AWS API calls and custom resource responses are stubbed when the modules making them are first imported, so the
+# stubs never import anything ahead of the handler. The first call may fail on the stubbed responses, its error is
+# reported and the time spent until then is still measured.
+BOOTSTRAP = """
+import importlib.util, json, sys, time
+
+
+def stub_botocore(module):
+    module.BaseClient._make_api_call = lambda self, operation_name, api_params: {}
+
+
+def stub_http_client(module):
+    module.HTTPSConnection.request = lambda self, *args, **kwargs: None
+    module.HTTPSConnection.getresponse = lambda self: type("Response", (), {"status": 200, "reason": "OK"})()
+
+
+def stub_requests(module):
+    response = type("Response", (), {"status_code": 200, "ok": True, "json": lambda self: {}})
+    for method in ("get", "post", "put", "request"):
+        setattr(module, method, lambda *args, **kwargs: response())
+
+
+STUBS = {"botocore.client": stub_botocore, "http.client": stub_http_client, "requests": stub_requests}
+
+
+class StubOnImport:
+    def find_spec(self, name, path=None, target=None):
+        if name not in STUBS:
+            return None
+        sys.meta_path.remove(self)
+        try:
+            spec = importlib.util.find_spec(name)
+        finally:
+            sys.meta_path.insert(0, self)
+        exec_module = spec.loader.exec_module
+
+        def exec_and_stub(module):
+            exec_module(module)
+            STUBS[name](module)
+
+        spec.loader.exec_module = exec_and_stub
+        return spec
+
+
+class Context:
+    function_name = "cold-start-profile"
+    aws_request_id = "cold-start-profile"
+    invoked_function_arn = "arn:aws:lambda:us-east-1:111111111111:function:cold-start-profile"
+    memory_limit_in_mb = 128
+    log_group_name = "/aws/lambda/cold-start-profile"
+    log_stream_name = "cold-start-profile"
+
+    def get_remaining_time_in_millis(self):
+        return 300000
+
+
+for name in [name for name in STUBS if name in sys.modules]:
+    STUBS[name](sys.modules[name])
+sys.meta_path.insert(0, StubOnImport())
+
+started = time.perf_counter_ns()
+module = importlib.import_module(sys.argv[1])
+imported = time.perf_counter_ns()
+handler = getattr(module, sys.argv[2])
+error = None
+try:
+    handler(json.loads(sys.argv[3]), Context())
+except BaseException as err:
+    error = type(err).__name__
+called = time.perf_counter_ns()
+print(json.dumps({"import_ns": imported - started, "first_call_ns": called - started, "error": error}))
+"""
+
+# a first call that takes longer most likely waits on a stubbed response
+FIRST_CALL_TIMEOUT_SECS = 120
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Parse `-X importtime` output into a list of {module, self_us, cumulative_us}.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        imports.append(
+            {
+                "module": module.strip(),
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+            }
+        )
+    return imports
+
+
+def profile_function(name: str, function: dict) -> dict:
+    """
+    Import the handler module in a fresh interpreter and return the timings of that cold start.
+    """
+    handler_path = function["path"]
+    python_path = [str(handler_path.parent)] + [str(LAYER_PATHS[layer]) for layer in function["layers"]]
+    with tempfile.TemporaryDirectory() as efs_mount_path:
+        environment = {
+            "PATH": os.environ.get("PATH", ""),
+            "PYTHONPATH": os.pathsep.join(python_path),
+            "PYTHONDONTWRITEBYTECODE": "1",
+            "EFS_MOUNT_PATH": efs_mount_path,
+            **COMMON_ENVIRONMENT,
+            **function["environment"],
+        }
+        command = [
+            sys.executable, "-X", "importtime", "-c", BOOTSTRAP,
+            handler_path.stem, function["handler"], json.dumps(function["event"]),
+        ]
+
+        started = time.perf_counter_ns()
+        result = subprocess.run(  # nosec
+            command,
+            cwd=handler_path.parent,
+            env=environment,
+            capture_output=True,
+            text=True,
+            check=False,
+            timeout=FIRST_CALL_TIMEOUT_SECS,
+        )
+        finished = time.perf_counter_ns()
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to import {name} handler {handler_path}:\n{result.stderr}")
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(result.stderr)
+    return {
+        "total_ms": (finished - started) / 1e6,
+        "import_ms": timings["import_ns"] / 1e6,
+        "first_call_ms": timings["first_call_ns"] / 1e6,
+        "first_call_error": timings["error"],
+        "imports": imports,
+    }
+
+
+def summarize(name: str, runs: list, top: int) -> dict:
+    """
+    Reduce several cold start runs of a function to medians and the most expensive imports of the first run.
+    """
+    top_imports = sorted(runs[0]["imports"], key=lambda item: item["cumulative_us"], reverse=True)
+    return {
+        "function": name,
+        "runs": len(runs),
+        "process_total_ms": round(statistics.median(run["total_ms"] for run in runs), 2),
+        "handler_import_ms": round(statistics.median(run["import_ms"] for run in runs), 2),
+        "time_to_first_call_ms": round(statistics.median(run["first_call_ms"] for run in runs), 2),
+        "first_call_error": runs[0]["first_call_error"],
+        "module_count": len(runs[0]["imports"]),
+        "top_imports": top_imports[:top],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the cold start of the solution Lambda handlers.")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per function, medians are reported")
+    parser.add_argument("--top", type=int, default=10, help="Number of most expensive imports to report")
+    parser.add_argument("--function", action="append", choices=sorted(FUNCTIONS), help="Profile only these functions")
+    parser.add_argument("--output", type=Path, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "python": sys.version.split()[0],
+        "functions": [],
+    }
+    for name in args.function or sorted(FUNCTIONS):
+        runs = [profile_function(name, FUNCTIONS[name]) for _ in range(args.runs)]
+        report["functions"].append(summarize(name, runs, args.top))
+
+    print(f"{'Function':<26}{'Process ms':>12}{'Import ms':>12}{'1st call ms':>12}{'Modules':>10}  Slowest import")
+    for summary in report["functions"]:
+        slowest = summary["top_imports"][0] if summary["top_imports"] else {"module": "", "cumulative_us": 0}
+        print(
+            f"{summary['function']:<26}{summary['process_total_ms']:>12.1f}{summary['handler_import_ms']:>12.1f}"
+            f"{summary['time_to_first_call_ms']:>12.1f}{summary['module_count']:>10}"
+            f"  {slowest['module']} ({slowest['cumulative_us'] / 1000:.1f} ms)"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
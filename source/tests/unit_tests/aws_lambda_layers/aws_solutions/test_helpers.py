@@ -0,0 +1,52 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+# ###############################################################################
+# PURPOSE:
+#   * Unit test for the boto3 client pool in aws_solutions.core.helpers.
+# USAGE:
+#   ./run-unit-tests.sh --test-file-name aws_lambda_layers/aws_solutions/test_helpers.py
+###############################################################################
+
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.config import Config
+
+
+def test_get_service_client_keyed_by_region_and_config():
+    from aws_solutions.core.helpers import get_service_client
+
+    default_client = get_service_client("s3")
+    assert get_service_client("s3") is default_client
+    assert get_service_client("s3", region_name="us-east-1") is default_client
+
+    # alternating regions no longer rebuild the cached client
+    west_client = get_service_client("s3", region_name="us-west-2")
+    assert west_client is not default_client
+    assert west_client.meta.region_name == "us-west-2"
+    assert get_service_client("s3") is default_client
+    assert get_service_client("s3", region_name="us-west-2") is west_client
+
+    tuned_client = get_service_client("s3", config=Config(read_timeout=5))
+    assert tuned_client is not default_client
+    assert get_service_client("s3", config=Config(read_timeout=5)) is tuned_client
+    assert tuned_client.meta.config.read_timeout == 5
+
+
+def test_get_service_client_defaults():
+    from aws_solutions.core.helpers import get_service_client
+    from aws_solutions.core.config import MAX_POOL_CONNECTIONS
+
+    client_config = get_service_client("cloudwatch").meta.config
+    assert client_config.max_pool_connections == MAX_POOL_CONNECTIONS
+    assert client_config.retries["mode"] == "adaptive"
+    assert "AwsSolution/" in client_config.user_agent_extra
+
+
+def test_get_service_client_thread_safe():
+    from aws_solutions.core.helpers import set_session, get_service_client
+
+    set_session()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(lambda _: get_service_client("sqs"), range(32)))
+
+    assert all(client is clients[0] for client in clients)
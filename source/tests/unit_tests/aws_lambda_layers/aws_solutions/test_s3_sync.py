@@ -0,0 +1,101 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+# ###############################################################################
+# PURPOSE:
+#   * Unit test for the custom resource directory sync in aws_solutions.core.s3_sync.
+# USAGE:
+#   ./run-unit-tests.sh --test-file-name aws_lambda_layers/aws_solutions/test_s3_sync.py
+###############################################################################
+
+import os
+from unittest.mock import patch
+
+import boto3
+import pytest
+from moto import mock_aws
+
+BUCKET_NAME = "test-configs-bucket"
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    (tmp_path / "README.md").write_text("readme")
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "prebid-config.yaml").write_text("adapters: {}")
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "__pycache__" / "module.cpython-311.pyc").write_bytes(b"pyc")
+    return tmp_path
+
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        from aws_solutions.core.helpers import set_session
+
+        set_session()
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        s3_client.create_bucket(Bucket=BUCKET_NAME)
+        yield s3_client
+
+
+def keys(s3_client):
+    return sorted(s3_object["Key"] for s3_object in s3_client.list_objects_v2(Bucket=BUCKET_NAME).get("Contents", []))
+
+
+@patch.dict(os.environ, {"AWS_REGION": "us-east-1"})
+def test_sync_directory_uploads_only_changed_files(s3, config_dir):
+    from aws_solutions.core.s3_sync import sync_directory, CONTENT_MD5_METADATA, MANAGED_METADATA, file_md5
+
+    result = sync_directory(BUCKET_NAME, str(config_dir), "/prebid-server/current/")
+    assert result["uploaded"] == ["prebid-server/current/README.md", "prebid-server/current/nested/prebid-config.yaml"]
+    assert result["unchanged"] == []
+    assert keys(s3) == result["uploaded"]
+
+    metadata = s3.head_object(Bucket=BUCKET_NAME, Key="prebid-server/current/README.md")["Metadata"]
+    assert metadata == {MANAGED_METADATA: "true", CONTENT_MD5_METADATA: file_md5(config_dir / "README.md")}
+
+    (config_dir / "README.md").write_text("updated readme")
+    result = sync_directory(BUCKET_NAME, str(config_dir), "prebid-server/current")
+    assert result["uploaded"] == ["prebid-server/current/README.md"]
+    assert result["unchanged"] == ["prebid-server/current/nested/prebid-config.yaml"]
+    assert s3.get_object(Bucket=BUCKET_NAME, Key="prebid-server/current/README.md")["Body"].read() == b"updated readme"
+
+
+@patch.dict(os.environ, {"AWS_REGION": "us-east-1"})
+def test_sync_directory_compares_stored_md5(s3, config_dir):
+    from aws_solutions.core.s3_sync import sync_directory
+
+    sync_directory(BUCKET_NAME, str(config_dir), "prebid-server/current")
+
+    # ETags of SSE-KMS encrypted objects are not MD5s, the stored MD5 is used instead
+    with patch("aws_solutions.core.s3_sync._remote_objects") as remote_objects:
+        remote_objects.return_value = {
+            "prebid-server/current/README.md": ("not-an-md5", len("readme")),
+            "prebid-server/current/nested/prebid-config.yaml": ("not-an-md5", len("adapters: {}")),
+        }
+        result = sync_directory(BUCKET_NAME, str(config_dir), "prebid-server/current")
+
+    assert result["uploaded"] == []
+    assert len(result["unchanged"]) == 2
+
+
+@patch.dict(os.environ, {"AWS_REGION": "us-east-1"})
+def test_sync_directory_deletes_only_managed_orphans(s3, config_dir):
+    from aws_solutions.core.s3_sync import sync_directory
+
+    sync_directory(BUCKET_NAME, str(config_dir), "prebid-server/current")
+    s3.put_object(Bucket=BUCKET_NAME, Key="prebid-server/current/user-config.yaml", Body=b"user")
+    s3.put_object(Bucket=BUCKET_NAME, Key="prebid-server/default/README.md", Body=b"other prefix")
+    (config_dir / "nested" / "prebid-config.yaml").unlink()
+
+    result = sync_directory(BUCKET_NAME, str(config_dir), "prebid-server/current")
+
+    assert result["deleted"] == ["prebid-server/current/nested/prebid-config.yaml"]
+    assert keys(s3) == [
+        "prebid-server/current/README.md",
+        "prebid-server/current/user-config.yaml",
+        "prebid-server/default/README.md",
+    ]
+
+    result = sync_directory(BUCKET_NAME, str(config_dir), "prebid-server/current", delete_orphans=False)
+    assert result["deleted"] == []
@@ -8,8 +8,10 @@
 ###############################################################################
 
 
+import json
 import boto3
 import logging
+from unittest.mock import patch
 from moto import mock_aws
 
 
@@ -21,7 +23,7 @@ def test_metrics():
 
     metrics_namespace = "test"
     resource_prefix = "test"
-    metrics_cls = Metrics(metrics_namespace=metrics_namespace, resource_prefix=resource_prefix, logger=logger)
+    metrics_cls = Metrics(metrics_namespace=metrics_namespace, resource_prefix=resource_prefix, logger=logger, use_emf=False)
     assert metrics_namespace == metrics_cls.metrics_namespace
     assert resource_prefix == metrics_cls.resource_prefix
     assert logger == metrics_cls.logger
@@ -42,4 +44,54 @@ def test_metrics():
             'MetricName': metric_name,
             'Dimensions': expected_dimension
         }
-    ]
\ No newline at end of file
+    ]
+
+@mock_aws
+def test_metrics_put_metric_data_batched():
+    from aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics import Metrics
+
+    metrics_cls = Metrics(metrics_namespace="test", resource_prefix="test", logger=logger, use_emf=False)
+    for i in range(1200):
+        metrics_cls.add_metric(metric_name=f"test_metric_{i}")
+
+    with patch("aws_solutions.core.helpers.get_service_client") as mock_client:
+        metrics_cls.flush()
+
+    calls = mock_client.return_value.put_metric_data.call_args_list
+    assert [len(c.kwargs["MetricData"]) for c in calls] == [1000, 200]
+    # the buffer is cleared after a flush
+    metrics_cls.flush()
+    assert mock_client.return_value.put_metric_data.call_count == 2
+
+
+def test_metrics_emf(capsys):
+    from aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics import Metrics
+
+    metrics_cls = Metrics(metrics_namespace="test", resource_prefix="stack", logger=logger)
+
+    @metrics_cls.flush_on_exit
+    def handler():
+        metrics_cls.add_metric(metric_name="Invocations")
+        metrics_cls.add_metric(metric_name="Files", value=3)
+        metrics_cls.add_metric(metric_name="Files", value=4)
+        metrics_cls.add_metric(metric_name="Duration", value=12.5, unit="Milliseconds", dimensions={"phase": "init"})
+        # nothing is written before the handler returns
+        assert capsys.readouterr().out == ""
+
+    handler()
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert len(lines) == 2
+
+    stack_line = next(line for line in lines if "phase" not in line)
+    directive = stack_line["_aws"]["CloudWatchMetrics"][0]
+    assert directive["Namespace"] == "test"
+    assert directive["Dimensions"] == [["stack-name"]]
+    assert directive["Metrics"] == [{"Name": "Invocations", "Unit": "Count"}, {"Name": "Files", "Unit": "Count"}]
+    assert stack_line["stack-name"] == "stack"
+    assert stack_line["Invocations"] == 1
+    assert stack_line["Files"] == [3, 4]
+
+    phase_line = next(line for line in lines if "phase" in line)
+    assert phase_line["_aws"]["CloudWatchMetrics"][0]["Dimensions"] == [["phase", "stack-name"]]
+    assert phase_line["Duration"] == 12.5
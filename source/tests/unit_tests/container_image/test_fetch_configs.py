@@ -0,0 +1,97 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+# ###############################################################################
+# PURPOSE:
+#   * Unit test for deployment/ecr/prebid-server/fetch_configs.py.
+# USAGE:
+#   ./run-unit-tests.sh --test-file-name container_image/test_fetch_configs.py
+###############################################################################
+
+import runpy
+import sys
+from unittest.mock import patch
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from unit_tests.test_commons import CONTAINER_SCRIPTS_DIR, load_container_script
+
+BUCKET_NAME = "test-configs-bucket"
+
+fetch_configs = load_container_script("fetch_configs")
+
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        s3_client.create_bucket(Bucket=BUCKET_NAME)
+        s3_client.put_object(Bucket=BUCKET_NAME, Key="prebid-server/default/README.md", Body=b"readme")
+        s3_client.put_object(Bucket=BUCKET_NAME, Key="prebid-server/default/prebid-config.yaml", Body=b"default")
+        s3_client.put_object(Bucket=BUCKET_NAME, Key="prebid-server/default/warmup/auction.json", Body=b"{}")
+        s3_client.put_object(Bucket=BUCKET_NAME, Key="prebid-server/current/prebid-config.yaml", Body=b"current")
+        yield s3_client
+
+
+def test_fetch_configs_downloads_and_overrides(s3, tmp_path):
+    fetch_configs.main(["--bucket", BUCKET_NAME, "--destination", str(tmp_path), "prebid-server/default", "/prebid-server/current/"])
+
+    assert (tmp_path / "prebid-config.yaml").read_bytes() == b"current"
+    assert (tmp_path / "warmup" / "auction.json").read_bytes() == b"{}"
+    assert not (tmp_path / "README.md").exists()
+    assert sorted(path.name for path in tmp_path.rglob("*")) == ["auction.json", "prebid-config.yaml", "warmup"]
+
+
+def test_fetch_configs_skips_files_matching_etag(s3, tmp_path, capsys):
+    (tmp_path / "prebid-config.yaml").write_bytes(b"current")
+    (tmp_path / "warmup").mkdir()
+    (tmp_path / "warmup" / "auction.json").write_bytes(b"[]")
+
+    fetch_configs.fetch_configs(BUCKET_NAME, ["prebid-server/default", "prebid-server/current"], str(tmp_path))
+
+    # the local file with the MD5 of the object ETag is kept, the changed one is downloaded
+    output = capsys.readouterr().out
+    assert "Unchanged prebid-config.yaml" in output
+    assert f"Downloaded s3://{BUCKET_NAME}/prebid-server/default/warmup/auction.json" in output
+    assert "Fetched 1 of 2 configuration files" in output
+    assert (tmp_path / "warmup" / "auction.json").read_bytes() == b"{}"
+
+
+def test_fetch_file_skips_unchanged_file(s3, tmp_path):
+    (tmp_path / "prebid-config.yaml").write_bytes(b"current")
+    etag = fetch_configs.file_md5(tmp_path / "prebid-config.yaml")
+
+    with patch.object(s3, "get_object") as get_object:
+        assert fetch_configs.fetch_file(
+            s3, BUCKET_NAME, str(tmp_path), "prebid-config.yaml", "prebid-server/current/prebid-config.yaml", etag
+        ) is False
+    get_object.assert_not_called()
+
+    assert fetch_configs.fetch_file(
+        s3, BUCKET_NAME, str(tmp_path), "prebid-config.yaml", "prebid-server/default/prebid-config.yaml", "changed"
+    ) is True
+    assert (tmp_path / "prebid-config.yaml").read_bytes() == b"default"
+    assert [path.name for path in tmp_path.iterdir()] == ["prebid-config.yaml"]
+
+
+def test_fetch_configs_fails_on_s3_error(s3, tmp_path):
+    with pytest.raises(Exception, match="NoSuchBucket"):
+        fetch_configs.main(["--bucket", "missing-bucket", "--destination", str(tmp_path), "prebid-server/default"])
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_fetch_configs_fails_on_download_error(s3, tmp_path):
+    with patch.object(fetch_configs, "fetch_file", side_effect=OSError("No space left on device")):
+        with pytest.raises(OSError, match="No space left on device"):
+            fetch_configs.fetch_configs(BUCKET_NAME, ["prebid-server/default"], str(tmp_path))
+
+
+def test_fetch_configs_script_exits_with_error(s3, tmp_path, capsys):
+    argv = ["fetch_configs.py", "--bucket", "missing-bucket", "--destination", str(tmp_path), "prebid-server/default"]
+    with patch.object(sys, "argv", argv), pytest.raises(SystemExit) as exit_info:
+        runpy.run_path(str(CONTAINER_SCRIPTS_DIR / "fetch_configs.py"), run_name="__main__")
+
+    # bootstrap.sh stops the task when the script fails
+    assert exit_info.value.code == 1
+    assert "Error: Failed to fetch configuration files" in capsys.readouterr().err
@@ -0,0 +1,86 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+# ###############################################################################
+# PURPOSE:
+#   * Unit test for deployment/ecr/prebid-server/health_endpoint.py.
+# USAGE:
+#   ./run-unit-tests.sh --test-file-name container_image/test_health_endpoint.py
+###############################################################################
+
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from unit_tests.test_commons import load_container_script
+
+health_endpoint = load_container_script("health_endpoint")
+
+
+def serve(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return f"http://localhost:{server.server_address[1]}"
+
+
+@pytest.fixture
+def prebid_status():
+    """A stand-in for the /status endpoint of Prebid Server, answering with the status code of the fixture"""
+    status = {"code": 200}
+
+    class StatusHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(status["code"])
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("localhost", 0), StatusHandler)
+    status["url"] = f"{serve(server)}/status"
+    yield status
+    server.shutdown()
+
+
+@pytest.fixture
+def pending_file(tmp_path):
+    pending_file = tmp_path / "prebid-warming-up"
+    pending_file.touch()
+    return pending_file
+
+
+@pytest.fixture
+def health_url(prebid_status, pending_file):
+    server = health_endpoint.create_server(0, str(pending_file), prebid_status["url"])
+    yield serve(server)
+    server.shutdown()
+
+
+def get_status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as err:
+        return err.code
+
+
+def test_health_check_fails_until_the_warm_up_has_ended(health_url, pending_file):
+    assert get_status(f"{health_url}/status") == 503
+
+    pending_file.unlink()
+
+    assert get_status(f"{health_url}/status") == 200
+
+
+def test_health_check_reports_the_status_of_prebid_server(health_url, pending_file, prebid_status):
+    pending_file.unlink()
+    prebid_status["code"] = 500
+
+    assert get_status(f"{health_url}/status") == 503
+    assert get_status(f"{health_url}/other") == 404
+
+
+def test_health_status_without_prebid_server(tmp_path):
+    assert health_endpoint.health_status(str(tmp_path / "missing"), "http://localhost:1/status") == 503
@@ -0,0 +1,162 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+# ###############################################################################
+# PURPOSE:
+#   * Unit test for the metrics log lines written by deployment/ecr/prebid-server/default-config/prebid-logging.xml.
+#   * The %replace conversions of the metrics encoder pattern are applied to reporter lines the way Logback does,
+#     and each resulting line is checked against infrastructure/prebid_server/prebid_metrics_schema.json.
+#   * The lines are converted to the columns of the tables the way the OpenX JSON SerDe of the Firehose delivery
+#     streams reads them.
+#   * train_cds.sh checks the lines written by the Logback of the image during the image build.
+# USAGE:
+#   ./run-unit-tests.sh --test-file-name container_image/test_prebid_logging.py
+###############################################################################
+
+import json
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from prebid_server.prebid_firehose_constructs import METRICS_COLUMN_TO_JSON_KEY
+from unit_tests.test_commons import CONTAINER_SCRIPTS_DIR, METRIC_REPORTER_LINES
+
+LOGGING_CONFIG = CONTAINER_SCRIPTS_DIR / "default-config" / "prebid-logging.xml"
+METRICS_SCHEMA = Path(__file__).parents[3] / "infrastructure" / "prebid_server" / "prebid_metrics_schema.json"
+TIMESTAMP = "2026-10-19T08:00:00.000Z"
+CONTAINER_ID = "abc123"
+NUMERIC_TYPES = {"int", "bigint", "double"}
+# timestamp format of the OpenX JSON SerDe, the fraction has up to 9 digits
+OPENX_TIMESTAMP_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d{1,9})?Z$")
+
+
+def metrics_pattern():
+    configuration = ET.parse(LOGGING_CONFIG).getroot()
+    appender = configuration.find("appender[@name='METRICS_APPENDER']")
+    return appender.find("encoder/pattern").text.strip()
+
+
+def unescape_option(option):
+    """Logback keeps a backslash in a quoted option, unless it escapes the quote"""
+    return re.sub(r"\\(.)", lambda match: match.group(1) if match.group(1) == "'" else match.group(0), option)
+
+
+def java_replacement(replacement):
+    """Translate a java.util.regex replacement, backslashes escape the next character and $n is a group"""
+    return re.sub(r"\\(.)|\$(\d)", lambda match: re.escape(match.group(1)) if match.group(1) else f"\\g<{match.group(2)}>",
+                  replacement)
+
+
+def convert(pattern, position, message):
+    """Evaluate the %msg or %replace conversion at position, returns its value and the position after it"""
+    if pattern.startswith("%msg", position):
+        return message, position + len("%msg")
+
+    assert pattern.startswith("%replace(", position), pattern[position:]
+    value, position = convert(pattern, position + len("%replace("), message)
+    assert pattern.startswith("){'", position), pattern[position:]
+    option = re.compile(r"\)\{'((?:\\.|[^'\\])*)', '((?:\\.|[^'\\])*)'\}").match(pattern, position)
+    regex, replacement = (unescape_option(group) for group in option.groups())
+    return re.sub(regex, java_replacement(replacement), value), option.end()
+
+
+def render(message):
+    pattern = metrics_pattern()
+    pattern = pattern.replace("%d{yyyy-MM-dd'T'HH:mm:ss.SSS'Z', UTC}", TIMESTAMP).replace("${CONTAINER_ID}", CONTAINER_ID)
+    assert pattern.endswith("%n")
+    start = pattern.index("%replace(")
+    value, end = convert(pattern, start, message)
+    return pattern[:start] + value + pattern[end:-len("%n")]
+
+
+@pytest.fixture(scope="module")
+def schema():
+    return {table.upper(): columns for table, columns in json.loads(METRICS_SCHEMA.read_text()).items()}
+
+
+@pytest.mark.parametrize("message", METRIC_REPORTER_LINES)
+def test_reporter_lines_match_table_schema(message, schema):
+    line = json.loads(render(message))
+
+    assert line["timestamp"] == TIMESTAMP
+    assert line["containerId"] == CONTAINER_ID
+    columns = schema[line["type"]]
+    assert set(line) - {"type", "containerId"} == set(columns) - {"container_id"}
+    for column, column_type in columns.items():
+        if column_type in NUMERIC_TYPES:
+            assert isinstance(line[column], (int, float)), column
+        elif column != "container_id":
+            assert isinstance(line[column], str), column
+
+
+def openx_value(value, column_type):
+    """The value of a JSON attribute read by the OpenX JSON SerDe as a column of the type, or None when it is not"""
+    if column_type in {"int", "bigint"}:
+        return value if isinstance(value, int) and not isinstance(value, bool) else None
+    if column_type == "double":
+        return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+    if column_type == "timestamp":
+        if not isinstance(value, str) or not OPENX_TIMESTAMP_RE.match(value):
+            return None
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
+    return value if isinstance(value, str) else None
+
+
+def firehose_row(line, columns):
+    """Convert a metrics record to a row of the table, like the OpenX JSON SerDe configured on the delivery streams"""
+    record = {key.lower(): value for key, value in json.loads(line).items()}
+    return {
+        column: openx_value(record.get(METRICS_COLUMN_TO_JSON_KEY.get(column, column).lower()), column_type)
+        for column, column_type in columns.items()
+    }
+
+
+@pytest.mark.parametrize("message", METRIC_REPORTER_LINES)
+def test_firehose_converts_reporter_lines(message, schema):
+    line = render(message)
+    columns = schema[json.loads(line)["type"]]
+
+    row = firehose_row(line, columns)
+
+    # a column the SerDe cannot read would be written as null to the Parquet files
+    assert [column for column, value in row.items() if value is None] == []
+    assert row["timestamp"] == datetime(2026, 10, 19, 8, tzinfo=timezone.utc)
+    assert row["container_id"] == CONTAINER_ID
+    # the year_month partition key of the MetadataExtraction query .timestamp[0:7]
+    assert json.loads(line)["timestamp"][0:7] == "2026-10"
+
+
+def test_firehose_converts_meter_rates():
+    columns = {"count": "bigint", "m1_rate": "double", "rate_unit": "string"}
+
+    row = firehose_row(render(METRIC_REPORTER_LINES[4]), columns)
+
+    assert row == {"count": 3, "m1_rate": 0.0001, "rate_unit": "events/second"}
+
+
+def test_reporter_line_fields():
+    line = json.loads(render(METRIC_REPORTER_LINES[2]))
+    assert line["value"] == '[appnexus, "ix"]'
+
+    line = json.loads(render(METRIC_REPORTER_LINES[4]))
+    assert line["m1_rate"] == 0.0001
+    assert line["count"] == 3
+    assert line["rate_unit"] == "events/second"
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        'Reporter failed: "timeout", retrying in 5s',
+        "multi-line\nmessage\twith\\backslash, key=value",
+        "",
+        "type=unknown value",
+    ],
+)
+def test_other_messages_stay_valid_json(message):
+    line = json.loads(render(message))
+
+    assert line["type"] == "LOG"
+    assert "message" in line
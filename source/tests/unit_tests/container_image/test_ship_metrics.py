@@ -0,0 +1,150 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+# ###############################################################################
+# PURPOSE:
+#   * Unit test for deployment/ecr/prebid-server/ship_metrics.py.
+# USAGE:
+#   ./run-unit-tests.sh --test-file-name container_image/test_ship_metrics.py
+###############################################################################
+
+import gzip
+import os
+import signal
+import threading
+import time
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+
+import pytest
+
+from unit_tests.test_commons import load_container_script
+
+ship_metrics = load_container_script("ship_metrics")
+
+CONTAINER_ID = "abc123"
+STOP_TIME = datetime(2026, 10, 19, 8, 30, tzinfo=timezone.utc)
+HOUR_PREFIX = "prebid-metrics.2026-10-19_08"
+LOG_LINES = b'{"type":"COUNTER", "name":"requests", "count":1}\n' * 100
+
+
+def settle(path, seconds=ship_metrics.SETTLE_SECONDS):
+    modified = time.time() - seconds
+    os.utime(path, (modified, modified))
+
+
+@pytest.fixture(autouse=True)
+def stop_time():
+    with patch.object(ship_metrics, "datetime", Mock(now=Mock(return_value=STOP_TIME))):
+        yield
+
+
+@pytest.fixture
+def source(tmp_path):
+    archived = tmp_path / "buffer" / CONTAINER_ID / ship_metrics.ARCHIVED_FOLDER
+    archived.mkdir(parents=True)
+    return tmp_path / "buffer"
+
+
+def write_archive(source, name, settled=True):
+    archive = source / CONTAINER_ID / ship_metrics.ARCHIVED_FOLDER / name
+    archive.write_bytes(gzip.compress(LOG_LINES))
+    if settled:
+        settle(archive)
+    return archive
+
+
+def test_closed_archives_waits_for_settled_archives(source):
+    settled = write_archive(source, "prebid-metrics.2026-10-19_07.0.log.gz")
+    changing = write_archive(source, "prebid-metrics.2026-10-19_08.0.log.gz", settled=False)
+    (source / CONTAINER_ID / "prebid-metrics.log").write_bytes(LOG_LINES)
+    settle(source / CONTAINER_ID / "prebid-metrics.log")
+
+    assert ship_metrics.closed_archives(source, ship_metrics.SETTLE_SECONDS) == [settled]
+    assert ship_metrics.closed_archives(source, 0) == [settled, changing]
+
+
+def test_efs_destination_ship(source, tmp_path):
+    archive = write_archive(source, "prebid-metrics.2026-10-19_07.0.log.gz")
+    destination = ship_metrics.EfsDestination(tmp_path / "efs")
+    relative_path = archive.relative_to(source).as_posix()
+
+    with patch.object(ship_metrics.shutil, "copyfile", wraps=ship_metrics.shutil.copyfile) as copyfile:
+        target = destination.ship(archive, relative_path)
+
+    # the partial copy is written outside the archived folder, so it is never transferred as an archive
+    partial_target = copyfile.call_args.args[1]
+    assert partial_target == tmp_path / "efs" / CONTAINER_ID / ".prebid-metrics.2026-10-19_07.0.log.gz.partial"
+    assert target == str(tmp_path / "efs" / relative_path)
+    assert gzip.decompress((tmp_path / "efs" / relative_path).read_bytes()) == LOG_LINES
+    assert [path.name for path in (tmp_path / "efs" / CONTAINER_ID).iterdir()] == [ship_metrics.ARCHIVED_FOLDER]
+
+
+def test_ship_archives_keeps_failed_archives(source, tmp_path):
+    shipped = write_archive(source, "prebid-metrics.2026-10-19_07.3.log.gz")
+    failed = write_archive(source, "prebid-metrics.2026-10-19_07.4.log.gz")
+    destination = ship_metrics.EfsDestination(tmp_path / "efs")
+    ship = destination.ship
+
+    def ship_or_fail(archive, relative_path):
+        if archive == failed:
+            raise OSError("EFS is unreachable")
+        return ship(archive, relative_path)
+
+    shipped_indexes = {}
+    with patch.object(destination, "ship", side_effect=ship_or_fail):
+        assert ship_metrics.ship_archives(source, destination, [shipped, failed], shipped_indexes) == 1
+
+    assert not shipped.exists()
+    assert failed.exists()
+    assert shipped_indexes == {(CONTAINER_ID, "prebid-metrics.2026-10-19_07"): 3}
+
+
+def test_compress_remaining_logs(source):
+    log_folder = source / CONTAINER_ID
+    (log_folder / "prebid-metrics.log").write_bytes(LOG_LINES)
+    (log_folder / "prebid-metrics.log12345.tmp").write_bytes(LOG_LINES)
+    (log_folder / "prebid-metrics.log67890.tmp").write_bytes(b"")
+    write_archive(source, f"{HOUR_PREFIX}.1.log.gz")
+
+    # index 2 of the hour was shipped and deleted from the buffer already
+    ship_metrics.compress_remaining_logs(log_folder, {(CONTAINER_ID, HOUR_PREFIX): 2})
+
+    archives = sorted(path.name for path in (log_folder / ship_metrics.ARCHIVED_FOLDER).iterdir())
+    assert archives == [f"{HOUR_PREFIX}.1.log.gz", f"{HOUR_PREFIX}.3.log.gz", f"{HOUR_PREFIX}.4.log.gz"]
+    for name in archives:
+        assert gzip.decompress((log_folder / ship_metrics.ARCHIVED_FOLDER / name).read_bytes()) == LOG_LINES
+    assert sorted(path.name for path in log_folder.iterdir()) == [ship_metrics.ARCHIVED_FOLDER, "prebid-metrics.log67890.tmp"]
+
+
+def test_compress_remaining_logs_numbers_after_archives_of_the_hour(source):
+    log_folder = source / CONTAINER_ID
+    write_archive(source, f"{HOUR_PREFIX}.0.log.gz")
+    write_archive(source, f"{HOUR_PREFIX}1.5.log.gz")
+    (log_folder / "prebid-metrics.log").write_bytes(LOG_LINES)
+
+    ship_metrics.compress_remaining_logs(log_folder)
+
+    assert (log_folder / ship_metrics.ARCHIVED_FOLDER / f"{HOUR_PREFIX}.1.log.gz").exists()
+    assert not (log_folder / "prebid-metrics.log").exists()
+
+
+def test_run_flushes_remaining_logs_on_stop(source, tmp_path):
+    write_archive(source, f"{HOUR_PREFIX}.0.log.gz")
+    destination = ship_metrics.EfsDestination(tmp_path / "efs")
+
+    handlers = {}
+    with patch.object(ship_metrics.signal, "signal", side_effect=lambda signum, handler: handlers.update({signum: handler})):
+        # Prebid Server writes the active log until it stops, then ECS stops the shipper
+        def stop():
+            (source / CONTAINER_ID / "prebid-metrics.log").write_bytes(LOG_LINES)
+            handlers[signal.SIGTERM]()
+
+        stopper = threading.Timer(0.2, stop)
+        stopper.start()
+        ship_metrics.run(source, destination, interval=0.05)
+        stopper.join()
+
+    shipped = sorted(path.name for path in (tmp_path / "efs" / CONTAINER_ID / ship_metrics.ARCHIVED_FOLDER).iterdir())
+    assert shipped == [f"{HOUR_PREFIX}.0.log.gz", f"{HOUR_PREFIX}.1.log.gz"]
+    assert list((source / CONTAINER_ID / ship_metrics.ARCHIVED_FOLDER).iterdir()) == []
+    assert not (source / CONTAINER_ID / "prebid-metrics.log").exists()
@@ -0,0 +1,49 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+# ###############################################################################
+# PURPOSE:
+#   * Unit test for the default warm-up corpus of deployment/ecr/prebid-server/default-config/warmup.
+#   * The requests replayed by warm_up.py must never reach a live bidder, each bidder of each imp gets a stored bid
+#     response of the stored-responses-dir of prebid-config.yaml.
+# USAGE:
+#   ./run-unit-tests.sh --test-file-name container_image/test_warm_up.py
+###############################################################################
+
+import json
+import re
+
+import pytest
+
+from unit_tests.test_commons import CONTAINER_SCRIPTS_DIR, load_container_script
+
+warm_up = load_container_script("warm_up")
+
+DEFAULT_CONFIG_DIR = CONTAINER_SCRIPTS_DIR / "default-config"
+CORPUS_DIR = DEFAULT_CONFIG_DIR / "warmup"
+# configuration files are fetched to this directory of the container
+PREBID_CONFIGS_DIR = "/prebid-configs"
+
+
+def stored_responses_dir():
+    config = (DEFAULT_CONFIG_DIR / "prebid-config.yaml").read_text()
+    directory = re.search(r"^\s+stored-responses-dir:\s*(\S+)$", config, re.MULTILINE).group(1)
+    assert directory.startswith(f"{PREBID_CONFIGS_DIR}/")
+    return DEFAULT_CONFIG_DIR / directory[len(PREBID_CONFIGS_DIR) + 1:]
+
+
+@pytest.mark.parametrize("body", warm_up.load_corpus(CORPUS_DIR))
+def test_corpus_requests_use_stored_bid_responses(body):
+    request = json.loads(body)
+
+    for imp in request["imp"]:
+        prebid = imp["ext"]["prebid"]
+        stored_bid_responses = {response["bidder"]: response["id"] for response in prebid["storedbidresponse"]}
+        assert set(stored_bid_responses) == set(prebid["bidder"])
+        for response_id in stored_bid_responses.values():
+            stored_response = json.loads((stored_responses_dir() / f"{response_id}.json").read_text())
+            bids = [bid for seat_bid in stored_response["seatbid"] for bid in seat_bid["bid"]]
+            assert imp["id"] in {bid["impid"] for bid in bids}
+
+
+def test_corpus_is_loaded_without_stored_responses():
+    assert len(warm_up.load_corpus(CORPUS_DIR)) == 2
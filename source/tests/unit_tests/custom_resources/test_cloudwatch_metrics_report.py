@@ -141,7 +141,7 @@ def test_send_metrics(_, mock_response_put, event, context):
                 MetricData=[
                     {
                         "MetricName": nat_gateway_metric,
-                        "Unit": "Count",
+                        "Unit": "Bytes" if nat_gateway_metric.startswith("Bytes") else "Count",
                         "Dimensions": [
                             {
                                 "Name": "NatGatewayId",
@@ -242,15 +242,16 @@ def test_send_metrics(_, mock_response_put, event, context):
         })
     os.environ["CF_DISTRIBUTION_ID"] = cf_response["Distribution"]["Id"]
     cf_sum = 100.0
-    cf_cw_metrics = ["Requests", "TotalErrorRate"]
+    # the units CloudFront publishes its metrics with, the report queries each metric with its unit
+    cf_cw_metrics = {"Requests": "None", "TotalErrorRate": "Percent"}
     test_metric_tag = "CloudFront"
-    for cf_cw_metric in cf_cw_metrics:
+    for cf_cw_metric, cf_cw_unit in cf_cw_metrics.items():
         cloudwatch_client.put_metric_data(
             Namespace=f"AWS/{test_metric_tag}",
             MetricData=[
                 {
                     "MetricName": cf_cw_metric,
-                    "Unit": "Count",
+                    "Unit": cf_cw_unit,
                     "Dimensions": [
                         {
                             "Name": "DistributionId",
@@ -376,3 +377,146 @@ def test_send_metrics(_, mock_response_put, event, context):
                          metric["Dimensions"] == v["dimensions"]]) == 0
             ):
                 raise AssertionError()
+
+
+@mock_aws
+def test_get_metric_data_batches_queries():
+    create_secret()
+    from custom_resources.cloudwatch_metrics.cloudwatch_metrics_report import CloudwatchMetricsReport
+
+    cloudwatch_metrics_report = CloudwatchMetricsReport()
+    cloudwatch_metrics_report.cloudwatch_client = MagicMock()
+    paginator = cloudwatch_metrics_report.cloudwatch_client.get_paginator.return_value
+    timestamp = datetime.utcnow()
+    paginator.paginate.side_effect = lambda MetricDataQueries, **_: [{
+        "MetricDataResults": [
+            {"Id": query["Id"], "Timestamps": [timestamp], "Values": [2.0]} for query in MetricDataQueries
+        ]
+    }]
+
+    # 150 metrics with 4 statistics each exceed the 500 queries allowed per GetMetricData call
+    metric_plan = [
+        {
+            "namespace": "AWS/ApplicationELB",
+            "metric_name": f"Metric{i}",
+            "dimensions": [{"Name": "LoadBalancer", "Value": "test"}],
+            "statistics": ["SampleCount", "Sum", "Minimum", "Maximum"],
+        }
+        for i in range(150)
+    ]
+    responses_by_metric = cloudwatch_metrics_report.get_metric_data(metric_plan)
+
+    assert [len(c.kwargs["MetricDataQueries"]) for c in paginator.paginate.call_args_list] == [500, 100]
+    assert len(responses_by_metric) == 150
+    assert responses_by_metric[149]["Datapoints"] == [
+        {"Timestamp": timestamp, "Unit": None, "SampleCount": 2.0, "Sum": 2.0, "Minimum": 2.0, "Maximum": 2.0}
+    ]
+
+
+@mock_aws
+def test_list_metrics_not_cached():
+    create_secret()
+    from custom_resources.cloudwatch_metrics.cloudwatch_metrics_report import CloudwatchMetricsReport
+
+    cloudwatch_metrics_report = CloudwatchMetricsReport()
+    cloudwatch_metrics_report.cloudwatch_client = MagicMock()
+    paginator = cloudwatch_metrics_report.cloudwatch_client.get_paginator.return_value
+    paginator.paginate.return_value = [
+        {"Metrics": [{"MetricName": "Requests"}]},
+        {"Metrics": [{"MetricName": "BytesDownloaded"}]},
+    ]
+
+    dimensions = [{"Name": "DistributionId", "Value": str(uuid.uuid4())}]
+    first = cloudwatch_metrics_report.list_metrics("AWS/CloudFront", dimensions)
+    second = cloudwatch_metrics_report.list_metrics("AWS/CloudFront", dimensions)
+
+    # metrics created since the last report are always discovered
+    assert first == second == [{"MetricName": "Requests"}, {"MetricName": "BytesDownloaded"}]
+    assert paginator.paginate.call_count == 2
+
+
+@mock_aws
+def test_get_namespace_metrics_units():
+    create_secret()
+    from custom_resources.cloudwatch_metrics.cloudwatch_metrics_report import CloudwatchMetricsReport
+
+    cloudwatch_metrics_report = CloudwatchMetricsReport()
+    cloudwatch_metrics_report.cloudwatch_client = MagicMock()
+    cloudwatch_metrics_report.cloudwatch_client.get_metric_statistics.return_value = {
+        "Datapoints": [{"SampleCount": 1.0, "Unit": "Bytes/Second"}]
+    }
+    paginator = cloudwatch_metrics_report.cloudwatch_client.get_paginator.return_value
+    timestamp = datetime.utcnow()
+    paginator.paginate.side_effect = lambda MetricDataQueries, **_: [{
+        "MetricDataResults": [
+            {"Id": query["Id"], "Timestamps": [timestamp], "Values": [2.0]} for query in MetricDataQueries
+        ]
+    }]
+    dimensions = [{"Name": "NatGatewayId", "Value": "nat-123"}]
+    metrics = [
+        {"MetricName": "BytesOutToSource", "Dimensions": dimensions},
+        {"MetricName": "PeakBytesPerSecond", "Dimensions": dimensions},
+    ]
+
+    data = cloudwatch_metrics_report.get_namespace_metrics("NATGateway", metrics, ["SampleCount", "Sum"])
+
+    # known units are passed in the queries, other units are looked up once per metric
+    queries = paginator.paginate.call_args.kwargs["MetricDataQueries"]
+    assert [query["MetricStat"]["Unit"] for query in queries] == ["Bytes", "Bytes", "Bytes/Second", "Bytes/Second"]
+    cloudwatch_metrics_report.cloudwatch_client.get_metric_statistics.assert_called_once()
+    assert data["MetricData"]["NATGateway-BytesOutToSource"]["datapoints"]["Unit"] == "Bytes"
+    assert data["MetricData"]["NATGateway-PeakBytesPerSecond"]["datapoints"]["Unit"] == "Bytes/Second"
+
+
+def _statistic_set(dt):
+    return {
+        "dimensions": [{"Name": "LoadBalancer", "Value": "test"}],
+        "datapoints": {
+            "SampleCount": 2.0, "Sum": 2.0, "Minimum": 1.0, "Maximum": 1.0, "Unit": "Count", "Timestamp": dt
+        },
+    }
+
+
+@mock_aws
+@patch("custom_resources.cloudwatch_metrics.cloudwatch_metrics_report.time.sleep")
+def test_put_metric_data_chunks_and_retries(mock_sleep):
+    create_secret()
+    from botocore.exceptions import ClientError
+    from custom_resources.cloudwatch_metrics.cloudwatch_metrics_report import CloudwatchMetricsReport
+
+    cloudwatch_metrics_report = CloudwatchMetricsReport()
+    cloudwatch_metrics_report.cloudwatch_client = MagicMock()
+    throttled = ClientError({"Error": {"Code": "Throttling", "Message": "Rate exceeded"}}, "PutMetricData")
+    cloudwatch_metrics_report.cloudwatch_client.put_metric_data.side_effect = [throttled, {}, {}]
+
+    dt = datetime.utcnow()
+    metric_data = {f"ApplicationELB-Metric{i}": _statistic_set(dt) for i in range(1500)}
+    cloudwatch_metrics_report.put_metric_data(metric_data)
+
+    calls = cloudwatch_metrics_report.cloudwatch_client.put_metric_data.call_args_list
+    # first chunk is throttled once and retried
+    assert [len(c.kwargs["MetricData"]) for c in calls] == [1000, 1000, 500]
+    mock_sleep.assert_called_once()
+
+
+@mock_aws
+@patch("custom_resources.cloudwatch_metrics.cloudwatch_metrics_report.logger")
+def test_put_metric_data_failure_summary(mock_logger):
+    create_secret()
+    from botocore.exceptions import ClientError
+    from custom_resources.cloudwatch_metrics.cloudwatch_metrics_report import CloudwatchMetricsReport
+
+    cloudwatch_metrics_report = CloudwatchMetricsReport()
+    cloudwatch_metrics_report.cloudwatch_client = MagicMock()
+    cloudwatch_metrics_report.cloudwatch_client.put_metric_data.side_effect = ClientError(
+        {"Error": {"Code": "InvalidParameterValue", "Message": "bad"}}, "PutMetricData"
+    )
+
+    dt = datetime.utcnow()
+    metric_data = {"ApplicationELB-RequestCount": _statistic_set(dt), "ApplicationELB-Broken": {"dimensions": []}}
+    cloudwatch_metrics_report.put_metric_data(metric_data)
+
+    # errors that are not throttling are not retried
+    cloudwatch_metrics_report.cloudwatch_client.put_metric_data.assert_called_once()
+    mock_logger.info.assert_called_once()
+    assert "2 metric(s) or chunk(s)" in mock_logger.info.call_args.args[0]
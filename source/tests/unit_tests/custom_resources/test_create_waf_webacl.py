@@ -7,9 +7,19 @@
 #   ./run-unit-tests.sh --test-file-name custom_resources/test_create_waf_webacl.py
 ###############################################################################
 
+import json
 
 from unittest.mock import patch
 
+RULES_CONFIG = {
+    "window_secs": 300,
+    "limit_per_ip": 20000,
+    "forwarded_ip_header": "X-Forwarded-For",
+    "limit_per_forwarded_ip": 2000,
+    "rate_limited_paths": ["/openrtb2/"],
+    "uninspected_paths": ["/status", "/info/bidders"],
+}
+
 
 @patch("crhelper.CfnResource")
 @patch("custom_resources.waf_webacl_lambda.create_waf_webacl.helper")
@@ -20,7 +30,7 @@ def test_event_handler(helper_mock, _):
     helper_mock.assert_called_once()
 
 
-@patch("custom_resources.waf_webacl_lambda.create_waf_webacl.boto3.client")
+@patch("custom_resources.waf_webacl_lambda.create_waf_webacl.get_service_client")
 @patch("crhelper.CfnResource")
 def test_on_create(_, mock_boto3):
     expected_resp = {
@@ -37,10 +47,82 @@ def test_on_create(_, mock_boto3):
 
     with patch("custom_resources.waf_webacl_lambda.create_waf_webacl.helper.Data", {}) as helper_update_mock:
         on_create({
-            "StackId": "test/id12345"
+            "StackId": "test/id12345",
+            "ResourceProperties": {},
         }, None)
 
     assert helper_update_mock["webacl_arn"] == expected_resp["Summary"]["ARN"]
     assert helper_update_mock["webacl_name"] == expected_resp["Summary"]["Name"]
     assert helper_update_mock["webacl_id"] == expected_resp["Summary"]["Id"]
-    assert helper_update_mock["webacl_locktoken"] == expected_resp["Summary"]["LockToken"]
\ No newline at end of file
+    assert helper_update_mock["webacl_locktoken"] == expected_resp["Summary"]["LockToken"]
+    # without a rules config only the managed rule groups are created
+    rules = mock_boto3.return_value.create_web_acl.call_args.kwargs["Rules"]
+    assert [rule["Name"] for rule in rules][0] == "AWS-AWSManagedRulesKnownBadInputsRuleSet"
+    assert all("RateBasedStatement" not in rule["Statement"] for rule in rules)
+
+
+def test_build_rules():
+    from custom_resources.waf_webacl_lambda.create_waf_webacl import build_rules
+
+    rules = build_rules(RULES_CONFIG)
+
+    assert [rule["Priority"] for rule in rules] == list(range(1, len(rules) + 1))
+    per_ip, per_forwarded_ip = rules[0]["Statement"]["RateBasedStatement"], rules[1]["Statement"]["RateBasedStatement"]
+    assert rules[0]["Action"] == {"Block": {}}
+    assert per_ip["Limit"] == 20000
+    assert per_ip["AggregateKeyType"] == "IP"
+    assert per_ip["EvaluationWindowSec"] == 300
+    # requests of publisher servers, which forward the client IP, are only counted per forwarded IP
+    path_statement, not_forwarded_statement = per_ip["ScopeDownStatement"]["AndStatement"]["Statements"]
+    assert path_statement["ByteMatchStatement"]["SearchString"] == "/openrtb2/"
+    assert not_forwarded_statement["NotStatement"]["Statement"]["SizeConstraintStatement"] == {
+        "FieldToMatch": {"SingleHeader": {"Name": "x-forwarded-for"}},
+        "ComparisonOperator": "GE",
+        "Size": 0,
+        "TextTransformations": [{"Priority": 0, "Type": "NONE"}],
+    }
+    assert per_forwarded_ip["Limit"] == 2000
+    assert per_forwarded_ip["AggregateKeyType"] == "FORWARDED_IP"
+    assert per_forwarded_ip["ForwardedIPConfig"] == {"HeaderName": "X-Forwarded-For", "FallbackBehavior": "NO_MATCH"}
+
+    # the heavy managed rule groups skip the read-only endpoints
+    groups = {rule["Name"]: rule["Statement"]["ManagedRuleGroupStatement"] for rule in rules[2:]}
+    not_statement = groups["AWS-AWSManagedRulesCommonRuleSet"]["ScopeDownStatement"]["NotStatement"]["Statement"]
+    assert [
+        statement["ByteMatchStatement"]["SearchString"] for statement in not_statement["OrStatement"]["Statements"]
+    ] == ["/status", "/info/bidders"]
+    assert "ScopeDownStatement" in groups["AWS-AWSManagedRulesSQLiRuleSet"]
+    assert "ScopeDownStatement" not in groups["AWS-AWSManagedRulesKnownBadInputsRuleSet"]
+
+    # a limit of 0 disables the rate-based rule
+    rules = build_rules({**RULES_CONFIG, "limit_per_forwarded_ip": 0})
+    assert [rule["Name"] for rule in rules[:2]] == ["RateLimitPerIp", "AWS-AWSManagedRulesKnownBadInputsRuleSet"]
+    # without the forwarded IP rule, the per-IP rule counts every request
+    assert rules[0]["Statement"]["RateBasedStatement"]["ScopeDownStatement"]["ByteMatchStatement"]["SearchString"] == "/openrtb2/"
+
+
+@patch("custom_resources.waf_webacl_lambda.create_waf_webacl.get_service_client")
+@patch("crhelper.CfnResource")
+def test_on_update(_, mock_boto3):
+    web_acl = {"ARN": "arn", "Name": "PrebidWaf-id12345-abcd", "Id": "5678"}
+    mock_boto3.return_value.list_web_acls.side_effect = [
+        {"WebACLs": [{"ARN": "other", "Name": "PrebidWaf-other-abcd", "Id": "1234"}], "NextMarker": "marker"},
+        {"WebACLs": [web_acl]},
+    ]
+    mock_boto3.return_value.get_web_acl.return_value = {"LockToken": "lock_token"}
+    mock_boto3.return_value.update_web_acl.return_value = {"NextLockToken": "next_lock_token"}
+    from custom_resources.waf_webacl_lambda.create_waf_webacl import build_rules, on_update
+
+    with patch("custom_resources.waf_webacl_lambda.create_waf_webacl.helper.Data", {}) as helper_update_mock:
+        on_update({
+            "StackId": "test/id12345",
+            "ResourceProperties": {"WAF_RULES_CONFIG": json.dumps(RULES_CONFIG)},
+        }, None)
+
+    update = mock_boto3.return_value.update_web_acl.call_args.kwargs
+    assert update["Id"] == "5678"
+    assert update["LockToken"] == "lock_token"
+    assert update["Rules"] == build_rules(RULES_CONFIG)
+    assert mock_boto3.return_value.list_web_acls.call_args.kwargs["NextMarker"] == "marker"
+    assert helper_update_mock["webacl_id"] == "5678"
+    assert helper_update_mock["webacl_locktoken"] == "next_lock_token"
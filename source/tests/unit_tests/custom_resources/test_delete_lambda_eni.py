@@ -7,8 +7,12 @@
 #   ./run-unit-tests.sh --test-file-name custom_resources/test_delete_lambda_eni.py
 ###############################################################################
 
+import time
+from unittest.mock import patch, MagicMock
+
 import boto3
-from unittest.mock import patch
+import pytest
+from botocore.exceptions import ClientError, WaiterError
 from moto import mock_aws
 
 
@@ -30,7 +34,7 @@ def test_on_delete(_):
     subnet_resp = ec2_client.create_subnet(VpcId=vpc_resp["Vpc"]["VpcId"], CidrBlock="10.0.0.0/16")
     network_resp = ec2_client.create_network_interface(Groups=["test-123"], SubnetId=subnet_resp["Subnet"]["SubnetId"])
     instance_resp = ec2_resource.create_instances(ImageId="some-image", MinCount=1, MaxCount=1)
-    ec2_client.attach_network_interface(NetworkInterfaceId=network_resp["NetworkInterface"]["NetworkInterfaceId"], InstanceId=instance_resp[0].id, DeviceIndex=0)
+    ec2_client.attach_network_interface(NetworkInterfaceId=network_resp["NetworkInterface"]["NetworkInterfaceId"], InstanceId=instance_resp[0].id, DeviceIndex=1)
 
     from custom_resources.vpc_eni_lambda.delete_lambda_eni import on_delete
 
@@ -41,4 +45,58 @@ def test_on_delete(_):
             }
         }
         on_delete(events, None)
-        assert helper_update_mock["Response"] is not None
\ No newline at end of file
+        assert helper_update_mock["Response"] == [network_resp["NetworkInterface"]["NetworkInterfaceId"]]
+
+    assert ec2_client.describe_network_interfaces(
+        Filters=[{"Name": "group-id", "Values": ["test-123"]}]
+    )["NetworkInterfaces"] == []
+
+
+@patch("crhelper.CfnResource")
+def test_delete_network_interface_waits_for_available(_):
+    from custom_resources.vpc_eni_lambda.delete_lambda_eni import delete_network_interface
+
+    ec2_client = MagicMock()
+    network_interface = {
+        "NetworkInterfaceId": "eni-123",
+        "Status": "in-use",
+        "Attachment": {"AttachmentId": "eni-attach-123"},
+    }
+
+    assert delete_network_interface(ec2_client, network_interface, time.monotonic() + 62) == "eni-123"
+
+    ec2_client.detach_network_interface.assert_called_once_with(AttachmentId="eni-attach-123")
+    ec2_client.get_waiter.assert_called_once_with("network_interface_available")
+    ec2_client.get_waiter.return_value.wait.assert_called_once_with(
+        NetworkInterfaceIds=["eni-123"], WaiterConfig={"Delay": 5, "MaxAttempts": 12}
+    )
+    ec2_client.delete_network_interface.assert_called_once_with(NetworkInterfaceId="eni-123")
+
+
+@patch("crhelper.CfnResource")
+def test_delete_network_interface_deadline(_):
+    from custom_resources.vpc_eni_lambda.delete_lambda_eni import delete_network_interface
+
+    ec2_client = MagicMock()
+    ec2_client.detach_network_interface.side_effect = ClientError(
+        {"Error": {"Code": "OperationNotPermitted"}}, "DetachNetworkInterface"
+    )
+    ec2_client.get_waiter.return_value.wait.side_effect = WaiterError(
+        name="NetworkInterfaceAvailable", reason="Max attempts exceeded", last_response={}
+    )
+    network_interface = {
+        "NetworkInterfaceId": "eni-123",
+        "Status": "in-use",
+        "Attachment": {"AttachmentId": "eni-attach-123"},
+    }
+
+    assert delete_network_interface(ec2_client, network_interface, time.monotonic()) is None
+    ec2_client.delete_network_interface.assert_not_called()
+
+
+def test_get_deadline():
+    from custom_resources.vpc_eni_lambda.delete_lambda_eni import get_deadline, DEADLINE_MARGIN_SECONDS
+
+    context = MagicMock()
+    context.get_remaining_time_in_millis.return_value = 900_000
+    assert get_deadline(context) - time.monotonic() == pytest.approx(900 - DEADLINE_MARGIN_SECONDS, abs=1)
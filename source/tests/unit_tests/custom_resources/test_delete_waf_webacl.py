@@ -20,7 +20,7 @@ def test_event_handler(helper_mock, _):
     helper_mock.assert_called_once()
 
 
-@patch("custom_resources.waf_webacl_lambda.delete_waf_webacl.boto3.client")
+@patch("custom_resources.waf_webacl_lambda.delete_waf_webacl.get_service_client")
 @patch("crhelper.CfnResource")
 def test_on_delete(_, mock_boto3):
     event = {
@@ -42,8 +42,14 @@ def test_on_delete(_, mock_boto3):
 
     mock_boto3.return_value.get_distribution_config.return_value = cf_resp
     mock_boto3.return_value.update_distribution.return_value = None
+    mock_boto3.return_value.get_web_acl.return_value = {"LockToken": "current_lock_token"}
     mock_boto3.return_value.delete_web_acl.return_value = None
     from custom_resources.waf_webacl_lambda.delete_waf_webacl import on_delete
 
     with patch("custom_resources.waf_webacl_lambda.delete_waf_webacl.helper.Data", {}):
-        on_delete(event, None)
\ No newline at end of file
+        on_delete(event, None)
+
+    # the lock token of the properties is stale after the rules are updated
+    mock_boto3.return_value.delete_web_acl.assert_called_once_with(
+        Name="test_name", Scope="CLOUDFRONT", Id=1234, LockToken="current_lock_token"
+    )
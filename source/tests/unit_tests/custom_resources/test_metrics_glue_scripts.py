@@ -9,14 +9,16 @@
 
 import sys
 import os
+import re
 import boto3
 import json
 import contextlib
+from pathlib import Path
 
 import pytest
 from moto import mock_aws
 from unittest.mock import MagicMock, patch
-from unit_tests.test_commons import FakeClass
+from unit_tests.test_commons import FakeClass, METRIC_REPORTER_LINES
 
 DATABASE_NAME = "test-db"
 
@@ -119,6 +121,51 @@ def test_apply_regex_pattern():
     apply_regex_pattern(dataframe=mock_def, column=mock_def)
 
 
+def test_apply_regex_pattern_reads_legacy_reporter_lines():
+    import custom_resources.artifacts_bucket_lambda.files.glue.metrics_glue_script as glue_script
+
+    schema = json.loads((Path(__file__).parents[3] / "infrastructure" / "prebid_server" / "prebid_metrics_schema.json").read_text())
+
+    def regexp_extract(message, regex, group):
+        match = re.search(regex, message)
+        return match.group(group) if match else ""
+
+    # lines written before the fields were split out carry the reporter line in their message
+    with patch.object(glue_script, "regexp_extract", side_effect=regexp_extract):
+        for message in METRIC_REPORTER_LINES:
+            fields = dict(field.split("=", 1) for field in re.split(r", (?=\w+=)", message))
+            columns = [column for column in schema[fields["type"].capitalize()] if column not in ("container_id", "timestamp")]
+            assert {column: glue_script.apply_regex_pattern({"message": message}, column) for column in columns} == {
+                column: fields[column].split(",")[0] for column in columns
+            }
+
+
+def test_extract_metric_field():
+    from custom_resources.artifacts_bucket_lambda.files.glue.metrics_glue_script import extract_metric_field
+
+    # structured log lines are read directly, as strings cast to the column types later
+    dataframe = MagicMock()
+    dataframe.columns = ["timestamp", "containerId", "type", "name", "count"]
+    extract_metric_field(dataframe=dataframe, column="count")
+    dataframe.__getitem__.assert_called_once_with("count")
+    dataframe.__getitem__.return_value.cast.assert_called_once_with("string")
+    dataframe.withColumn.assert_called_once()
+
+    # columns missing from every line are added empty
+    dataframe = MagicMock()
+    dataframe.columns = ["timestamp", "containerId", "type", "name", "count"]
+    extract_metric_field(dataframe=dataframe, column="p999")
+    dataframe.__getitem__.assert_not_called()
+    dataframe.withColumn.assert_called_once()
+
+    # legacy log lines are parsed from the message
+    dataframe = MagicMock()
+    dataframe.columns = ["timestamp", "containerId", "message", "count"]
+    extract_metric_field(dataframe=dataframe, column="count")
+    dataframe.__getitem__.assert_any_call("message")
+    dataframe.withColumn.assert_called_once()
+
+
 def test_create_metric_node():
     from custom_resources.artifacts_bucket_lambda.files.glue.metrics_glue_script import create_metric_node
 
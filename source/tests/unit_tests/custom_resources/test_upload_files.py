@@ -36,23 +36,28 @@ def test_on_create_or_update(mock_upload_file, _):
     )
 
 @patch("crhelper.CfnResource")
-@patch("custom_resources.artifacts_bucket_lambda.upload_files.s3_client")
-@patch("custom_resources.artifacts_bucket_lambda.upload_files.os.walk")
+@patch("custom_resources.artifacts_bucket_lambda.upload_files.sync_directory")
+@patch("custom_resources.artifacts_bucket_lambda.upload_files.os.path.isdir")
 @patch("custom_resources.artifacts_bucket_lambda.upload_files.os.listdir")
-def test_upload_file(mock_listdir, mock_walk, mock_s3_client, _):
+def test_upload_file(mock_listdir, mock_isdir, mock_sync_directory, _):
     from custom_resources.artifacts_bucket_lambda.upload_files import upload_file
 
-    mock_walk.return_value = [("/some/root", ["dir1", "dir2"], [])]
-    mock_listdir.return_value = ["file1.txt", "file2.txt"]
+    mock_listdir.return_value = ["dir2", "__init__.py", "__pycache__", "dir1"]
+    mock_isdir.side_effect = lambda path: not path.endswith(".py")
+    mock_sync_directory.side_effect = lambda bucket, path, prefix: {
+        "uploaded": [f"{prefix}/file1.txt"],
+        "unchanged": [f"{prefix}/file2.txt"],
+        "deleted": [],
+    }
 
     test_properties = {
         "artifacts_bucket_name": "test_bucket"
     }
-    upload_file(resource_properties=test_properties)
+    response = upload_file(resource_properties=test_properties)
 
-    mock_s3_client.upload_file.assert_has_calls([
-        call('/some/root/dir1/file1.txt', 'test_bucket', 'dir1/file1.txt'),
-        call('/some/root/dir1/file2.txt', 'test_bucket', 'dir1/file2.txt'),
-        call('/some/root/dir2/file1.txt', 'test_bucket', 'dir2/file1.txt'),
-        call('/some/root/dir2/file2.txt', 'test_bucket', 'dir2/file2.txt')
+    mock_sync_directory.assert_has_calls([
+        call('test_bucket', 'files/dir1', 'dir1'),
+        call('test_bucket', 'files/dir2', 'dir2'),
     ])
+    assert mock_sync_directory.call_count == 2
+    assert response == ["dir1/file1.txt", "dir2/file1.txt"]
@@ -8,9 +8,10 @@
 #   ./run-unit-tests.sh --test-file-name prebid_server/test_container_stop_logs.py
 ###############################################################################
 
+import gzip
 import os
-from pathlib import Path
-from unittest.mock import patch, MagicMock, Mock
+import time
+from unittest.mock import patch, Mock
 from datetime import datetime, timezone
 
 
@@ -31,7 +32,7 @@ EVENT_DETAIL = {
 
 
 @patch.dict(os.environ, test_environ, clear=True)
-@patch('aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics.Metrics.put_metrics_count_value_1')
+@patch('aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics.Metrics.flush')
 @patch("prebid_server.efs_cleanup_lambda.container_stop_logs.logger")
 @patch("prebid_server.efs_cleanup_lambda.container_stop_logs.Path")
 @patch("prebid_server.efs_cleanup_lambda.container_stop_logs.compress_log_file")
@@ -49,30 +50,94 @@ def test_event_handler(mock_compress_log_file, mock_path, mock_logger, mock_metr
     assert mock_compress_log_file.call_count == 1
 
 
+def settle(*paths):
+    # rolled fragments are only compressed once logback has stopped writing them
+    for path in paths:
+        os.utime(path, (time.time() - 60, time.time() - 60))
+
+
 @patch.dict(os.environ, test_environ, clear=True)
-@patch("prebid_server.efs_cleanup_lambda.container_stop_logs.create_or_retreive_archived_folder")
-@patch("prebid_server.efs_cleanup_lambda.container_stop_logs.tarfile.open")
 @patch("prebid_server.efs_cleanup_lambda.container_stop_logs.logger")
-@patch("pathlib.Path.exists", return_value=True)
-def test_compress_log_file( mock_path_exists, mock_logger, mock_tarfile_open, mock_create_or_retreive_archived_folder):
+def test_compress_log_file(mock_logger, tmp_path):
     from prebid_server.efs_cleanup_lambda.container_stop_logs import compress_log_file
 
-    log_folder_path = Path("/path/to/log/folder")
-    log_file_name = "example.log"
+    log_lines = b'{"message":"type=COUNTER, name=requests, count=1"}\n' * 100
+    (tmp_path / "prebid-metrics.log").write_bytes(log_lines)
+    # leftover fragments logback did not compress before the container stopped
+    (tmp_path / "prebid-metrics.log123.tmp").write_bytes(log_lines)
+    (tmp_path / "archived").mkdir()
+    (tmp_path / "archived" / "prebid-metrics.2024-01-01_10.0.log").write_bytes(log_lines)
+    settle(tmp_path / "prebid-metrics.log123.tmp", tmp_path / "archived" / "prebid-metrics.2024-01-01_10.0.log")
+
+    compress_log_file(tmp_path, "prebid-metrics.log", compression_level=1)
+
+    utc_time = datetime.now(timezone.utc)
+    hour = f"{utc_time.year}-{utc_time.month:02d}-{utc_time.day:02d}_{utc_time.hour:02d}"
+    archives = sorted((tmp_path / "archived").glob("*.log.gz"))
+    # archives follow the logback .%d{yyyy-MM-dd_HH}.%i.log.gz layout
+    assert [archive.name for archive in archives] == [f"prebid-metrics.{hour}.{index}.log.gz" for index in range(3)]
+    for archive in archives:
+        # plain gzip stream of JSON lines, not a tar archive
+        with gzip.open(archive, "rb") as f:
+            assert f.read() == log_lines
+
+    # the active log file is kept, compressed fragments and temporary files are removed
+    assert (tmp_path / "prebid-metrics.log").exists()
+    assert not (tmp_path / "prebid-metrics.log123.tmp").exists()
+    assert not (tmp_path / "archived" / "prebid-metrics.2024-01-01_10.0.log").exists()
+    assert not list(tmp_path.glob("**/*.partial"))
+    assert mock_logger.info.call_count == 3
 
-    mock_create_or_retreive_archived_folder.return_value = Path(
-        "/path/to/folder/archived")
-    mock_path_exists.return_value = True
-    mock_tarfile = MagicMock()
-    mock_tarfile_open.return_value.__enter__.return_value = mock_tarfile
 
-    compress_log_file(log_folder_path, log_file_name)
+@patch.dict(os.environ, test_environ, clear=True)
+@patch("prebid_server.efs_cleanup_lambda.container_stop_logs.logger")
+def test_compress_log_file_unique_names(mock_logger, tmp_path):
+    from prebid_server.efs_cleanup_lambda.container_stop_logs import compress_log_file
 
     utc_time = datetime.now(timezone.utc)
-    expected_file_to_compress = f"/path/to/folder/archived/example.{utc_time.year}-{utc_time.month:02d}-{utc_time.day:02d}_{utc_time.hour:02d}.log.gz"
+    hour = f"{utc_time.year}-{utc_time.month:02d}-{utc_time.day:02d}_{utc_time.hour:02d}"
+    (tmp_path / "archived").mkdir()
+    (tmp_path / "archived" / f"prebid-metrics.{hour}.4.log.gz").write_bytes(b"")
+    settle(tmp_path / "archived" / f"prebid-metrics.{hour}.4.log.gz")
+    (tmp_path / "prebid-metrics.log").write_bytes(b"{}\n")
+    compress_log_file(tmp_path, "prebid-metrics.log")
+    compress_log_file(tmp_path, "prebid-metrics.log")
+
+    # two stops in the same hour are numbered after the logback archives of the hour
+    assert sorted(archive.name for archive in (tmp_path / "archived").glob("*.log.gz")) == [
+        f"prebid-metrics.{hour}.{index}.log.gz" for index in (4, 5, 6)
+    ]
+
+
+@patch.dict(os.environ, test_environ, clear=True)
+@patch("prebid_server.efs_cleanup_lambda.container_stop_logs.logger")
+def test_compress_log_file_skips_changing_fragments(mock_logger, tmp_path):
+    from prebid_server.efs_cleanup_lambda.container_stop_logs import compress_log_file
+
+    (tmp_path / "prebid-metrics.log").write_bytes(b"{}\n")
+    (tmp_path / "prebid-metrics.log123.tmp").write_bytes(b"{}\n")
+    settle(tmp_path / "prebid-metrics.log123.tmp")
+    # logback is still compressing the .tmp file into this archive
+    (tmp_path / "archived").mkdir()
+    (tmp_path / "archived" / "prebid-metrics.2024-01-01_10.0.log.gz").write_bytes(b"")
+    # a fragment still being written
+    (tmp_path / "archived" / "prebid-metrics.2024-01-01_10.1.log").write_bytes(b"{}\n")
+
+    compress_log_file(tmp_path, "prebid-metrics.log")
+
+    assert (tmp_path / "prebid-metrics.log123.tmp").exists()
+    assert (tmp_path / "archived" / "prebid-metrics.2024-01-01_10.1.log").exists()
+    assert mock_logger.info.call_count == 1
+
+
+@patch.dict(os.environ, test_environ, clear=True)
+@patch("prebid_server.efs_cleanup_lambda.container_stop_logs.logger")
+def test_compress_log_file_missing(mock_logger, tmp_path):
+    from prebid_server.efs_cleanup_lambda.container_stop_logs import compress_log_file
+
+    compress_log_file(tmp_path, "prebid-metrics.log")
 
-    mock_tarfile.add.assert_called_with(Path("/path/to/log/folder/example.log"))
-    mock_logger.info.assert_called_with(f"Log file compressed: {expected_file_to_compress}")
+    mock_logger.warning.assert_called_once_with(f"{tmp_path / 'prebid-metrics.log'} does not exist")
 
 
 @patch.dict(os.environ, test_environ, clear=True)
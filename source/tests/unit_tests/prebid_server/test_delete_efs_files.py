@@ -24,10 +24,11 @@ test_environ = {
     "EFS_LOGS" : "logs",
     "SOLUTION_VERSION" : "v1.9.99",
     "SOLUTION_ID" : "SO000123",
+    "AWS_REGION": "us-east-1",
 }
 
 @patch.dict(os.environ, test_environ, clear=True)
-@patch('aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics.Metrics.put_metrics_count_value_1')
+@patch('aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics.Metrics.flush')
 @patch('aws_lambda_layers.datasync_s3_layer.python.datasync_reports.reports.get_transferred_object_keys')
 @patch('os.remove')
 @patch('aws_lambda_powertools.Logger.info')
@@ -10,6 +10,8 @@
 import os
 import json
 
+import pytest
+from botocore.exceptions import ClientError
 from unittest.mock import patch
 
 GLUE_JOB_NAME = "test-glue-job"
@@ -26,9 +28,9 @@ test_environ = {
 }
 
 @patch.dict(os.environ, test_environ, clear=True)
-@patch('aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics.Metrics.put_metrics_count_value_1')
+@patch('aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics.Metrics.flush')
 @patch('aws_lambda_layers.datasync_s3_layer.python.datasync_reports.reports.get_transferred_object_keys')
-@patch('boto3.client')
+@patch('prebid_server.glue_trigger_lambda.start_glue_job.get_service_client')
 def test_event_handler(
     mock_boto3, 
     mock_get_transferred_object_keys,
@@ -59,3 +61,70 @@ def test_event_handler(
     }
     event_handler(test_event_1, None)
     mock_boto3.return_value.start_job_run.assert_not_called()
+
+
+@patch.dict(os.environ, test_environ, clear=True)
+@patch('aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics.Metrics.flush')
+@patch('aws_lambda_layers.datasync_s3_layer.python.datasync_reports.reports.get_transferred_object_keys')
+@patch('prebid_server.glue_trigger_lambda.start_glue_job.get_service_client')
+def test_event_handler_object_created_events(
+    mock_boto3,
+    mock_get_transferred_object_keys,
+    mock_metrics
+    ):
+    from prebid_server.glue_trigger_lambda.start_glue_job import event_handler
+
+    mock_metrics.return_value = None
+
+    def sqs_record(key):
+        return {"messageId": key, "body": json.dumps({"detail-type": "Object Created", "detail": {"object": {"key": key}}})}
+
+    # test starting one glue job for a batch of S3 events, with retried uploads deduplicated
+    test_event = {
+        "Records": [
+            sqs_record("container2/archived/prebid-metrics.2026-10-19_07.0.log.gz"),
+            sqs_record("container1/archived/prebid-metrics.2026-10-19_07.0.log.gz"),
+            sqs_record("container2/archived/prebid-metrics.2026-10-19_07.0.log.gz"),
+        ]
+    }
+    assert event_handler(test_event, None) == {"batchItemFailures": []}
+    mock_get_transferred_object_keys.assert_not_called()
+    mock_boto3.return_value.start_job_run.assert_called_once_with(
+        JobName=GLUE_JOB_NAME,
+        Arguments={
+            "--object_keys": json.dumps([
+                "container1/archived/prebid-metrics.2026-10-19_07.0.log.gz",
+                "container2/archived/prebid-metrics.2026-10-19_07.0.log.gz",
+            ])
+        }
+    )
+
+
+@patch.dict(os.environ, test_environ, clear=True)
+@patch('aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics.Metrics.flush')
+@patch('prebid_server.glue_trigger_lambda.start_glue_job.get_service_client')
+def test_event_handler_retries_batch_at_max_concurrent_runs(mock_boto3, mock_metrics):
+    from prebid_server.glue_trigger_lambda.start_glue_job import event_handler
+
+    mock_metrics.return_value = None
+    test_event = {
+        "Records": [
+            {"messageId": f"message{index}", "body": json.dumps({"detail": {"object": {"key": f"key{index}"}}})}
+            for index in range(2)
+        ]
+    }
+
+    # every message of the batch is retried after the visibility timeout, and moves to the dead-letter queue eventually
+    mock_boto3.return_value.start_job_run.side_effect = ClientError(
+        {"Error": {"Code": "ConcurrentRunsExceededException", "Message": "Concurrent runs exceeded"}}, "StartJobRun"
+    )
+    assert event_handler(test_event, None) == {
+        "batchItemFailures": [{"itemIdentifier": "message0"}, {"itemIdentifier": "message1"}]
+    }
+
+    # other errors fail the invocation
+    mock_boto3.return_value.start_job_run.side_effect = ClientError(
+        {"Error": {"Code": "AccessDeniedException", "Message": "Access denied"}}, "StartJobRun"
+    )
+    with pytest.raises(ClientError):
+        event_handler(test_event, None)
@@ -0,0 +1,221 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+# ###############################################################################
+# PURPOSE:
+#   * Unit test for infrastructure/prebid_server/scheduled_scaling_lambda/update_scheduled_actions.py.
+# USAGE:
+#   ./run-unit-tests.sh --test-file-name prebid_server/test_update_scheduled_actions.py
+###############################################################################
+
+import os
+from datetime import datetime, timezone
+
+from unittest.mock import MagicMock, patch
+
+RESOURCE_ID = "service/test-cluster/test-service"
+
+test_environ = {
+    "RESOURCE_ID": RESOURCE_ID,
+    "LOAD_BALANCER_FULL_NAME": "app/test-alb/123",
+    "TARGET_GROUP_FULL_NAME": "targetgroup/test-tg/456",
+    "TASK_MIN_CAPACITY": "2",
+    "TASK_MAX_CAPACITY": "10",
+    "REQUESTS_PER_TARGET": "100",
+    "HEADROOM_PCT": "25",
+    "LOOKBACK_WEEKS": "2",
+    "LEAD_MINUTES": "15",
+    "METRICS_NAMESPACE": "test-namespace",
+    "RESOURCE_PREFIX": "test-prefix",
+    "SOLUTION_VERSION": "v0.0.0",
+    "SOLUTION_ID": "SO0248",
+    "AWS_REGION": "us-east-1"
+}
+
+
+def mock_client(pages):
+    client = MagicMock()
+    client.get_paginator.return_value.paginate.return_value = pages
+    return client
+
+
+@patch.dict(os.environ, test_environ, clear=True)
+@patch('aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics.Metrics.flush')
+def test_get_peak_requests_per_minute(mock_metrics):
+    from prebid_server.scheduled_scaling_lambda.update_scheduled_actions import get_peak_requests_per_minute
+
+    # 2024-01-01 is a Monday, the peak of each hour of the week is kept across weeks
+    cloudwatch = mock_client([{
+        "MetricDataResults": [{
+            "Timestamps": [
+                datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc),
+                datetime(2024, 1, 1, 9, 5, tzinfo=timezone.utc),
+                datetime(2024, 1, 8, 9, 10, tzinfo=timezone.utc),
+                datetime(2024, 1, 2, 0, 0, tzinfo=timezone.utc),
+            ],
+            "Values": [1500.0, 3000.0, 2000.0, 500.0],
+        }]
+    }])
+
+    peaks = get_peak_requests_per_minute(cloudwatch, datetime(2024, 1, 14, tzinfo=timezone.utc))
+
+    assert peaks == {9: 600.0, 24: 100.0}
+    query = cloudwatch.get_paginator.return_value.paginate.call_args.kwargs
+    assert query["StartTime"] == datetime(2023, 12, 31, tzinfo=timezone.utc)
+    assert query["MetricDataQueries"][0]["MetricStat"]["Metric"]["MetricName"] == "RequestCount"
+
+
+@patch.dict(os.environ, test_environ, clear=True)
+@patch('aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics.Metrics.flush')
+def test_build_schedule(mock_metrics):
+    from prebid_server.scheduled_scaling_lambda.update_scheduled_actions import (
+        HOURS_PER_WEEK,
+        build_schedule,
+        capacity_floor,
+    )
+
+    # floors are clamped to the task capacity of the service
+    assert capacity_floor(0) == 2
+    assert capacity_floor(600) == 8
+    assert capacity_floor(100000) == 10
+
+    # only the hours where the floor changes get an action, started ahead of the hour
+    floors = [2] * HOURS_PER_WEEK
+    floors[0:2] = [5, 5]
+    floors[33] = 8
+    assert build_schedule(floors) == {
+        "prebid-capacity-floor-MON-00": {"Schedule": "cron(45 23 ? * SUN *)", "MinCapacity": 5},
+        "prebid-capacity-floor-MON-02": {"Schedule": "cron(45 1 ? * MON *)", "MinCapacity": 2},
+        "prebid-capacity-floor-TUE-09": {"Schedule": "cron(45 8 ? * TUE *)", "MinCapacity": 8},
+        "prebid-capacity-floor-TUE-10": {"Schedule": "cron(45 9 ? * TUE *)", "MinCapacity": 2},
+    }
+
+    # a constant floor needs one action, also at the minimum capacity so the floor of replaced actions is restored
+    assert build_schedule([2] * HOURS_PER_WEEK) == {
+        "prebid-capacity-floor-MON-00": {"Schedule": "cron(45 23 ? * SUN *)", "MinCapacity": 2},
+    }
+    assert build_schedule([4] * HOURS_PER_WEEK) == {
+        "prebid-capacity-floor-MON-00": {"Schedule": "cron(45 23 ? * SUN *)", "MinCapacity": 4},
+    }
+
+
+@patch.dict(os.environ, test_environ, clear=True)
+@patch('aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics.Metrics.flush')
+def test_update_scheduled_actions(mock_metrics):
+    from prebid_server.scheduled_scaling_lambda.update_scheduled_actions import update_scheduled_actions
+
+    autoscaling = mock_client([{
+        "ScheduledActions": [
+            {
+                "ScheduledActionName": "prebid-capacity-floor-MON-00",
+                "Schedule": "cron(45 23 ? * SUN *)",
+                "ScalableTargetAction": {"MinCapacity": 5},
+            },
+            {
+                "ScheduledActionName": "prebid-capacity-floor-FRI-18",
+                "Schedule": "cron(45 17 ? * FRI *)",
+                "ScalableTargetAction": {"MinCapacity": 6},
+            },
+            {
+                "ScheduledActionName": "other-action",
+                "Schedule": "cron(0 0 ? * SUN *)",
+                "ScalableTargetAction": {"MinCapacity": 3},
+            },
+        ]
+    }])
+    schedule = {
+        "prebid-capacity-floor-MON-00": {"Schedule": "cron(45 23 ? * SUN *)", "MinCapacity": 5},
+        "prebid-capacity-floor-MON-02": {"Schedule": "cron(45 1 ? * MON *)", "MinCapacity": 2},
+    }
+
+    result = update_scheduled_actions(autoscaling, schedule)
+
+    # unchanged actions are not written again, and actions not created by the function are left alone
+    assert result == {"updated": ["prebid-capacity-floor-MON-02"], "deleted": ["prebid-capacity-floor-FRI-18"]}
+    autoscaling.delete_scheduled_action.assert_called_once_with(
+        ServiceNamespace="ecs",
+        ScheduledActionName="prebid-capacity-floor-FRI-18",
+        ResourceId=RESOURCE_ID,
+        ScalableDimension="ecs:service:DesiredCount",
+    )
+    autoscaling.put_scheduled_action.assert_called_once_with(
+        ServiceNamespace="ecs",
+        ScheduledActionName="prebid-capacity-floor-MON-02",
+        ResourceId=RESOURCE_ID,
+        ScalableDimension="ecs:service:DesiredCount",
+        Schedule="cron(45 1 ? * MON *)",
+        Timezone="UTC",
+        ScalableTargetAction={"MinCapacity": 2},
+    )
+
+
+@patch.dict(os.environ, test_environ, clear=True)
+@patch('aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics.Metrics.flush')
+@patch('prebid_server.scheduled_scaling_lambda.update_scheduled_actions.get_service_client')
+def test_event_handler(mock_boto3, mock_metrics):
+    from prebid_server.scheduled_scaling_lambda.update_scheduled_actions import event_handler
+
+    mock_metrics.return_value = None
+    mock_boto3.return_value.get_paginator.return_value.paginate.return_value = []
+
+    # without traffic history the floor is the minimum capacity, written as a single action
+    assert event_handler({}, None) == {"updated": ["prebid-capacity-floor-MON-00"], "deleted": []}
+    mock_boto3.return_value.put_scheduled_action.assert_called_once()
+    assert mock_boto3.return_value.put_scheduled_action.call_args.kwargs["ScalableTargetAction"] == {"MinCapacity": 2}
+    mock_boto3.return_value.register_scalable_target.assert_called_once_with(
+        ServiceNamespace="ecs",
+        ResourceId=RESOURCE_ID,
+        ScalableDimension="ecs:service:DesiredCount",
+        MinCapacity=2,
+    )
+
+
+@patch.dict(os.environ, test_environ, clear=True)
+@patch('aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics.Metrics.flush')
+@patch('prebid_server.scheduled_scaling_lambda.update_scheduled_actions.get_service_client')
+def test_event_handler_restores_minimum_capacity_when_floors_flatten(mock_boto3, mock_metrics):
+    from prebid_server.scheduled_scaling_lambda.update_scheduled_actions import event_handler
+
+    mock_metrics.return_value = None
+    cloudwatch = mock_client([])
+    # the last action that ran raised the floor to 8 tasks, and the traffic dropped since
+    autoscaling = mock_client([{
+        "ScheduledActions": [
+            {
+                "ScheduledActionName": "prebid-capacity-floor-TUE-09",
+                "Schedule": "cron(45 8 ? * TUE *)",
+                "ScalableTargetAction": {"MinCapacity": 8},
+            },
+            {
+                "ScheduledActionName": "prebid-capacity-floor-TUE-10",
+                "Schedule": "cron(45 9 ? * TUE *)",
+                "ScalableTargetAction": {"MinCapacity": 5},
+            },
+        ]
+    }])
+    mock_boto3.side_effect = lambda service_name: cloudwatch if service_name == "cloudwatch" else autoscaling
+
+    result = event_handler({}, None)
+
+    assert result == {
+        "updated": ["prebid-capacity-floor-MON-00"],
+        "deleted": ["prebid-capacity-floor-TUE-09", "prebid-capacity-floor-TUE-10"],
+    }
+    autoscaling.put_scheduled_action.assert_called_once()
+    assert autoscaling.put_scheduled_action.call_args.kwargs["ScalableTargetAction"] == {"MinCapacity": 2}
+    assert autoscaling.register_scalable_target.call_args.kwargs["MinCapacity"] == 2
+
+
+@patch.dict(os.environ, test_environ, clear=True)
+@patch('aws_lambda_layers.metrics_layer.python.cloudwatch_metrics.metrics.Metrics.flush')
+def test_set_current_floor(mock_metrics):
+    from prebid_server.scheduled_scaling_lambda.update_scheduled_actions import HOURS_PER_WEEK, set_current_floor
+
+    autoscaling = MagicMock()
+    floors = [2] * HOURS_PER_WEEK
+    floors[33] = 8
+
+    # 2024-01-02 is a Tuesday, the floor of 09:00 applies from 08:45 like its scheduled action
+    set_current_floor(autoscaling, floors, datetime(2024, 1, 2, 8, 40, tzinfo=timezone.utc))
+    assert autoscaling.register_scalable_target.call_args.kwargs["MinCapacity"] == 2
+    set_current_floor(autoscaling, floors, datetime(2024, 1, 2, 8, 50, tzinfo=timezone.utc))
+    assert autoscaling.register_scalable_target.call_args.kwargs["MinCapacity"] == 8
@@ -0,0 +1,98 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+# ###############################################################################
+# PURPOSE:
+#   * Unit test for infrastructure/prebid_server/cloudfront_functions/validate_request.js.
+#   * The rendered function code is run with Node.js against CloudFront Function viewer request events.
+# USAGE:
+#   ./run-unit-tests.sh --test-file-name prebid_server/test_validate_request_function.py
+###############################################################################
+
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from prebid_server.cloudfront_waf_construct import render_validate_request_function
+
+RULES = {
+    "/openrtb2/auction": {
+        "methods": ["POST", "OPTIONS"],
+        "content_types": ["application/json", "text/plain"],
+        "max_body_bytes": 1024,
+        "required_query_strings": ["account"],
+        "required_headers": ["x-publisher"],
+    },
+}
+
+
+def viewer_request(uri="/openrtb2/auction", method="POST", headers=None, querystring=None):
+    if headers is None:
+        headers = {"content-type": "text/plain;charset=utf-8", "content-length": "512", "x-publisher": "pub"}
+    if querystring is None:
+        querystring = {"account": {"value": "1001"}}
+    return {
+        "version": "1.0",
+        "context": {"eventType": "viewer-request"},
+        "viewer": {"ip": "192.0.2.1"},
+        "request": {
+            "method": method,
+            "uri": uri,
+            "querystring": querystring,
+            "headers": {name: {"value": value} for name, value in headers.items()},
+            "cookies": {},
+        },
+    }
+
+
+def run_function(events):
+    """
+    Returns the result of the function handler for each event
+    """
+    program = (
+        render_validate_request_function(RULES)
+        + f"\nconsole.log(JSON.stringify({json.dumps(events)}.map(function (event) {{ return handler(event); }})));\n"
+    )
+    completed = subprocess.run(["node", "-e", program], capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout)
+
+
+def status_codes(events):
+    return [result.get("statusCode", "pass") for result in run_function(events)]
+
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="Node.js is required to run the function code")
+
+
+def test_valid_requests_are_passed_to_the_origin():
+    events = [
+        viewer_request(),
+        viewer_request(headers={"content-type": "application/json", "content-length": "1024", "x-publisher": "pub"}),
+        viewer_request(method="OPTIONS", headers={"x-publisher": "pub"}),
+        # paths without rules are not validated
+        viewer_request(uri="/openrtb2/amp", method="GET", headers={}, querystring={}),
+    ]
+    results = run_function(events)
+
+    assert results == [event["request"] for event in events]
+
+
+def test_invalid_requests_are_rejected_at_the_edge():
+    assert status_codes([
+        viewer_request(method="GET"),
+        viewer_request(headers={"content-type": "application/x-www-form-urlencoded", "x-publisher": "pub"}),
+        viewer_request(headers={"content-length": "512", "x-publisher": "pub"}),
+        viewer_request(headers={"content-type": "application/json", "content-length": "1025", "x-publisher": "pub"}),
+        viewer_request(querystring={}),
+        viewer_request(headers={"content-type": "text/plain", "content-length": "512"}),
+    ]) == [405, 415, 415, 413, 400, 400]
+
+
+def test_default_rules_accept_prebid_js_auctions():
+    import prebid_server.stack_constants as globals
+
+    rules = globals.CLOUDFRONT_EDGE_VALIDATION_RULES["/openrtb2/auction"]
+    assert "text/plain" in rules["content_types"]
+    assert "OPTIONS" in rules["methods"]
+    assert "__VALIDATION_RULES__" not in render_validate_request_function(globals.CLOUDFRONT_EDGE_VALIDATION_RULES)
@@ -2,8 +2,10 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import importlib
+import importlib.util
 import logging
 from functools import wraps
+from pathlib import Path
 from unittest.mock import patch
 from contextlib import ExitStack, contextmanager
 
@@ -22,6 +24,32 @@ def reload_module(module):
     importlib.reload(module)
 
 
+CONTAINER_SCRIPTS_DIR = Path(__file__).parents[3] / "deployment" / "ecr" / "prebid-server"
+
+
+# lines of the Dropwizard Metrics Slf4jReporter used by Prebid Server, one per metric type
+METRIC_REPORTER_LINES = [
+    "type=COUNTER, name=requests.ok.openrtb2-web, count=1287",
+    "type=GAUGE, name=vertx.http.clients.connections, value=12",
+    "type=GAUGE, name=adapter.appnexus.bidders, value=[appnexus, \"ix\"]",
+    "type=HISTOGRAM, name=prebid.cache.creative_size.banner, count=52, min=312, max=4871, mean=1523.4, "
+    "stddev=811.2, p50=1290.0, p75=2011.0, p95=3422.0, p98=4100.0, p99=4512.0, p999=4871.0",
+    "type=METER, name=requests.ok.openrtb2-app, count=3, m1_rate=1.0E-4, m5_rate=0.0, m15_rate=0.0, "
+    "mean_rate=0.012, rate_unit=events/second",
+    "type=TIMER, name=request_time, count=1287, min=1.2, max=212.4, mean=23.5, stddev=12.1, p50=19.8, p75=28.3, "
+    "p95=51.0, p98=77.6, p99=98.2, p999=201.7, m1_rate=4.21, m5_rate=4.05, m15_rate=3.98, mean_rate=4.12, "
+    "rate_unit=events/second, duration_unit=milliseconds",
+]
+
+
+def load_container_script(name):
+    """Import a script of the Prebid Server container image, the scripts are not part of a package"""
+    spec = importlib.util.spec_from_file_location(name, CONTAINER_SCRIPTS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
 aws_cdk_services = [
     "aws_cdk.Stack.of",
     "aws_cdk.aws_datasync",
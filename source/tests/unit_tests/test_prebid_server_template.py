@@ -7,6 +7,8 @@
 #   ./run-unit-tests.sh --test-file-name test_prebid_server_template.py
 ###############################################################################
 
+import json
+
 import pytest
 
 import aws_cdk as cdk
@@ -14,6 +16,7 @@ from aws_solutions.cdk import CDKSolution
 from aws_cdk.assertions import Template, Capture, Match
 
 import prebid_server.stack_constants as globals
+from prebid_server.prebid_firehose_constructs import DELIVERY_STREAM_NAME_MAX_LENGTH, STACK_ID_SUFFIX_LENGTH
 
 
 @pytest.fixture(scope="module")
@@ -32,6 +35,22 @@ def template(mock_solution):
     yield Template.from_stack(stack)
 
 
+@pytest.fixture(scope="module")
+def sidecar_template():
+    from prebid_server.prebid_server_stack import PrebidServerStack
+
+    # a synthesizer is bound to a single stack
+    mock_solution = CDKSolution(cdk_json_path="../source/infrastructure/cdk.json")
+    # the metrics sidecar is only synthesized when it is enabled in the stack constants
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(globals, "METRICS_SIDECAR_ENABLED", True)
+        app = cdk.App(context=mock_solution.context.context)
+        stack = PrebidServerStack(app, PrebidServerStack.name, description=PrebidServerStack.description,
+                                  template_filename=PrebidServerStack.template_filename,
+                                  synthesizer=mock_solution.synthesizer)
+        yield Template.from_stack(stack)
+
+
 @pytest.mark.run(order=2)
 def test_prebid_server_template(template):
     mapping_solution(template)
@@ -48,6 +67,7 @@ def test_prebid_server_template(template):
     waf_web_acl_function_policy(template)
     del_waf_acl_function_role(template)
     delete_waf_web_acl_custom_res(template)
+    cloudfront_path_behaviors(template)
     prebid_vpc(template)
     prebid_vpc_nat_gateway(template)
     prebid_vpc_subnet_ec2_route(template)
@@ -55,6 +75,13 @@ def test_prebid_server_template(template):
     prebid_efs_security_group(template)
     prebid_efs_access_point(template)
     prebid_task_default_policy(template)
+    prebid_task_jvm_profile(template)
+    prebid_task_warmup(template)
+    prebid_task_metrics_buffer(template)
+    prebid_task_metrics_log_router(template)
+    metrics_streaming_delivery_stream(template)
+    fargate_service_latency_scaling(template)
+    fargate_service_scheduled_scaling(template)
     prebid_elastic_load_balancer(template)
     prebid_public_load_balancing_listener(template)
     prebid_public_load_balancing_target_group(template)
@@ -73,6 +100,13 @@ def test_prebid_server_template(template):
     metrics_etl_timer_table(template)
 
 
+@pytest.mark.run(order=3)
+def test_prebid_server_template_metrics_sidecar(sidecar_template):
+    metrics_sidecar_container(sidecar_template)
+    metrics_sidecar_task_role_grants(sidecar_template)
+    metrics_sidecar_object_created_trigger(sidecar_template)
+
+
 def mapping_solution(template):
     template.has_mapping(
         "Solution",
@@ -438,7 +472,17 @@ def waf_web_acl_cr(template):
                     Match.string_like_regexp("CreateWafWebAclFunction"),
                     'Arn'
                 ]
-            }
+            },
+            'WAF_RULES_CONFIG': json.dumps(
+                {
+                    "forwarded_ip_header": globals.WAF_RATE_LIMIT_FORWARDED_IP_HEADER,
+                    "limit_per_forwarded_ip": globals.WAF_RATE_LIMIT_PER_FORWARDED_IP,
+                    "limit_per_ip": globals.WAF_RATE_LIMIT_PER_IP,
+                    "rate_limited_paths": globals.WAF_RATE_LIMITED_PATHS,
+                    "uninspected_paths": globals.WAF_UNINSPECTED_PATHS,
+                    "window_secs": globals.WAF_RATE_LIMIT_WINDOW_SECS,
+                }
+            ),
         }
     )
 
@@ -585,6 +629,66 @@ def delete_waf_web_acl_custom_res(template):
     })
 
 
+def cloudfront_path_behaviors(template):
+    template.has_resource_properties(
+        "AWS::CloudFront::Distribution",
+        {
+            "DistributionConfig": Match.object_like({
+                "CacheBehaviors": Match.array_with([
+                    Match.object_like({
+                        "PathPattern": "/info/bidders*",
+                        "AllowedMethods": ["GET", "HEAD", "OPTIONS"],
+                        "CachePolicyId": {"Ref": Match.string_like_regexp("InfoCachePolicy")},
+                    }),
+                    Match.object_like({
+                        "PathPattern": "/status",
+                        "CachePolicyId": {"Ref": Match.string_like_regexp("StatusCachePolicy")},
+                    }),
+                    Match.object_like({
+                        "PathPattern": "/openrtb2/*",
+                        "Compress": True,
+                        "CachePolicyId": {"Ref": Match.string_like_regexp("AuctionCachePolicy")},
+                        "OriginRequestPolicyId": {"Ref": Match.string_like_regexp("AuctionOriginRequestPolicy")},
+                    }),
+                ]),
+            }),
+        },
+    )
+    template.has_resource_properties(
+        "AWS::CloudFront::OriginRequestPolicy",
+        {
+            "OriginRequestPolicyConfig": Match.object_like({
+                "CookiesConfig": {"CookieBehavior": "whitelist", "Cookies": ["uids"]},
+                "HeadersConfig": {"HeaderBehavior": "whitelist", "Headers": globals.CLOUDFRONT_AUCTION_HEADERS},
+                "QueryStringsConfig": {"QueryStringBehavior": "all"},
+            }),
+        },
+    )
+    template.has_resource_properties(
+        "AWS::CloudFront::CachePolicy",
+        {
+            "CachePolicyConfig": Match.object_like({
+                "DefaultTTL": 0,
+                "MaxTTL": globals.CLOUDFRONT_AUCTION_MAX_TTL_SECS,
+                "ParametersInCacheKeyAndForwardedToOrigin": Match.object_like({
+                    "EnableAcceptEncodingBrotli": True,
+                    "EnableAcceptEncodingGzip": True,
+                    "QueryStringsConfig": {"QueryStringBehavior": "all"},
+                }),
+            }),
+        },
+    )
+    template.has_resource_properties(
+        "AWS::CloudFront::CachePolicy",
+        {
+            "CachePolicyConfig": Match.object_like({
+                "DefaultTTL": globals.CLOUDFRONT_INFO_CACHE_TTL_SECS,
+                "MaxTTL": globals.CLOUDFRONT_INFO_CACHE_TTL_SECS,
+            }),
+        },
+    )
+
+
 def prebid_vpc(template):
     template.has_resource_properties(
         "AWS::EC2::VPC", {
@@ -806,6 +910,29 @@ def prebid_task_default_policy(template):
                         'Action': 'ec2:DescribeAvailabilityZones',
                         'Effect': 'Allow',
                         'Resource': '*'
+                    },
+                    {
+                        'Action': 'firehose:PutRecordBatch',
+                        'Effect': 'Allow',
+                        'Resource': Match.any_value()
+                    },
+                    {
+                        'Action': [
+                            's3:GetObject',
+                            's3:GetBucketLocation'
+                        ],
+                        'Effect': 'Allow',
+                        'Resource': Match.any_value()
+                    },
+                    {
+                        'Action': 'kms:Decrypt',
+                        'Effect': 'Allow',
+                        'Resource': {
+                            'Fn::GetAtt': [
+                                Match.string_like_regexp("ArtifactsBucketKey"),
+                                'Arn'
+                            ]
+                        }
                     }
                 ],
                 'Version': '2012-10-17'
@@ -820,6 +947,225 @@ def prebid_task_default_policy(template):
     )
 
 
+def prebid_task_jvm_profile(template):
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "Cpu": str(globals.VCPU),
+            "Memory": str(globals.MEMORY_LIMIT_MIB),
+            "ContainerDefinitions": Match.array_with([
+                Match.object_like({
+                    "Environment": Match.array_with([
+                        {"Name": "JVM_PROFILE", "Value": globals.JVM_PROFILE},
+                        {"Name": "JVM_HEAP_PERCENTAGE", "Value": str(globals.JVM_HEAP_PERCENTAGE)},
+                        {"Name": "JVM_ACTIVE_PROCESSOR_COUNT", "Value": str(globals.JVM_ACTIVE_PROCESSOR_COUNT)},
+                    ])
+                })
+            ]),
+        },
+    )
+
+
+def prebid_task_warmup(template):
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": Match.array_with([
+                Match.object_like({
+                    "Environment": Match.array_with([
+                        {"Name": "WARMUP_ENABLED", "Value": "true"},
+                        {"Name": "WARMUP_PENDING_FILE", "Value": globals.WARMUP_PENDING_FILE},
+                        {"Name": "HEALTH_CHECK_PORT", "Value": str(globals.HEALTH_CHECK_PORT)},
+                    ]),
+                    "HealthCheck": Match.object_like({
+                        "Command": [
+                            "CMD-SHELL",
+                            f"[ ! -f {globals.WARMUP_PENDING_FILE} ] && curl -f {globals.HEALTH_ENDPOINT} || exit 1",
+                        ],
+                        "StartPeriod": globals.HEALTH_CHECK_START_PERIOD_SECS,
+                    }),
+                })
+            ]),
+        },
+    )
+    # the ALB health checks reach the health endpoint of the tasks
+    template.has_resource_properties(
+        "AWS::EC2::SecurityGroupIngress",
+        {
+            "IpProtocol": "tcp",
+            "FromPort": globals.HEALTH_CHECK_PORT,
+            "ToPort": globals.HEALTH_CHECK_PORT,
+            "SourceSecurityGroupId": Match.any_value(),
+        },
+    )
+
+
+def prebid_task_metrics_buffer(template):
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "EphemeralStorage": {"SizeInGiB": globals.EPHEMERAL_STORAGE_GIB},
+            "Volumes": Match.array_with([{"Name": globals.METRICS_BUFFER_VOLUME_NAME}]),
+            "ContainerDefinitions": Match.array_with([
+                Match.object_like({
+                    "Environment": Match.array_with([
+                        {"Name": "METRICS_BUFFER_DIR", "Value": globals.METRICS_BUFFER_PATH},
+                    ]),
+                    "MountPoints": Match.array_with([
+                        {
+                            "ContainerPath": globals.METRICS_BUFFER_PATH,
+                            "ReadOnly": False,
+                            "SourceVolume": globals.METRICS_BUFFER_VOLUME_NAME,
+                        }
+                    ]),
+                    "StopTimeout": globals.CONTAINER_STOP_TIMEOUT_SECS,
+                })
+            ]),
+        },
+    )
+
+
+def prebid_task_metrics_log_router(template):
+    # the log router, its mount and the dependency of Prebid Server on it only exist with streaming ingestion
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": Match.array_with([
+                Match.object_like({
+                    "Name": "Prebid-Container",
+                    "DependsOn": {
+                        "Fn::If": [
+                            "MetricsStreamingCondition",
+                            [{"Condition": "START", "ContainerName": "Metrics-LogRouter"}],
+                            {"Ref": "AWS::NoValue"},
+                        ]
+                    },
+                }),
+                {
+                    "Fn::If": [
+                        "MetricsStreamingCondition",
+                        Match.object_like({
+                            "Name": "Metrics-LogRouter",
+                            "Image": globals.FLUENT_BIT_IMAGE,
+                            "Essential": False,
+                            "FirelensConfiguration": {"Type": "fluentbit"},
+                            "MountPoints": [
+                                {
+                                    "ContainerPath": globals.METRICS_BUFFER_PATH,
+                                    "ReadOnly": True,
+                                    "SourceVolume": globals.METRICS_BUFFER_VOLUME_NAME,
+                                }
+                            ],
+                        }),
+                        {"Ref": "AWS::NoValue"},
+                    ]
+                },
+            ]),
+        },
+    )
+
+
+def metrics_streaming_delivery_stream(template):
+    template.resource_count_is("AWS::KinesisFirehose::DeliveryStream", 5)
+    template.has_resource(
+        "AWS::KinesisFirehose::DeliveryStream",
+        {
+            "Condition": "MetricsStreamingCondition",
+            "Properties": Match.object_like({
+                "ExtendedS3DestinationConfiguration": Match.object_like({
+                    "Prefix": "type=counter/year_month=!{partitionKeyFromQuery:year_month}/",
+                    "DynamicPartitioningConfiguration": {"Enabled": True},
+                    "DataFormatConversionConfiguration": Match.object_like({
+                        "Enabled": True,
+                        "InputFormatConfiguration": {
+                            "Deserializer": {
+                                "OpenXJsonSerDe": {
+                                    "CaseInsensitive": True,
+                                    "ColumnToJsonKeyMappings": {"container_id": "containerId"},
+                                }
+                            }
+                        },
+                        "SchemaConfiguration": Match.object_like({"TableName": "counter"}),
+                    }),
+                }),
+            }),
+        },
+    )
+
+    # the stack id suffix has a fixed length, unlike the stack name, so each name stays within the Firehose limit
+    for delivery_stream in template.find_resources("AWS::KinesisFirehose::DeliveryStream").values():
+        separator, parts = delivery_stream["Properties"]["DeliveryStreamName"]["Fn::Join"]
+        stack_id_suffix = {"Fn::Select": [4, {"Fn::Split": ["-", {"Fn::Select": [2, {"Fn::Split": ["/", {"Ref": "AWS::StackId"}]}]}]}]}
+        assert parts[0].startswith("prebid-metrics-")
+        assert parts[1:] == [stack_id_suffix]
+        assert len(parts[0]) + STACK_ID_SUFFIX_LENGTH <= DELIVERY_STREAM_NAME_MAX_LENGTH
+
+
+def fargate_service_latency_scaling(template):
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalingPolicy",
+        {
+            "PolicyType": "TargetTrackingScaling",
+            "TargetTrackingScalingPolicyConfiguration": Match.object_like({
+                "CustomizedMetricSpecification": {
+                    "Metrics": Match.array_with([
+                        Match.object_like({
+                            "Id": "response_time",
+                            "MetricStat": Match.object_like({"Stat": "p99"}),
+                        }),
+                        {"Expression": "response_time * 1000", "Id": "response_time_millis", "ReturnData": True},
+                    ]),
+                },
+                "DisableScaleIn": {"Fn::If": ["LatencyScalingScaleInCondition", False, True]},
+                "TargetValue": {"Ref": "ResponseTimeP99TargetMillis"},
+            }),
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalingPolicy",
+        {
+            "PolicyType": "TargetTrackingScaling",
+            "TargetTrackingScalingPolicyConfiguration": Match.object_like({
+                "CustomizedMetricSpecification": {
+                    "Metrics": Match.array_with([
+                        {"Expression": "requests / 60 * response_time", "Id": "in_flight", "ReturnData": True},
+                    ]),
+                },
+                "TargetValue": {"Ref": "InFlightRequestsPerTaskTarget"},
+            }),
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalingPolicy",
+        {
+            "PolicyType": "StepScaling",
+            "StepScalingPolicyConfiguration": Match.object_like({
+                "AdjustmentType": "PercentChangeInCapacity",
+                "StepAdjustments": [{"MetricIntervalLowerBound": 0, "ScalingAdjustment": {"Ref": "SpikeScaleOutPercent"}}],
+            }),
+        },
+    )
+
+
+def fargate_service_scheduled_scaling(template):
+    template.has_resource_properties(
+        "AWS::Lambda::Function",
+        {
+            "Handler": "update_scheduled_actions.event_handler",
+            "Environment": {
+                "Variables": Match.object_like({
+                    "TASK_MIN_CAPACITY": "2",
+                    "LEAD_MINUTES": "15",
+                }),
+            },
+        },
+    )
+    template.has_resource_properties(
+        "AWS::Events::Rule",
+        {"ScheduleExpression": "cron(45 23 * * ? *)"},
+    )
+
+
 def prebid_elastic_load_balancer(template):
     template.has_resource_properties(
         "AWS::ElasticLoadBalancingV2::LoadBalancer", {
@@ -876,10 +1222,15 @@ def prebid_public_load_balancing_target_group(template):
     template.has_resource_properties("AWS::ElasticLoadBalancingV2::TargetGroup", {
         'HealthCheckIntervalSeconds': 60,
         'HealthCheckPath': '/status',
+        'HealthCheckPort': str(globals.HEALTH_CHECK_PORT),
         'HealthCheckTimeoutSeconds': 5,
         'Port': 80,
         'Protocol': 'HTTP',
         'TargetGroupAttributes': [
+            {
+                'Key': 'slow_start.duration_seconds',
+                'Value': '120'
+            },
             {
                 'Key': 'stickiness.enabled',
                 'Value': 'false'
@@ -1200,15 +1551,15 @@ def metrics_etl_meter_table(template):
                         'Type': 'double'
                     },
                     {
-                        'Name': 'm1',
+                        'Name': 'm1_rate',
                         'Type': 'double'
                     },
                     {
-                        'Name': 'm5',
+                        'Name': 'm5_rate',
                         'Type': 'double'
                     },
                     {
-                        'Name': 'm15',
+                        'Name': 'm15_rate',
                         'Type': 'double'
                     },
                     {
@@ -1308,7 +1659,7 @@ def metrics_etl_histogram_table(template):
                         'Type': 'double'
                     },
                     {
-                        'Name': 'median',
+                        'Name': 'p50',
                         'Type': 'double'
                     },
                     {
@@ -1470,7 +1821,7 @@ def metrics_etl_counter_table(template):
                     },
                     {
                         'Name': 'count',
-                        'Type': 'int'
+                        'Type': 'bigint'
                     }
                 ],
                 'Compressed': True,
@@ -1556,7 +1907,7 @@ def metrics_etl_timer_table(template):
                         'Type': 'double'
                     },
                     {
-                        'Name': 'median',
+                        'Name': 'p50',
                         'Type': 'double'
                     },
                     {
@@ -1584,15 +1935,15 @@ def metrics_etl_timer_table(template):
                         'Type': 'double'
                     },
                     {
-                        'Name': 'm1',
+                        'Name': 'm1_rate',
                         'Type': 'double'
                     },
                     {
-                        'Name': 'm5',
+                        'Name': 'm5_rate',
                         'Type': 'double'
                     },
                     {
-                        'Name': 'm15',
+                        'Name': 'm15_rate',
                         'Type': 'double'
                     },
                     {
@@ -1633,3 +1984,143 @@ def metrics_etl_timer_table(template):
 
     assert 'org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat' == input_format_capture.as_string()
     assert 'org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat' == output_format_capture.as_string()
+
+
+def metrics_sidecar_container(template):
+    metrics_bucket = {"Ref": Match.string_like_regexp("^DataSyncMetricsBucket")}
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": Match.array_with([
+                Match.object_like({
+                    "Name": "Prebid-Container",
+                    # the dependency on the sidecar stays when the log router is left out of the task
+                    "DependsOn": {
+                        "Fn::If": [
+                            "MetricsStreamingCondition",
+                            Match.array_with([{"Condition": "START", "ContainerName": "Metrics-Sidecar"}]),
+                            [{"Condition": "START", "ContainerName": "Metrics-Sidecar"}],
+                        ]
+                    },
+                    "Environment": Match.array_with([{"Name": "METRICS_SIDECAR_ENABLED", "Value": "true"}]),
+                }),
+                Match.object_like({
+                    "Name": "Metrics-Sidecar",
+                    "Essential": False,
+                    "EntryPoint": Match.array_with([Match.string_like_regexp("ship_metrics.py")]),
+                    "Command": [
+                        "--source", globals.METRICS_BUFFER_PATH,
+                        "--destination", {"Fn::Join": ["", ["s3://", metrics_bucket]]},
+                    ],
+                    "MountPoints": [
+                        {
+                            "ContainerPath": globals.METRICS_BUFFER_PATH,
+                            "ReadOnly": False,
+                            "SourceVolume": globals.METRICS_BUFFER_VOLUME_NAME,
+                        }
+                    ],
+                    "StopTimeout": globals.CONTAINER_STOP_TIMEOUT_SECS,
+                }),
+            ]),
+        },
+    )
+    # the sidecar uploads the archives, DataSync no longer transfers them from EFS
+    template.resource_count_is("AWS::DataSync::Task", 0)
+
+
+def metrics_sidecar_task_role_grants(template):
+    template.has_resource_properties(
+        "AWS::IAM::Policy",
+        {
+            "PolicyDocument": {
+                "Statement": Match.array_with([
+                    Match.object_like({
+                        "Action": Match.array_with(["s3:PutObject", "s3:Abort*"]),
+                        "Effect": "Allow",
+                        "Resource": {
+                            "Fn::Join": ["", [{"Fn::GetAtt": [Match.string_like_regexp("^DataSyncMetricsBucket"), "Arn"]}, "/*"]]
+                        },
+                    }),
+                    Match.object_like({
+                        "Action": Match.array_with(["kms:Encrypt", "kms:GenerateDataKey*", "kms:Decrypt"]),
+                        "Effect": "Allow",
+                        "Resource": {"Fn::GetAtt": [Match.string_like_regexp("DataSyncMetricsBucketKey"), "Arn"]},
+                    }),
+                ]),
+            },
+            "Roles": [{"Ref": Match.string_like_regexp("ECSTaskPrebidTaskDefTaskRole")}],
+        },
+    )
+
+
+def metrics_sidecar_object_created_trigger(template):
+    template.has_resource_properties(
+        "Custom::S3BucketNotifications",
+        {
+            "BucketName": {"Ref": Match.string_like_regexp("^DataSyncMetricsBucket")},
+            "NotificationConfiguration": {"EventBridgeConfiguration": {}},
+        },
+    )
+
+    queue = Capture()
+    template.has_resource_properties(
+        "AWS::Events::Rule",
+        {
+            "EventPattern": {
+                "source": ["aws.s3"],
+                "detail-type": ["Object Created"],
+                "detail": {
+                    "bucket": {"name": [{"Ref": Match.string_like_regexp("^DataSyncMetricsBucket")}]},
+                    "object": {"key": [{"suffix": ".log.gz"}]},
+                },
+            },
+            "Targets": [Match.object_like({"Arn": {"Fn::GetAtt": [queue, "Arn"]}})],
+        },
+    )
+    dead_letter_queue = Capture()
+    template.has_resource("AWS::SQS::Queue", {"Properties": {
+        "SqsManagedSseEnabled": True,
+        "VisibilityTimeout": 1800,
+        "MessageRetentionPeriod": 345600,
+        "RedrivePolicy": {
+            "deadLetterTargetArn": {"Fn::GetAtt": [dead_letter_queue, "Arn"]},
+            "maxReceiveCount": globals.METRICS_EVENTS_MAX_RECEIVE_COUNT,
+        },
+    }})
+    assert queue.as_string() in template.find_resources("AWS::SQS::Queue")
+    template.has_resource_properties(
+        "AWS::CloudWatch::Alarm",
+        {
+            "MetricName": "ApproximateNumberOfMessagesVisible",
+            "Namespace": "AWS/SQS",
+            "Dimensions": [{"Name": "QueueName", "Value": {"Fn::GetAtt": [dead_letter_queue.as_string(), "QueueName"]}}],
+            "Threshold": 1,
+        },
+    )
+
+    template.has_resource_properties(
+        "AWS::Lambda::EventSourceMapping",
+        {
+            "EventSourceArn": {"Fn::GetAtt": [queue.as_string(), "Arn"]},
+            "FunctionName": {"Ref": Match.string_like_regexp("^MetricsEtlTriggerFunction")},
+            "BatchSize": globals.METRICS_EVENTS_BATCH_SIZE,
+            "MaximumBatchingWindowInSeconds": globals.METRICS_EVENTS_BATCH_WINDOW_SECS,
+            "ScalingConfig": {"MaximumConcurrency": globals.METRICS_EVENTS_MAX_CONCURRENCY},
+            "FunctionResponseTypes": ["ReportBatchItemFailures"],
+        },
+    )
+    # one Glue job run per invocation, the DataSync trigger is not deployed with the metrics sidecar
+    assert globals.METRICS_EVENTS_MAX_CONCURRENCY < globals.GLUE_MAX_CONCURRENT_RUNS
+    template.has_resource_properties(
+        "AWS::IAM::Policy",
+        {
+            "PolicyDocument": {
+                "Statement": Match.array_with([
+                    Match.object_like({
+                        "Action": Match.array_with(["sqs:ReceiveMessage", "sqs:DeleteMessage"]),
+                        "Resource": {"Fn::GetAtt": [queue.as_string(), "Arn"]},
+                    }),
+                ]),
+            },
+        },
+    )
@@ -0,0 +1,95 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+# ###############################################################################
+# PURPOSE:
+#   * Unit test for the Python bundling of Lambda functions and layers in
+#     cdk_solution_helper_py/helpers_cdk/aws_solutions/cdk/aws_lambda/python/bundling.py.
+#   * The metrics layer is bundled as a small real-world example.
+# USAGE:
+#   ./run-unit-tests.sh --test-file-name test_python_bundling.py
+###############################################################################
+
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from aws_cdk.aws_lambda import Runtime
+
+LAYER_PATH = Path(__file__).parents[2] / "infrastructure" / "aws_lambda_layers" / "metrics_layer"
+
+
+@patch("aws_solutions.cdk.aws_lambda.python.bundling.BUNDLER_DEPENDENCIES_CACHE", "")
+def test_metrics_layer_bundle_is_precompiled_and_pruned(tmp_path):
+    from aws_solutions.cdk.aws_lambda.python.bundling import SolutionsPythonBundling
+
+    runtime = Runtime(f"python{sys.version_info.major}.{sys.version_info.minor}")
+    bundling = SolutionsPythonBundling(
+        LAYER_PATH / "requirements",
+        libraries=[LAYER_PATH / "python" / "cloudwatch_metrics"],
+        install_path="python",
+        runtime=runtime,
+    )
+    stale_cache = tmp_path / "python" / "cloudwatch_metrics" / "__pycache__"
+    stale_cache.mkdir(parents=True)
+    (stale_cache / "stale.cpython-00.pyc").write_bytes(b"stale")
+
+    assert bundling.try_bundle(str(tmp_path), options=None)
+
+    package = tmp_path / "python" / "cloudwatch_metrics"
+    compiled = sorted(path.name for path in (package / "__pycache__").iterdir())
+    assert compiled == [
+        f"__init__.{sys.implementation.cache_tag}.pyc",
+        f"metrics.{sys.implementation.cache_tag}.pyc",
+    ]
+    assert (package / "metrics.py").is_file()
+
+
+@patch("aws_solutions.cdk.aws_lambda.python.bundling.BUNDLER_DEPENDENCIES_CACHE", "")
+def test_bundle_skips_precompile_for_other_runtime(tmp_path):
+    from aws_solutions.cdk.aws_lambda.python.bundling import SolutionsPythonBundling
+
+    bundling = SolutionsPythonBundling(
+        LAYER_PATH / "requirements",
+        libraries=[LAYER_PATH / "python" / "cloudwatch_metrics"],
+        install_path="python",
+        runtime=Runtime("python2.7"),
+    )
+
+    assert bundling.try_bundle(str(tmp_path), options=None)
+    assert not list(tmp_path.rglob("*.pyc"))
+
+
+def fake_bundle(_, output_dir):
+    (Path(output_dir) / "python").mkdir(parents=True)
+
+
+def test_bundle_cache(tmp_path):
+    from aws_solutions.cdk.aws_lambda.python.bundling import SolutionsPythonBundling
+
+    cache_dir = tmp_path / "cache"
+    with patch("aws_solutions.cdk.aws_lambda.python.bundling.BUNDLER_DEPENDENCIES_CACHE", str(cache_dir)), \
+            patch.object(SolutionsPythonBundling, "_bundlings", []), \
+            patch.object(SolutionsPythonBundling, "_timings", {}):
+        bundlings = [
+            SolutionsPythonBundling(
+                LAYER_PATH / "requirements",
+                libraries=[LAYER_PATH / "python" / "cloudwatch_metrics"],
+                install_path="python",
+            )
+            for _ in range(2)
+        ]
+        assert bundlings[0].cache_key == bundlings[1].cache_key
+
+        # identical bundles are built once, in parallel with any other pending bundle
+        with patch.object(SolutionsPythonBundling, "_bundle", autospec=True, side_effect=fake_bundle) as mock_bundle:
+            SolutionsPythonBundling.prebundle()
+            mock_bundle.assert_called_once()
+            assert (cache_dir / bundlings[0].cache_key / "python").is_dir()
+
+            for idx, bundling in enumerate(bundlings):
+                assert bundling.try_bundle(str(tmp_path / f"output-{idx}"), options=None)
+                assert (tmp_path / f"output-{idx}" / "python").is_dir()
+            mock_bundle.assert_called_once()
+
+        assert SolutionsPythonBundling._timings["metrics_layer/requirements"][1] == "prebundled"
+        assert not list(cache_dir.glob("*.partial")) and not list(cache_dir.glob("*.build"))
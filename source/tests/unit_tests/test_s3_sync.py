@@ -0,0 +1,84 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+# ###############################################################################
+# PURPOSE:
+#   * Unit test for the asset uploader used by build-s3-cdk-dist deploy --sync.
+# USAGE:
+#   ./run-unit-tests.sh --test-file-name test_s3_sync.py
+###############################################################################
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from aws_solutions.cdk.tools.s3_sync import S3Sync, sync_all
+from aws_solutions.core.s3_sync import CONTENT_MD5_METADATA, file_md5
+
+REGIONS = ["us-east-1", "us-west-2", "eu-west-1"]
+
+
+@pytest.fixture
+def assets(tmp_path):
+    (tmp_path / "asset.zip").write_bytes(b"zip" * 1024)
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "template.json").write_text("{}")
+    return tmp_path
+
+
+def create_bucket(name, region):
+    s3 = boto3.client("s3", region_name=region)
+    if region == "us-east-1":
+        s3.create_bucket(Bucket=name)
+    else:
+        s3.create_bucket(Bucket=name, CreateBucketConfiguration={"LocationConstraint": region})
+    return s3
+
+
+@mock_aws
+def test_sync_uploads_only_changed_files(assets):
+    s3 = create_bucket("solutions-us-east-1", "us-east-1")
+    s3_sync = S3Sync(local_path=assets, bucket="solutions-us-east-1", prefix="/solution/v1.0.0/", region="us-east-1")
+
+    result = s3_sync.sync()
+    assert sorted(result.uploaded) == ["solution/v1.0.0/asset.zip", "solution/v1.0.0/nested/template.json"]
+    metadata = s3.head_object(Bucket="solutions-us-east-1", Key="solution/v1.0.0/asset.zip")["Metadata"]
+    assert metadata[CONTENT_MD5_METADATA] == file_md5(assets / "asset.zip")
+
+    # rebuilding an asset with the same content does not upload it again
+    (assets / "asset.zip").write_bytes(b"zip" * 1024)
+    result = s3_sync.sync()
+    assert result.uploaded == []
+    assert len(result.skipped) == 2
+
+    # same size, different content
+    (assets / "asset.zip").write_bytes(b"pkz" * 1024)
+    result = s3_sync.sync()
+    assert result.uploaded == ["solution/v1.0.0/asset.zip"]
+    body = s3.get_object(Bucket="solutions-us-east-1", Key="solution/v1.0.0/asset.zip")["Body"].read()
+    assert body == b"pkz" * 1024
+
+    # assets removed locally are kept in the bucket, like aws s3 sync without --delete
+    (assets / "nested" / "template.json").unlink()
+    s3_sync.sync()
+    assert s3.head_object(Bucket="solutions-us-east-1", Key="solution/v1.0.0/nested/template.json")
+
+
+@mock_aws
+def test_sync_all_regional_buckets(assets):
+    syncs = []
+    for region in REGIONS:
+        create_bucket(f"solutions-{region}", region)
+        syncs.append(S3Sync(local_path=assets, bucket=f"solutions-{region}", prefix="solution/v1.0.0", region=region))
+
+    results = sync_all(syncs)
+    assert [result.destination for result in results] == [f"s3://solutions-{region}/solution/v1.0.0" for region in REGIONS]
+    assert all(len(result.uploaded) == 2 for result in results)
+
+    results = sync_all(syncs)
+    assert all(not result.uploaded for result in results)
+
+
+def test_sync_requires_directory(tmp_path):
+    with mock_aws():
+        with pytest.raises(ValueError):
+            S3Sync(local_path=tmp_path / "missing", bucket="bucket", prefix="prefix").sync()